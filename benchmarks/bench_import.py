@@ -0,0 +1,19 @@
+'''
+Import-time benchmarks
+
+Each ``timeraw_*`` benchmark is run by asv in a fresh interpreter, so it
+measures the cost of ``import metacsv`` paid by the command line scripts and
+worker processes. ``import pandas`` is the baseline.
+'''
+
+from __future__ import absolute_import, division, print_function, \
+    with_statement, unicode_literals
+
+
+def timeraw_import_pandas():
+    return 'import pandas'
+
+
+def timeraw_import_metacsv():
+    return 'import metacsv'
+
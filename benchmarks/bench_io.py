@@ -0,0 +1,93 @@
+'''
+Benchmarks for reading, writing and converting metacsv data
+
+Run with airspeed velocity (``asv run``) from the repository root. Every
+operation is timed (``time_*``) and its peak memory tracked (``peakmem_*``).
+'''
+
+from __future__ import absolute_import, division, print_function, \
+    with_statement, unicode_literals
+
+import metacsv
+
+from .common import make_dataframe, TempFiles
+
+
+class ReadHeader(TempFiles):
+    params = [10, 100, 1000]
+    param_names = ['header_size']
+
+    def setup(self, header_size):
+        self.setup_tempdir()
+        self.fp = self.path('data.csv')
+        make_dataframe(nrows=1000, header_size=header_size).to_csv(self.fp)
+
+    def time_read_header(self, header_size):
+        metacsv.read_header(self.fp)
+
+    def peakmem_read_header(self, header_size):
+        metacsv.read_header(self.fp)
+
+
+class ReadCSV(TempFiles):
+    params = [[1000, 100000], [2, 20]]
+    param_names = ['nrows', 'ncols']
+
+    def setup(self, nrows, ncols):
+        self.setup_tempdir()
+        self.fp = self.path('data.csv')
+        make_dataframe(nrows=nrows, ncols=ncols).to_csv(self.fp)
+
+    def time_read_csv(self, nrows, ncols):
+        metacsv.read_csv(self.fp)
+
+    def peakmem_read_csv(self, nrows, ncols):
+        metacsv.read_csv(self.fp)
+
+
+class WriteCSV(TempFiles):
+    params = [[1000, 100000], [2, 20], ['pandas', 'pyarrow']]
+    param_names = ['nrows', 'ncols', 'engine']
+
+    def setup(self, nrows, ncols, engine):
+        if engine == 'pyarrow':
+            try:
+                import pyarrow.csv
+            except ImportError:
+                raise NotImplementedError('pyarrow is not installed')
+
+        self.setup_tempdir()
+        self.df = make_dataframe(nrows=nrows, ncols=ncols)
+
+    def time_to_csv(self, nrows, ncols, engine):
+        self.df.to_csv(self.path('data.csv'), engine=engine)
+
+    def peakmem_to_csv(self, nrows, ncols, engine):
+        self.df.to_csv(self.path('data.csv'), engine=engine)
+
+
+class ToXarray(TempFiles):
+    params = [[1000, 100000], [1, 3]]
+    param_names = ['nrows', 'coord_depth']
+
+    def setup(self, nrows, coord_depth):
+        self.setup_tempdir()
+        self.df = make_dataframe(nrows=nrows, coord_depth=coord_depth)
+
+    def time_to_xarray(self, nrows, coord_depth):
+        metacsv.to_xarray(self.df)
+
+    def peakmem_to_xarray(self, nrows, coord_depth):
+        metacsv.to_xarray(self.df)
+
+    def time_to_dataarray(self, nrows, coord_depth):
+        metacsv.to_dataarray(self.df)
+
+    def peakmem_to_dataarray(self, nrows, coord_depth):
+        metacsv.to_dataarray(self.df)
+
+    def time_to_netcdf(self, nrows, coord_depth):
+        metacsv.to_netcdf(self.df, self.path('data.nc'))
+
+    def peakmem_to_netcdf(self, nrows, coord_depth):
+        metacsv.to_netcdf(self.df, self.path('data.nc'))
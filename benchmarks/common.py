@@ -0,0 +1,74 @@
+'''
+Synthetic data generators for the metacsv benchmark suite
+'''
+
+from __future__ import absolute_import, division, print_function, \
+    with_statement, unicode_literals
+
+import os
+import shutil
+import tempfile
+import string
+import numpy as np
+import pandas as pd
+
+import metacsv
+
+
+def make_dataframe(nrows=1000, ncols=4, header_size=10, coord_depth=2, seed=0):
+    '''
+    Build a metacsv.DataFrame of roughly ``nrows`` rows
+
+    The index is a sorted Cartesian product of ``coord_depth`` base
+    coordinates, plus one coordinate depending on the first base coordinate.
+    ``header_size`` controls the number of attributes and the length of
+    each variable's description.
+    '''
+
+    rng = np.random.RandomState(seed)
+
+    base_size = max(2, int(round(nrows ** (1.0 / coord_depth))))
+    base_coords = ['dim{}'.format(i) for i in range(coord_depth)]
+
+    levels = [np.arange(base_size)] * coord_depth
+    index = pd.MultiIndex.from_product(levels, names=base_coords)[:nrows]
+
+    df = metacsv.DataFrame(
+        rng.random_sample((len(index), ncols)),
+        columns=['var{}'.format(i) for i in range(ncols)])
+
+    df['label'] = np.asarray(
+        ['label{}'.format(i) for i in range(base_size)]
+    )[index.get_level_values(0)]
+
+    df.index = index
+    df.set_index('label', append=True, inplace=True)
+
+    coords = dict((c, None) for c in base_coords)
+    coords['label'] = base_coords[0]
+    df.coords = coords
+
+    df.attrs = dict(
+        ('attr{}'.format(i), ''.join(
+            rng.choice(list(string.ascii_letters), 20)))
+        for i in range(header_size))
+
+    df.variables = dict(
+        (c, {'description': 'variable ' * max(1, header_size // 10), 'unit': 'units'})
+        for c in df.columns)
+
+    return df
+
+
+class TempFiles(object):
+    '''Mixin providing a temporary directory removed on teardown'''
+
+    def setup_tempdir(self):
+        self.tmpdir = tempfile.mkdtemp(prefix='metacsv-bench-')
+
+    def teardown(self, *args):
+        if hasattr(self, 'tmpdir') and os.path.isdir(self.tmpdir):
+            shutil.rmtree(self.tmpdir)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir, name)
@@ -25,6 +25,9 @@ from .core import *
 from .io.parsers import (
     read_header,
     read_csv,
+    read_many,
+    read_partitioned,
+    read_netcdf,
     read_pickle)
 
 from .io.converters import (
@@ -34,6 +37,16 @@ from .io.converters import (
     to_netcdf,
     to_pandas,
     to_csv,
-    to_header)
+    to_header,
+    append_csv,
+    update_header)
+
+from .io.indexing import build_row_index, build_index
+
+from .instrumentation import (
+    StageEvent,
+    instrument,
+    register_callback,
+    unregister_callback)
 
 from .scripts import *
@@ -10,7 +10,7 @@ if PY2:
     text_type = unicode
     string_types = (str, unicode)
     integer_types = (int, long)
-    from urllib import urlretrieve
+    from urllib import urlretrieve, quote, unquote
 
     text_to_native = lambda s, enc: s.encode(enc)
 
@@ -72,6 +72,7 @@ else:
     import urllib.parse as urllib
     import urllib.parse as urlparse
     from urllib.request import urlretrieve
+    from urllib.parse import quote, unquote
 
     console_encoding = sys.__stdout__.encoding
 
@@ -8,3 +8,5 @@ from .containers import (
     Panel
     )
 
+from .combine import concat, merge
+from .datacube import DataCube
@@ -0,0 +1,152 @@
+'''
+Aggregation of metacsv containers along the coordinate graph
+'''
+
+from __future__ import absolute_import, division, print_function, \
+    with_statement, unicode_literals
+
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from .._compat import string_types
+
+
+def _level_codes(index):
+    '''Integer codes and unique values of each index level'''
+
+    if isinstance(index, pd.MultiIndex):
+        codes = index.codes if hasattr(index, 'codes') else index.labels
+        return OrderedDict(
+            (name, (np.asarray(c), level))
+            for name, c, level in zip(index.names, codes, index.levels))
+
+    codes, uniques = pd.factorize(index)
+    return OrderedDict([(index.name, (codes, pd.Index(uniques)))])
+
+
+def _rollup_coords(coords, coord):
+    '''
+    Coordinates of ``coords`` rolled up to ``coord``
+
+    ``coord`` replaces the base coordinates it depends on. Other base
+    coordinates are kept, as are dependent coordinates whose dependencies
+    are all kept.
+    '''
+
+    if coord not in coords._coords:
+        raise ValueError('"{}" is not a coordinate'.format(coord))
+
+    if coord in coords.base_coords:
+        raise ValueError(
+            '"{}" is a base coordinate and cannot be rolled up to'.format(coord))
+
+    replaced = coords._base_dependencies[coord]
+
+    keys = [c for c in coords.base_coords if c not in replaced] + [coord]
+    kept = OrderedDict((c, None) for c in keys)
+
+    changed = True
+    while changed:
+        changed = False
+        for c, deps in coords._coords.items():
+            if c not in kept and deps is not None and all(d in kept for d in deps):
+                kept[c] = deps
+                changed = True
+
+    return keys, kept
+
+
+def _group_ids(levels, keys):
+    codes = [levels[k][0] for k in keys]
+    shape = tuple(len(levels[k][1]) for k in keys)
+
+    valid = np.logical_and.reduce([c >= 0 for c in codes])
+
+    codes = [np.where(valid, c, 0) for c in codes]
+
+    if np.prod(shape, dtype=float) < 2**62:
+        ids = np.ravel_multi_index(codes, shape)
+    else:
+        # too many combinations to number directly: number the ones present
+        ids = codes[0]
+        for c, n in zip(codes[1:], shape[1:]):
+            ids = pd.factorize(ids * n + c, sort=True)[0]
+
+    return np.where(valid, ids, -1)
+
+
+def _count_distinct(groups, values):
+    '''
+    Number of distinct ``values`` (missing values count as one value) in
+    each group, for groups numbered ``0..n-1``
+    '''
+
+    if len(groups) == 0:
+        return np.zeros(0, dtype=int)
+
+    codes = pd.factorize(values)[0] + 1
+    n = codes.max() + 1
+
+    pairs = np.unique(groups.astype(np.int64) * n + codes)
+    return np.bincount(pairs // n, minlength=groups.max() + 1)
+
+
+def _dense_groups(levels, keys):
+    '''
+    Number the combinations of ``keys`` present in the index ``0..n-1``
+
+    Returns the group of each row (-1 where a key is missing) and the first
+    row of each group.
+    '''
+
+    ids = _group_ids(levels, keys)
+    valid = np.flatnonzero(ids >= 0)
+
+    _, first, groups = np.unique(ids[valid], return_index=True, return_inverse=True)
+
+    dense = np.full(len(ids), -1, dtype=np.int64)
+    dense[valid] = groups
+
+    return dense, valid[first]
+
+
+def _rollup_one(container, levels, coord, how):
+    keys, kept = _rollup_coords(container.coords, coord)
+
+    groups, first = _dense_groups(levels, keys)
+    valid = groups >= 0
+
+    index = pd.MultiIndex.from_arrays(
+        [levels[c][1].take(levels[c][0][first]) for c in kept],
+        names=list(kept))
+
+    data = container.pandas_parent(container, copy=False)
+    data = data.iloc[np.flatnonzero(valid)] if not valid.all() else data
+
+    values = data.groupby(groups[valid], sort=True).agg(how)
+    values.index = index if len(kept) > 1 else index.get_level_values(0)
+
+    return type(container)(
+        values,
+        coords=kept,
+        attrs=container.attrs.copy(),
+        variables=container.variables.copy())
+
+
+def rollup(container, coord, how='sum'):
+    '''
+    Aggregate a container up the coordinate graph
+
+    See :py:meth:`metacsv.DataFrame.rollup`
+    '''
+
+    if container.coords == None:
+        raise ValueError('Cannot roll up a container without coordinates')
+
+    levels = _level_codes(container.index)
+
+    if isinstance(coord, string_types):
+        return _rollup_one(container, levels, coord, how)
+
+    return OrderedDict(
+        (c, _rollup_one(container, levels, c, how)) for c in coord)
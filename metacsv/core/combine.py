@@ -0,0 +1,253 @@
+'''
+Metadata-aware concat and merge of metacsv containers
+
+Data are combined with a single call to pandas.concat or pandas.merge.
+Metadata are combined with these rules:
+
+* coords: every input with coordinates must define the same coordinate graph
+  (concat), or the graphs must agree on the coordinates they share (merge).
+  Inconsistent graphs raise a ValueError.
+* variables: the union of all variables. Metadata of a variable defined by
+  several inputs are combined like attrs.
+* attrs: combined according to ``combine_attrs``:
+
+  ``'drop_conflicts'`` (default)
+      keep attributes that agree across the inputs, drop those that differ
+      and report them with a :py:class:`MetadataConflictWarning`
+  ``'raise'``
+      raise a ValueError listing the conflicts
+  ``'first'``
+      keep the value from the first input that defines the attribute
+'''
+
+from __future__ import absolute_import, division, print_function, \
+    with_statement, unicode_literals
+
+import warnings
+import pandas as pd
+from collections import OrderedDict
+
+from .internals import Container, PandasPanel
+from .containers import Series, DataFrame, Panel
+
+COMBINE_ATTRS = ('drop_conflicts', 'raise', 'first')
+
+
+class MetadataConflictWarning(UserWarning):
+    '''Metadata dropped because the combined containers disagree'''
+
+
+def _to_pandas(obj):
+    if isinstance(obj, Container):
+        return obj.pandas_parent(obj, copy=False)
+    return obj
+
+
+def _coord_graph(obj):
+    coords = getattr(obj, 'coords', None)
+    if not isinstance(obj, Container) or coords == None:
+        return None
+
+    return OrderedDict(
+        (k, frozenset(v if v is not None else []))
+        for k, v in coords._coords.items())
+
+
+def _coord_definition(graph):
+    return OrderedDict(
+        (k, sorted(v) if len(v) > 0 else None) for k, v in graph.items())
+
+
+def _combine_dicts(dicts, combine_attrs, name):
+    if combine_attrs not in COMBINE_ATTRS:
+        raise ValueError('combine_attrs must be one of {}, not "{}"'.format(
+            ', '.join(COMBINE_ATTRS), combine_attrs))
+
+    combined = OrderedDict()
+    conflicts = []
+
+    for d in dicts:
+        for k, v in d.items():
+            if k not in combined:
+                combined[k] = v
+            elif combined[k] != v and k not in conflicts:
+                conflicts.append(k)
+
+    if len(conflicts) == 0 or combine_attrs == 'first':
+        return combined
+
+    message = 'Conflicting values of {} {}'.format(
+        name, ', '.join(map(str, conflicts)))
+
+    if combine_attrs == 'raise':
+        raise ValueError(message)
+
+    warnings.warn(message + ' were dropped', MetadataConflictWarning, stacklevel=4)
+
+    for k in conflicts:
+        del combined[k]
+
+    return combined
+
+
+def _combine_attrs(objs, combine_attrs):
+    return _combine_dicts(
+        [OrderedDict(o.attrs.items()) for o in objs if isinstance(o, Container)],
+        combine_attrs, 'attrs')
+
+
+def _combine_variables(objs, combine_attrs):
+    definitions = OrderedDict()
+
+    for o in objs:
+        if not isinstance(o, Container):
+            continue
+        for var, meta in o.variables.items():
+            definitions.setdefault(var, []).append(meta if meta is not None else {})
+
+    combined = OrderedDict()
+
+    for var, metas in definitions.items():
+        if all(isinstance(m, dict) for m in metas):
+            combined[var] = _combine_dicts(
+                metas, combine_attrs, 'variable {} attribute'.format(var))
+        else:
+            # compact string definitions are compared as a whole
+            combined.update(_combine_dicts(
+                [{var: m} for m in metas], combine_attrs, 'variables'))
+
+    return combined
+
+
+def _wrap(data, coords, attrs, variables):
+    container = (Series if isinstance(data, pd.Series) else DataFrame)(data)
+    container.coords = coords if coords is not None and len(coords) > 0 else None
+    container.attrs = attrs if len(attrs) > 0 else None
+    container.variables = variables if len(variables) > 0 else None
+    return container
+
+
+def concat(objs, combine_attrs='drop_conflicts', *args, **kwargs):
+    '''
+    Concatenate metacsv or pandas containers, combining their metadata
+
+    Args:
+        objs (list): metacsv or pandas Series and DataFrames. Every input with
+            coordinates must define the same coordinate graph.
+
+    Kwargs:
+        combine_attrs (str): ``'drop_conflicts'`` (default), ``'raise'`` or
+            ``'first'`` (see metacsv.core.combine)
+
+    *args, **kwargs passed to pandas.concat
+
+    Returns:
+        container (object): metacsv Series or DataFrame
+
+    Example:
+
+        >>> df = metacsv.concat(metacsv.read_many('data/shard_*.csv'))
+    '''
+
+    objs = list(objs)
+
+    if any(isinstance(o, Panel) or (PandasPanel is not None and isinstance(o, PandasPanel)) for o in objs):
+        raise NotImplementedError('Only Series and DataFrames can be concatenated')
+
+    graphs = [g for g in map(_coord_graph, objs) if g is not None]
+    for graph in graphs[1:]:
+        if graph != graphs[0]:
+            raise ValueError(
+                'Cannot concatenate containers with different coordinates: '
+                '{} and {}'.format(
+                    dict(_coord_definition(graphs[0])), dict(_coord_definition(graph))))
+
+    attrs = _combine_attrs(objs, combine_attrs)
+    variables = _combine_variables(objs, combine_attrs)
+
+    data = pd.concat([_to_pandas(o) for o in objs], *args, **kwargs)
+
+    return _wrap(
+        data, _coord_definition(graphs[0]) if len(graphs) > 0 else None,
+        attrs, variables)
+
+
+def _merge_graphs(left, right):
+    if left is None or right is None:
+        return left if right is None else right
+
+    merged = OrderedDict(left)
+
+    for coord, deps in right.items():
+        if coord in merged and merged[coord] != deps:
+            raise ValueError(
+                'Coordinate "{}" depends on {} in one container and {} in the '
+                'other'.format(coord, sorted(merged[coord]), sorted(deps)))
+        merged.setdefault(coord, deps)
+
+    return merged
+
+
+def _coords_to_columns(obj, graph):
+    data = _to_pandas(obj)
+    if graph is None:
+        return data
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+    return data.reset_index()
+
+
+def merge(left, right, how='inner', on=None, combine_attrs='drop_conflicts',
+          *args, **kwargs):
+    '''
+    Merge two metacsv or pandas containers, combining their metadata
+
+    Coordinates are moved to columns before merging and back to the index
+    afterwards, so containers are joined on the coordinates they share unless
+    ``on`` is given. The result has the union of both coordinate graphs,
+    which must agree on the dependencies of shared coordinates.
+
+    Args:
+        left (object): metacsv or pandas Series or DataFrame
+        right (object): metacsv or pandas Series or DataFrame
+
+    Kwargs:
+        how (str): ``'inner'`` (default), ``'outer'``, ``'left'`` or ``'right'``
+        on (str or list): columns to join on. Defaults to the coordinates
+            shared by both containers, or the columns they share if neither
+            has coordinates.
+        combine_attrs (str): ``'drop_conflicts'`` (default), ``'raise'`` or
+            ``'first'`` (see metacsv.core.combine)
+
+    *args, **kwargs passed to pandas.merge
+
+    Returns:
+        container (metacsv.DataFrame)
+
+    Example:
+
+        >>> df = metacsv.merge(population, gdp)
+    '''
+
+    left_graph = _coord_graph(left)
+    right_graph = _coord_graph(right)
+    graph = _merge_graphs(left_graph, right_graph)
+
+    attrs = _combine_attrs([left, right], combine_attrs)
+    variables = _combine_variables([left, right], combine_attrs)
+
+    left_data = _coords_to_columns(left, left_graph)
+    right_data = _coords_to_columns(right, right_graph)
+
+    if on is None and graph is not None:
+        on = [
+            c for c in graph
+            if c in left_data.columns and c in right_data.columns]
+        if len(on) == 0:
+            raise ValueError('The containers have no coordinates in common')
+
+    data = pd.merge(left_data, right_data, how=how, on=on, *args, **kwargs)
+
+    return _wrap(
+        data, _coord_definition(graph) if graph is not None else None,
+        attrs, variables)
@@ -3,13 +3,12 @@ from __future__ import absolute_import, division, print_function, \
 
 import pandas as pd
 import numpy as np
-import xarray as xr
 import yaml
 from .._compat import string_types
 from collections import OrderedDict
-from pandas.core.base import FrozenList
 
-from .internals import Attributes, Container, Coordinates, Variables
+from .internals import Attributes, Container, Coordinates, Variables, PandasPanel
+from ..io import from_xarray
 
 
 class Series(Container, pd.Series):
@@ -30,9 +29,9 @@ class Series(Container, pd.Series):
     pandas_parent = pd.Series
     _metadata = ['_coords', '_attrs', '_variables']
 
-    def copy(self):
+    def copy(self, deep=True):
         return Series(
-            self.pandas_parent.copy(self), 
+            self.pandas_parent.copy(self, deep=deep), 
             coords=self.coords.copy(), 
             attrs=self.attrs.copy(), 
             variables=self.variables.copy())
@@ -70,9 +69,9 @@ class DataFrame(Container, pd.DataFrame):
     pandas_parent = pd.DataFrame
     _metadata = ['_coords', '_attrs', '_variables']
 
-    def copy(self):
+    def copy(self, deep=True):
         return DataFrame(
-            self.pandas_parent.copy(self), 
+            self.pandas_parent.copy(self, deep=deep), 
             coords=self.coords.copy(), 
             attrs=self.attrs.copy(), 
             variables=self.variables.copy())
@@ -95,45 +94,105 @@ class DataFrame(Container, pd.DataFrame):
         pd.DataFrame.__init__(self, *args, **kwargs)
         Container.__init__(self, **special)
 
-
-class Panel(Container, pd.Panel):
-    '''
-    metacsv.Panel, inherrited from pandas.Panel
-
-    Keyword Arguments:
-        attrs     : dict-like
-            Attributes of this container  
-        coords    : list or dict-like
-            Coordinate dependencies  
-        variables :  dict-like
-            Variable-specific attributes   
-
-    *args, **kwargs are passed to pandas.Panel.__init__
+    @classmethod
+    def from_xarray(cls, data, chunksize=2**20):
+        '''
+        Create a metacsv.DataFrame from an xarray DataArray or Dataset
+
+        Dimensions become base coordinates, non-dimension coordinates become
+        coordinates dependent on their dimensions, and coordinate and
+        variable attrs become ``variables``. The data is flattened with
+        ``to_dataframe`` in slices of roughly ``chunksize`` rows, so lazily
+        opened datasets are never loaded all at once.
+
+        Args:
+            data (xarray.DataArray or xarray.Dataset): data to convert
+
+        Kwargs:
+            chunksize (int): approximate number of rows flattened at a time
+
+        Example:
+
+        >>> ds = xr.Dataset(
+        ...     {'pop': (('region', 'year'), np.random.random((2, 3)))},
+        ...     coords={'region': ['USA', 'CAN'], 'year': [2010, 2011, 2012]},
+        ...     attrs={'author': 'my name'})
+        >>> metacsv.DataFrame.from_xarray(ds)
+        <metacsv.core.containers.DataFrame (6, 1)>
+                          pop
+        region year
+        CAN    2010  0.135734
+               2011  0.470823
+               2012  0.392163
+        USA    2010  0.950612
+               2011  0.268407
+               2012  0.681893
+
+        Coordinates
+          * region     (region) object CAN, USA
+          * year       (year) int64 2010, 2011, 2012
+        Attributes
+            author:    my name
+        '''
+
+        frame, special = from_xarray.xarray_to_frame(data, chunksize=chunksize)
+        return cls(frame, **special)
+
+
+if PandasPanel is not None:
+
+    class Panel(Container, PandasPanel):
+        '''
+        metacsv.Panel, inherrited from pandas.Panel
+
+        Keyword Arguments:
+            attrs     : dict-like
+                Attributes of this container  
+            coords    : list or dict-like
+                Coordinate dependencies  
+            variables :  dict-like
+                Variable-specific attributes   
+
+        *args, **kwargs are passed to pandas.Panel.__init__
     
-    Note:
-        metacsv.Panel is not fully implemented
-    '''
-
-    pandas_parent = pd.Panel
-    _metadata = ['_coords', '_attrs', '_variables']
-
-    def copy(self):
-        return Panel(
-            self.pandas_parent.copy(self), 
-            coords=self.coords.copy(), 
-            attrs=self.attrs.copy(), 
-            variables=self.variables.copy())
-
-    @property
-    def _constructor(self):
-        return Panel
-
-    @property
-    def _constructor_sliced(self):
-        return DataFrame
-
-    def __init__(self, *args, **kwargs):
-        args, kwargs, special = Container.strip_special_attributes(
-            args, kwargs)
-        pd.Panel.__init__(self, *args, **kwargs)
-        Container.__init__(self, **special)
+        Note:
+            metacsv.Panel is not fully implemented
+        '''
+
+        pandas_parent = PandasPanel
+        _metadata = ['_coords', '_attrs', '_variables']
+
+        def copy(self):
+            return Panel(
+                self.pandas_parent.copy(self), 
+                coords=self.coords.copy(), 
+                attrs=self.attrs.copy(), 
+                variables=self.variables.copy())
+
+        @property
+        def _constructor(self):
+            return Panel
+
+        @property
+        def _constructor_sliced(self):
+            return DataFrame
+
+        def __init__(self, *args, **kwargs):
+            args, kwargs, special = Container.strip_special_attributes(
+                args, kwargs)
+            PandasPanel.__init__(self, *args, **kwargs)
+            Container.__init__(self, **special)
+
+else:
+
+    class Panel(object):
+        '''
+        Placeholder for metacsv.Panel, which requires pandas.Panel (removed in
+        pandas 0.25). Use metacsv.DataCube for N-dimensional data.
+        '''
+
+        def __init__(self, *args, **kwargs):
+            raise TypeError(
+                'metacsv.Panel requires pandas.Panel, which was removed in '
+                'pandas 0.25 (found {}). Use metacsv.DataCube for '
+                'N-dimensional data.'.format(pd.__version__))
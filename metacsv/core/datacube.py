@@ -0,0 +1,371 @@
+'''
+N-dimensional metacsv container
+'''
+
+from __future__ import absolute_import, division, print_function, \
+    with_statement, unicode_literals
+
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+from .internals import Attributes, Coordinates, Variables, Container
+from .containers import DataFrame
+from .aggregation import _level_codes
+from ..io import from_xarray
+
+
+def _make_multiindex(levels, codes, names):
+    try:
+        return pd.MultiIndex(
+            levels=levels, codes=codes, names=names, verify_integrity=False)
+    except TypeError:
+        # pandas < 0.24
+        return pd.MultiIndex(
+            levels=levels, labels=codes, names=names, verify_integrity=False)
+
+
+def _empty_like(values, size, full):
+    '''Array of ``size`` missing values that can hold ``values``'''
+
+    dtype = values.dtype
+
+    if full:
+        return np.empty(size, dtype=dtype)
+
+    if dtype.kind in 'iu':
+        dtype = np.dtype(float)
+    elif dtype.kind == 'b':
+        dtype = np.dtype(object)
+
+    fill = np.datetime64('NaT') if dtype.kind in 'mM' else np.nan
+    filled = np.empty(size, dtype=dtype)
+    filled.fill(fill)
+
+    return filled
+
+
+def _grid_codes(shape):
+    '''Codes of each dimension for every cell of an array of ``shape``'''
+
+    codes = []
+    for i, n in enumerate(shape):
+        inner = int(np.prod(shape[i + 1:]))
+        outer = int(np.prod(shape[:i]))
+        codes.append(np.tile(np.repeat(np.arange(n), inner), outer))
+    return codes
+
+
+class DataCube(object):
+    '''
+    N-dimensional metacsv container
+
+    Data variables are numpy arrays over the dimensions ``dims``, which are
+    the base coordinates. Dependent coordinates are arrays over the base
+    coordinates they depend on. DataCube replaces metacsv.Panel, which
+    depends on ``pandas.Panel`` and is unavailable on pandas >= 0.25.
+
+    Args:
+        data (dict-like): arrays of shape ``[len(i) for i in indexes.values()]``
+            by variable name
+        indexes (dict-like): values of each dimension, in dimension order
+
+    Kwargs:
+        coord_values (dict-like): ``(dims, array)`` of each dependent
+            coordinate, by name
+        coords (dict-like): coordinate graph. Defaults to the dimensions as
+            base coordinates, with each dependent coordinate depending on
+            the dimensions of its array.
+        attrs (dict-like): attributes
+        variables (dict-like): variable-specific attributes
+
+    Example:
+
+    >>> cube = metacsv.DataCube(
+    ...     {'pop': np.array([[309.3, 311.7], [34.0, 34.3]])},
+    ...     OrderedDict([('region', ['USA', 'CAN']), ('year', [2010, 2011])]),
+    ...     attrs={'author': 'A Person'})
+    >>> cube.to_dataframe()
+    <metacsv.core.containers.DataFrame (4, 1)>
+                   pop
+    region year
+    USA    2010  309.3
+           2011  311.7
+    CAN    2010   34.0
+           2011   34.3
+    ...
+    '''
+
+    def __init__(self, data, indexes, coord_values=None, coords=None, attrs=None, variables=None):
+        self.indexes = OrderedDict(
+            (dim, pd.Index(values, name=dim)) for dim, values in indexes.items())
+
+        shape = self.shape
+
+        self.data = OrderedDict()
+        for name, values in data.items():
+            values = np.asarray(values)
+            if values.shape != shape:
+                raise ValueError(
+                    'Variable "{}" has shape {}, expected {}'.format(
+                        name, values.shape, shape))
+            self.data[name] = values
+
+        self.coord_values = OrderedDict()
+        for name, (dims, values) in (coord_values or {}).items():
+            dims = tuple(dims)
+            values = np.asarray(values)
+            expected = tuple(len(self.indexes[d]) for d in dims)
+            if values.shape != expected:
+                raise ValueError(
+                    'Coordinate "{}" has shape {}, expected {}'.format(
+                        name, values.shape, expected))
+            self.coord_values[name] = (dims, values)
+
+        if coords is None:
+            coords = OrderedDict((d, None) for d in self.indexes)
+            coords.update(
+                (name, list(dims)) for name, (dims, _) in self.coord_values.items())
+
+        self.coords = Coordinates(coords)
+        self.attrs = Attributes(attrs)
+        self.variables = Variables(variables)
+
+    @property
+    def dims(self):
+        return list(self.indexes)
+
+    @property
+    def shape(self):
+        return tuple(len(i) for i in self.indexes.values())
+
+    @property
+    def ndim(self):
+        return len(self.indexes)
+
+    def __getitem__(self, key):
+        if key in self.data:
+            return self.data[key]
+        elif key in self.indexes:
+            return self.indexes[key].values
+        return self.coord_values[key][1]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        lines = ['<{}.{} ({})>'.format(
+            type(self).__module__, type(self).__name__,
+            ', '.join('{}: {}'.format(d, n) for d, n in zip(self.dims, self.shape)))]
+
+        lines.append('Data variables')
+        for name, values in self.data.items():
+            lines.append('    {: <10} ({}) {}'.format(
+                name, ','.join(map(str, self.dims)), values.dtype))
+
+        postscript = [str(p) for p in [self.coords, self.variables, self.attrs] if p != None]
+        return '\n'.join(lines + postscript)
+
+    # Conversions
+
+    @classmethod
+    def from_dataframe(cls, container):
+        '''
+        Create a DataCube from a long-form metacsv Series or DataFrame
+
+        Values are placed by the integer codes of the base coordinates in
+        the index, without stacking or unstacking. Cells missing from the
+        frame are filled with NaN (integer and boolean variables are
+        promoted to hold them).
+
+        Args:
+            container (object): metacsv or pandas Series or DataFrame
+        '''
+
+        if isinstance(container, pd.Series):
+            name = container.name if container.name is not None else 'data'
+            frame = container.to_frame(name=name)
+        else:
+            frame = container
+
+        if isinstance(container, Container) and container.coords != None:
+            coords = container.coords
+        else:
+            coords = Coordinates(list(frame.index.names))
+
+        levels = _level_codes(frame.index)
+        base = list(coords.base_coords)
+
+        indexes = OrderedDict()
+        codes = []
+
+        for dim in base:
+            dim_codes, level = levels[dim]
+            if (dim_codes < 0).any():
+                raise ValueError(
+                    'Base coordinate "{}" has missing values'.format(dim))
+
+            used, inverse = np.unique(dim_codes, return_inverse=True)
+            indexes[dim] = level.take(used)
+            codes.append(inverse)
+
+        shape = tuple(len(i) for i in indexes.values())
+        size = int(np.prod(shape))
+        flat = np.ravel_multi_index(codes, shape) if len(codes) > 0 else np.zeros(len(frame), dtype=int)
+
+        if len(np.unique(flat)) != len(flat):
+            raise ValueError('Data not uniquely indexed for base coords')
+
+        full = len(flat) == size
+
+        data = OrderedDict()
+        for i, name in enumerate(frame.columns):
+            values = np.asarray(frame.iloc[:, i])
+            filled = _empty_like(values, size, full)
+            filled[flat] = values
+            data[name] = filled.reshape(shape)
+
+        coord_values = OrderedDict()
+        for coord in coords:
+            if coord in base:
+                continue
+
+            deps = [d for d in base if d in coords._base_dependencies[coord]]
+            positions = [base.index(d) for d in deps]
+            dep_shape = tuple(shape[p] for p in positions)
+            dep_flat = np.ravel_multi_index([codes[p] for p in positions], dep_shape)
+
+            values = np.asarray(frame.index.get_level_values(coord))
+            filled = _empty_like(
+                values, int(np.prod(dep_shape)),
+                len(np.unique(dep_flat)) == int(np.prod(dep_shape)))
+            filled[dep_flat] = values
+            coord_values[coord] = (deps, filled.reshape(dep_shape))
+
+        return cls(
+            data, indexes, coord_values=coord_values, coords=coords._coords,
+            attrs=getattr(container, 'attrs', None),
+            variables=getattr(container, 'variables', None))
+
+    def to_dataframe(self, dropna=False):
+        '''
+        Convert to a long-form metacsv.DataFrame
+
+        The index is built directly from the integer codes of each cell, and
+        each variable is a flat view of its array.
+
+        Kwargs:
+            dropna (bool): drop rows where every variable is missing
+        '''
+
+        shape = self.shape
+        codes = _grid_codes(shape)
+
+        levels = [self.indexes[d] for d in self.dims]
+        names = self.dims
+
+        for coord, (dims, values) in self.coord_values.items():
+            positions = [self.dims.index(d) for d in dims]
+            cells = np.ravel_multi_index(
+                [codes[p] for p in positions], values.shape) if len(dims) > 0 else 0
+
+            coord_codes, uniques = pd.factorize(values.ravel())
+            levels = levels + [pd.Index(uniques)]
+            codes = codes + [np.asarray(coord_codes)[cells]]
+            names = names + [coord]
+
+        if len(levels) == 1:
+            index = levels[0].take(codes[0])
+        else:
+            index = _make_multiindex(levels, codes, names)
+
+        frame = pd.DataFrame(
+            OrderedDict((name, values.ravel()) for name, values in self.data.items()),
+            index=index, columns=list(self.data))
+
+        if dropna and len(self.data) > 0:
+            frame = frame[frame.notnull().any(axis=1).values]
+
+        return DataFrame(
+            frame, coords=self.coords._coords, attrs=self.attrs.copy(),
+            variables=self.variables.copy())
+
+    @classmethod
+    def from_xarray(cls, data):
+        '''
+        Create a DataCube from an xarray DataArray or Dataset
+
+        Every data variable must span all dimensions of the dataset.
+        '''
+
+        ds, special = from_xarray.xarray_special_attributes(data)
+        dims = list(ds.dims)
+
+        indexes = OrderedDict(
+            (str(d), ds.indexes[d] if d in ds.indexes else pd.RangeIndex(ds.dims[d]))
+            for d in dims)
+
+        arrays = OrderedDict()
+        for name in ds.data_vars:
+            if set(ds[name].dims) != set(dims):
+                raise ValueError(
+                    'Variable "{}" does not span all dimensions {}'.format(name, dims))
+            arrays[str(name)] = ds[name].transpose(*dims).values
+
+        coord_values = OrderedDict()
+        for name in ds.coords:
+            if name in ds.dims:
+                continue
+            coord_dims = [d for d in dims if d in ds[name].dims]
+            coord_values[str(name)] = (
+                list(map(str, coord_dims)), ds[name].transpose(*coord_dims).values)
+
+        return cls(
+            arrays, indexes, coord_values=coord_values, coords=special['coords'],
+            attrs=special['attrs'], variables=special.get('variables'))
+
+    def to_xarray(self):
+        '''
+        Convert to an xarray.Dataset without reshaping
+        '''
+
+        from_xarray._import_xarray()
+        xr = from_xarray.xr
+
+        coords = OrderedDict()
+        for dim, index in self.indexes.items():
+            coords[dim] = (dim, index.values, self.variables.get(dim, {}))
+        for coord, (dims, values) in self.coord_values.items():
+            coords[coord] = (tuple(dims), values, self.variables.get(coord, {}))
+
+        data_vars = OrderedDict(
+            (name, (tuple(self.dims), values, self.variables.get(name, {})))
+            for name, values in self.data.items())
+
+        attrs = OrderedDict(self.attrs.items())
+
+        return xr.Dataset(data_vars, coords=coords, attrs=attrs)
+
+    def to_csv(self, fp, *args, **kwargs):
+        '''
+        Write to a long-form metacsv-formatted csv
+
+        *args, **kwargs passed to metacsv.DataFrame.to_csv
+        '''
+
+        self.to_dataframe().to_csv(fp, *args, **kwargs)
+
+    def to_netcdf(self, fp, *args, **kwargs):
+        '''
+        Write to a NetCDF file
+
+        *args, **kwargs passed to xarray.Dataset.to_netcdf
+        '''
+
+        self.to_xarray().to_netcdf(fp, *args, **kwargs)
@@ -1,3 +1,7 @@
 
 class GraphIsCyclicError(ValueError):
     pass
+
+
+class CoordinateDependencyError(ValueError):
+    pass
@@ -6,12 +6,20 @@ import pandas as pd
 import numpy as np
 import re
 from collections import OrderedDict
-from pandas.core.base import FrozenList
+try:
+    from pandas.core.base import FrozenList
+except ImportError:
+    # pandas >= 0.20
+    from pandas.core.indexes.frozen import FrozenList
 
-from .exceptions import GraphIsCyclicError
+from .exceptions import GraphIsCyclicError, CoordinateDependencyError
 from .._compat import string_types, has_iterkeys, iterkeys, has_iteritems, iteritems
 from ..io import to_xarray, to_csv, to_pandas
 
+# pandas.Panel was removed in pandas 0.25
+PandasPanel = getattr(pd, 'Panel', None)
+from . import aggregation
+
 
 class _BaseProperty(object):
     property_type = None  # overload
@@ -208,7 +216,7 @@ class Coordinates(object):
 
         if container is not None:
             if not isinstance(container, (Container, pd.DataFrame, pd.Series)):
-                if isinstance(container, pd.Panel):
+                if PandasPanel is not None and isinstance(container, PandasPanel):
                     raise NotImplementedError('Coordinates not implemented for panel data')
                 raise TypeError(
                     '__init__ container argument must be a metacsv or pandas DataFrame or Series')
@@ -448,6 +456,86 @@ class Coordinates(object):
             orig_coords[k] = v
         self.__set__(orig_coords)
 
+    def validate(self, container=None):
+        '''
+        Check that every dependent coordinate is a function of the base
+        coordinates it depends on
+
+        Each coordinate is checked in one vectorized pass, by counting its
+        distinct values within each group of base coordinate codes.
+
+        Kwargs:
+            container (object): container to check. Defaults to the
+                container these coordinates are assigned to.
+
+        Returns:
+            report (OrderedDict): for each coordinate with violations, its
+                base coordinates, the number of combinations of base values
+                with more than one value of the coordinate and up to five of
+                those combinations. Empty if every dependency holds.
+
+        Example:
+
+        >>> df.coords.validate()
+        OrderedDict([('s1', OrderedDict([('base', ['ind1', 'ind2']), ('groups', 1), ('examples', [('a', 'x')])]))])
+        '''
+
+        container = container if container is not None else self._container
+        if container is None:
+            raise ValueError(
+                'Cannot validate coordinates unless assigned to a container')
+
+        report = OrderedDict()
+        if self._coords is None:
+            return report
+
+        levels = aggregation._level_codes(container.index)
+
+        for coord, deps in self._coords.items():
+            if deps is None:
+                continue
+
+            base = [
+                c for c in container.index.names
+                if c in self._base_dependencies[coord]]
+
+            groups, first = aggregation._dense_groups(levels, base)
+            valid = groups >= 0
+            counts = aggregation._count_distinct(
+                groups[valid], levels[coord][0][valid])
+
+            violations = np.flatnonzero(counts > 1)
+            if len(violations) == 0:
+                continue
+
+            examples = [
+                tuple(levels[c][1][levels[c][0][row]] for c in base)
+                for row in first[violations[:5]]]
+
+            report[coord] = OrderedDict([
+                ('base', base),
+                ('groups', len(violations)),
+                ('examples', examples)])
+
+        return report
+
+    def assert_valid(self, container=None):
+        '''
+        Raise a CoordinateDependencyError if :py:meth:`validate` finds any
+        violations
+        '''
+
+        report = self.validate(container)
+        if len(report) == 0:
+            return
+
+        raise CoordinateDependencyError(
+            'Coordinates are not functions of their base coordinates:\n' + '\n'.join([
+                '    {}: {} combinations of ({}) have more than one value, e.g. {}'.format(
+                    coord, v['groups'], ', '.join(map(str, v['base'])),
+                    ', '.join(map(str, v['examples'])))
+                for coord, v in report.items()]))
+
     def _send_coords_in_cols_to_index(self, coords=None, container=None):
         coords = coords if coords is not None else self._coords
         if coords is None:
@@ -614,6 +702,41 @@ class Container(object):
 
         self.coords.set_coords_from_data()
 
+    def rollup(self, coord, how='sum'):
+        '''
+        Aggregate data up the coordinate graph to a dependent coordinate
+
+        The base coordinates ``coord`` depends on are replaced by ``coord``,
+        and values are aggregated over them with a groupby on the integer
+        codes of the index. Other base coordinates are kept, as are dependent
+        coordinates whose dependencies are all kept. Attributes and variables
+        are carried over.
+
+        Args:
+            coord (str or list): dependent coordinate to roll up to. With a
+                list, every level is computed from a single encoding of the
+                index and an OrderedDict of containers is returned.
+
+        Kwargs:
+            how (str or function): aggregation passed to pandas groupby.agg
+
+        Example:
+
+        >>> df = metacsv.DataFrame(
+        ...     {'country': ['USA', 'CAN', 'FRA'], 'continent': ['NA', 'NA', 'EU'],
+        ...      'pop': [309.3, 34.0, 65.0]},
+        ...     coords={'country': None, 'continent': 'country'})
+        >>> df.rollup('continent')
+        <metacsv.core.containers.DataFrame (2, 1)>
+                     pop
+        continent       
+        EU          65.0
+        NA         343.3
+        ...
+        '''
+
+        return aggregation.rollup(self, coord, how)
+
     def _get_coord_data_from_index(self, coord):
         return self.index.get_level_values(coord)
 
@@ -672,7 +795,9 @@ class Container(object):
     def _print_format(self):
         metacsv_str = '<{} {}>'.format(
             type(self).__module__ + '.' + type(self).__name__, self.shape)
-        data_str = self.pandas_parent.__str__(self)
+        # format a plain pandas view: on recent pandas, __str__ calls
+        # __repr__, which is overridden here
+        data_str = str(self.pandas_parent(self, copy=False))
         postscript = '\n'.join(
             [str(p) for p in [self.coords, self.variables, self.attrs] if p != None])
         return (metacsv_str + '\n' + data_str + ('\n\n' if len(postscript) > 0 else '') + postscript)
@@ -694,6 +819,33 @@ class Container(object):
 
         Kwargs:
             header_file (str or buffer): A separate metacsv-formatted header file
+            engine (str): ``'pandas'`` (default) or ``'pyarrow'`` to write the
+                body with pyarrow's csv writer, ``chunksize`` rows at a time.
+                The pyarrow engine accepts ``index``, ``header``, ``sep``,
+                ``float_format`` and ``chunksize``.
+            compression (str): ``'gzip'``, ``'bz2'``, ``'xz'``, ``'zstd'``,
+                None or ``'infer'`` (default) to infer compression from the
+                extension of ``fp``
+            compression_threads (int): compression threads for gzip and zstd
+                (default 1). None uses all cores.
+            header_padding (int): bytes of blank space to reserve in the header
+                so it can later be updated in place (see metacsv.update_header)
+            row_index (int): write a sidecar index of every ``row_index``-th
+                row (True for 10000) for ``read_csv(rows=...)``. Uncompressed
+                paths only.
+            normalize_coords (bool): store dependent coordinates as lookup
+                tables in the header instead of repeating them on every row
+                (see metacsv.io.lookups)
+            stats (bool): store the minimum, maximum, count and null count of
+                every variable, and the distinct count of every coordinate,
+                in the variables section of the header (see metacsv.io.stats)
+            checksum (bool or str): hash the body as it is written and store
+                the digest in the ``checksum`` attribute of the header. True
+                uses ``metacsv.io.checksum.DEFAULT_ALGORITHM`` (blake2b, or
+                xxh64 or sha256 where hashlib lacks it); any hashlib
+                algorithm, or ``'xxh64'``, ``'xxh3_64'`` or ``'xxh3_128'``
+                with the xxhash library, may be named instead. Uncompressed
+                paths only (see metacsv.io.checksum).
         
         *args, **kwargs passed to pandas.to_csv
 
@@ -703,6 +855,35 @@ class Container(object):
         '''
         to_csv.metacsv_to_csv(self, fp, header_file=None, *args, **kwargs)
 
+    def to_partitioned(self, fp, partition_by, processes=None, overwrite=False, *args, **kwargs):
+        '''
+        Write to a directory of csv files, one per combination of values of
+        ``partition_by``
+
+        Files are written to a Hive-style tree (``fp/scenario=ssp1/year=2050/
+        part.csv``) with a single shared ``metacsv.header`` at its root.
+        Partition coordinates are kept in each file. Read with
+        metacsv.read_partitioned.
+
+        Args:
+            fp (str): Directory to write
+            partition_by (str or list): coordinates or columns to partition by
+
+        Kwargs:
+            processes (int): number of worker processes writing partitions.
+                None uses all cores.
+            overwrite (bool): replace ``fp`` if it is not empty
+
+        *args, **kwargs passed to pandas.to_csv (or the writer selected with
+        ``engine``, see to_csv)
+
+        Example:
+
+        >>> df.to_partitioned('data', partition_by=['scenario', 'year'])
+        '''
+        to_csv.metacsv_to_partitioned(
+            self, fp, partition_by, processes, overwrite, *args, **kwargs)
+
     def to_header(self, fp):
         '''
         Write attributes directly to a metacsv-formatted header file
@@ -0,0 +1,208 @@
+'''
+Per-stage timing and memory instrumentation for metacsv I/O
+
+Readers, writers and converters report each stage of their work (header
+scanning, yaml parsing, body parsing, coordinate setup, ...) as a
+:py:class:`StageEvent` to every registered callback. When no callback is
+registered the hooks do nothing.
+
+Example:
+
+    >>> with metacsv.instrument(trace_memory=True) as events:
+    ...     df = metacsv.read_csv('data.csv')
+    >>> for e in events:
+    ...     print(e.operation, e.stage, e.duration, e.rows, e.peak_memory)
+    read_csv header_scan 0.00012 None 1032
+    read_csv yaml 0.00035 None 18224
+    read_csv body 0.0101 24 331744
+    read_csv coords 0.0042 24 402952
+    read_csv assertions 1.9e-06 None 398120
+    read_csv total 0.0153 24 402952
+'''
+
+from __future__ import absolute_import, division, print_function, \
+    with_statement, unicode_literals
+
+import functools
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    _timer = time.perf_counter
+except AttributeError:
+    _timer = time.time
+
+
+StageEvent = namedtuple(
+    'StageEvent',
+    ['operation', 'stage', 'duration', 'bytes', 'rows', 'peak_memory'])
+
+StageEvent.__doc__ = '''
+A single instrumented stage
+
+Attributes:
+    operation (str): public function being run, e.g. ``'read_csv'``
+    stage (str): stage within the operation; ``'total'`` covers all of it
+    duration (float): wall time in seconds
+    bytes (int): bytes read or written during the stage, if known
+    rows (int): rows produced or consumed during the stage, if known
+    peak_memory (int): tracemalloc peak in bytes during the stage, or None
+        when tracemalloc is not tracing. On python < 3.9 the peak cannot be
+        reset and covers everything since tracing started.
+'''
+
+_callbacks = []
+_local = threading.local()
+
+
+def register_callback(callback):
+    '''Call ``callback(event)`` with a StageEvent for every stage'''
+    if not any(c is callback for c in _callbacks):
+        _callbacks.append(callback)
+
+
+def unregister_callback(callback):
+    for i, c in enumerate(_callbacks):
+        if c is callback:
+            del _callbacks[i]
+            return
+
+
+def _tracing():
+    return tracemalloc is not None and tracemalloc.is_tracing()
+
+
+def _emit(event):
+    for callback in list(_callbacks):
+        callback(event)
+
+
+def _current_operation():
+    stack = getattr(_local, 'operations', None)
+    return stack[-1] if stack else None
+
+
+def _peaks():
+    '''Running peak memory of each open stage in this thread'''
+    if not hasattr(_local, 'peaks'):
+        _local.peaks = []
+    return _local.peaks
+
+
+@contextmanager
+def stage(name):
+    '''
+    Time a stage of the current operation
+
+    Yields a dict in which the caller may set ``bytes`` and ``rows``.
+    '''
+
+    record = {}
+
+    if len(_callbacks) == 0:
+        yield record
+        return
+
+    tracing = _tracing()
+    resets = tracing and hasattr(tracemalloc, 'reset_peak')
+
+    if resets:
+        # resetting the peak loses it for the enclosing stages, so fold it
+        # into their running maxima first
+        peaks = _peaks()
+        current = tracemalloc.get_traced_memory()[1]
+        peaks[:] = [max(p, current) for p in peaks]
+        peaks.append(0)
+        tracemalloc.reset_peak()
+
+    start = _timer()
+
+    try:
+        yield record
+    finally:
+        duration = _timer() - start
+        peak = tracemalloc.get_traced_memory()[1] if tracing else None
+
+        if resets:
+            peak = max(peak, peaks.pop())
+            if len(peaks) > 0:
+                peaks[-1] = max(peaks[-1], peak)
+
+        _emit(StageEvent(
+            _current_operation(), name, duration,
+            record.get('bytes'), record.get('rows'), peak))
+
+
+@contextmanager
+def operation(name):
+    '''
+    Group the stages run inside the block under operation ``name`` and emit
+    a ``'total'`` stage for the whole block
+
+    Operations started inside another operation (e.g. ``read_csv`` called by
+    ``to_netcdf``) report their stages under the outer operation.
+    '''
+
+    if len(_callbacks) == 0 or _current_operation() is not None:
+        record = {}
+        yield record
+        return
+
+    if not hasattr(_local, 'operations'):
+        _local.operations = []
+
+    _local.operations.append(name)
+
+    try:
+        with stage('total') as record:
+            yield record
+    finally:
+        _local.operations.pop()
+
+
+def instrumented(name):
+    '''Decorator running the wrapped function as operation ``name``'''
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with operation(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def instrument(trace_memory=False):
+    '''
+    Collect the StageEvents emitted inside the block into a list
+
+    Kwargs:
+        trace_memory (bool): start tracemalloc for the duration of the block
+            (if it is not already tracing) so events report peak memory
+    '''
+
+    events = []
+    started = False
+
+    if trace_memory and tracemalloc is not None and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started = True
+
+    callback = events.append
+    register_callback(callback)
+
+    try:
+        yield events
+    finally:
+        unregister_callback(callback)
+        if started:
+            tracemalloc.stop()
@@ -0,0 +1,123 @@
+'''
+Utilities for writing the body of metacsv-formatted files with pyarrow
+'''
+
+from __future__ import absolute_import, division, print_function, \
+    with_statement, unicode_literals
+
+import numpy as np
+import pandas as pd
+from .._compat import BytesIO
+
+pa = None
+pacsv = None
+
+
+def _import_pyarrow():
+    global pa, pacsv
+    if pacsv is None:
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pacsv
+        except ImportError:
+            raise ImportError(
+                'Cannot use the pyarrow engine - pyarrow library not found. See https://arrow.apache.org/')
+
+
+def _format_floats(frame, float_format):
+    for col in frame.columns:
+        values = frame[col].values
+        if values.dtype.kind != 'f':
+            continue
+
+        if callable(float_format):
+            formatted = np.array([float_format(v) for v in values], dtype=object)
+        else:
+            formatted = np.char.mod(float_format, values).astype(object)
+
+        formatted[np.isnan(values)] = None
+        frame[col] = formatted
+
+
+def _prepare_chunk(chunk, index, float_format):
+    nlevels = chunk.index.nlevels
+
+    if index:
+        names = ['' if n is None else n for n in chunk.index.names]
+        chunk = chunk.reset_index()
+        chunk.columns = names + list(chunk.columns[nlevels:])
+    else:
+        chunk = chunk.reset_index(drop=True)
+
+    chunk.columns = [str(c) for c in chunk.columns]
+
+    if float_format is not None:
+        _format_floats(chunk, float_format)
+
+    return chunk
+
+
+def _get_binary_sink(fp):
+    # pyarrow writes utf-8 bytes, which can go straight to the buffer of a
+    # utf-8 text file
+    encoding = (getattr(fp, 'encoding', None) or '').lower().replace('-', '')
+    if encoding == 'utf8' and hasattr(fp, 'buffer'):
+        return fp.buffer
+    return None
+
+
+def write_csv_body(container, fp, index=True, header=True, sep=',',
+                   float_format=None, chunksize=100000, **kwargs):
+    '''
+    Write a Series or DataFrame as csv using pyarrow's csv writer
+
+    Rows are converted to arrow tables and written ``chunksize`` at a time,
+    so only one chunk of formatted output is held in memory. The conversion
+    from pandas uses multiple threads. Index levels are written as leading
+    columns, as with pandas.
+
+    Values read back by ``metacsv.read_csv`` match the pandas engine, but the
+    text differs: strings are quoted, booleans are written as ``true`` and
+    ``false`` and floats use the shortest round-trip representation unless
+    ``float_format`` (a %-format string or a callable) is given.
+    '''
+
+    _import_pyarrow()
+
+    if len(kwargs) > 0:
+        raise TypeError(
+            'Arguments not supported by the pyarrow engine: {}'.format(
+                ', '.join(sorted(kwargs))))
+
+    if isinstance(container, pd.Series):
+        container = container.to_frame(
+            name=container.name if container.name is not None else 0)
+
+    elif not isinstance(container, pd.DataFrame):
+        raise NotImplementedError(
+            'The pyarrow engine can only write Series and DataFrames')
+
+    frame = pd.DataFrame(container, copy=False)
+    chunksize = max(int(chunksize or len(frame)), 1)
+
+    sink = _get_binary_sink(fp)
+    if sink is not None:
+        fp.flush()
+
+    for start in range(0, max(len(frame), 1), chunksize):
+        chunk = _prepare_chunk(
+            frame.iloc[start:start + chunksize], index, float_format)
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+
+        options = pacsv.WriteOptions(
+            include_header=bool(header) and start == 0, delimiter=sep)
+
+        if sink is not None:
+            pacsv.write_csv(table, sink, write_options=options)
+        else:
+            buf = BytesIO()
+            pacsv.write_csv(table, buf, write_options=options)
+            fp.write(buf.getvalue().decode('utf-8'))
+
+    if sink is not None:
+        sink.flush()
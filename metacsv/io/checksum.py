@@ -0,0 +1,235 @@
+'''
+Checksums of the body of metacsv files
+
+With ``to_csv(..., checksum=True)`` the bytes of the body (everything after
+the header, starting with the column names) are hashed as they are written,
+and the digest is stored in the ``checksum`` attribute of the header as
+``<algorithm>:<hexdigest>``:
+
+.. code-block:: yaml
+
+    checksum: blake2b:5c8e...
+
+Caches of derived products can compare this attribute, read with
+``read_header``, to decide whether a file has changed without hashing its
+body. Rewriting only the header (see ``update_header``) keeps the checksum
+valid.
+
+Any algorithm in hashlib can be used. ``xxh64``, ``xxh3_64`` and
+``xxh3_128`` are faster non-cryptographic alternatives that require the
+xxhash library. The default is ``blake2b`` where hashlib provides it
+(python 3.6 and later), then ``xxh64`` if xxhash is installed, then
+``sha256``.
+'''
+
+from __future__ import absolute_import, division, print_function, \
+    with_statement, unicode_literals
+
+import io
+import hashlib
+from .._compat import text_type
+
+CHECKSUM_KEY = 'checksum'
+
+xxhash = None
+
+
+def _default_algorithm():
+    if 'blake2b' in getattr(hashlib, 'algorithms_available', ()):
+        return 'blake2b'
+
+    try:
+        import xxhash
+    except ImportError:
+        return 'sha256'
+
+    return 'xxh64'
+
+
+DEFAULT_ALGORITHM = _default_algorithm()
+
+
+def _import_xxhash():
+    global xxhash
+    if xxhash is None:
+        try:
+            import xxhash
+        except ImportError:
+            raise ImportError(
+                'Cannot use xxhash checksums - xxhash library not found. See https://pypi.org/project/xxhash/')
+
+
+def new_hash(algorithm=DEFAULT_ALGORITHM):
+    '''
+    Create a hash object for ``algorithm``
+    '''
+
+    if algorithm.startswith('xxh'):
+        _import_xxhash()
+        if not hasattr(xxhash, algorithm):
+            raise ValueError('Unknown xxhash algorithm "{}"'.format(algorithm))
+        return getattr(xxhash, algorithm)()
+
+    return hashlib.new(algorithm)
+
+
+def format_checksum(algorithm, hexdigest):
+    return '{}:{}'.format(algorithm, hexdigest)
+
+
+def placeholder(algorithm):
+    '''
+    Value of the same length as the checksum of ``algorithm``, written to the
+    header before the body is hashed and overwritten afterwards
+    '''
+
+    return format_checksum(algorithm, '0' * len(new_hash(algorithm).hexdigest()))
+
+
+def parse_checksum(value):
+    '''
+    Split a checksum attribute into its algorithm and hex digest
+    '''
+
+    algorithm, sep, hexdigest = text_type(value).partition(':')
+    if not sep:
+        raise ValueError('Invalid checksum "{}"'.format(value))
+    return algorithm, hexdigest
+
+
+class HashingWriter(io.RawIOBase):
+    '''
+    Binary file wrapper that hashes the bytes written through it after
+    ``start`` is called
+
+    Text is encoded and newlines translated above this wrapper (see
+    :py:func:`open_hashed_output`), so the hash covers exactly the bytes that
+    reach the file.
+    '''
+
+    def __init__(self, fp, hasher):
+        self.fp = fp
+        self.hasher = hasher
+        self.hashing = False
+
+    def start(self):
+        self.hashing = True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def write(self, data):
+        if self.hashing:
+            self.hasher.update(data)
+        return self.fp.write(data)
+
+    def tell(self):
+        return self.fp.tell()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self.fp.seek(offset, whence)
+
+    def flush(self):
+        self.fp.flush()
+
+    def close(self):
+        if not self.closed:
+            super(HashingWriter, self).close()
+            self.fp.close()
+
+    def hexdigest(self):
+        return self.hasher.hexdigest()
+
+
+def open_hashed_output(fp, hasher):
+    '''
+    Open the path ``fp`` for writing utf-8 text through a HashingWriter
+
+    Newlines are written untranslated, as with the compressed outputs of
+    ``open_output``.
+
+    Returns:
+        text (io.TextIOWrapper): text stream to write to
+        raw (HashingWriter): binary writer, on which ``start`` begins hashing.
+            Flush ``text`` before calling it.
+    '''
+
+    raw = HashingWriter(io.open(text_type(fp), 'wb'), hasher)
+    return io.TextIOWrapper(raw, encoding='utf-8', newline=''), raw
+
+
+def write_checksum(fp, value):
+    '''
+    Overwrite the checksum placeholder in the header of ``fp`` with ``value``
+    '''
+
+    from .parsers import _find_body_offset
+
+    with open(fp, 'r+b') as f:
+        _, offset = _find_body_offset(f)
+        f.seek(0)
+        header = f.read(offset)
+
+        position = header.find(placeholder(parse_checksum(value)[0]).encode('utf-8'))
+        if position < 0:
+            raise ValueError('No checksum placeholder in the header of {}'.format(fp))
+
+        f.seek(position)
+        f.write(value.encode('utf-8'))
+
+
+def body_checksum(fp, algorithm=DEFAULT_ALGORITHM, blocksize=2**20):
+    '''
+    Hash the body of the uncompressed metacsv-formatted csv ``fp``
+    '''
+
+    from .parsers import _find_body_offset
+
+    hasher = new_hash(algorithm)
+
+    with open(fp, 'rb') as f:
+        _, offset = _find_body_offset(f)
+        f.seek(offset)
+        for block in iter(lambda: f.read(blocksize), b''):
+            hasher.update(block)
+
+    return format_checksum(algorithm, hasher.hexdigest())
+
+
+def verify_checksum(fp, header_file=None):
+    '''
+    Check the body of ``fp`` against the checksum in its header, or in
+    ``header_file`` if the header was written separately
+
+    Returns:
+        True if the body matches, False if it does not, and None if the header
+        has no checksum
+    '''
+
+    from .parsers import read_header
+
+    attrs = read_header(fp, header_file)[0]
+    value = attrs.get(CHECKSUM_KEY, None)
+
+    if value is None:
+        return None
+
+    return body_checksum(fp, parse_checksum(value)[0]) == value
+
+
+def strip_checksum(attrs):
+    '''
+    ``attrs`` without a checksum, which no longer describes the body once
+    the data has been modified. Returns ``attrs`` itself if it has none.
+    '''
+
+    if attrs == None or attrs.get(CHECKSUM_KEY, None) is None:
+        return attrs
+
+    attrs = attrs.copy()
+    attrs.pop(CHECKSUM_KEY)
+
+    return attrs
@@ -0,0 +1,226 @@
+'''
+Utilities for reading and writing compressed metacsv files
+
+Compression applies to the whole file, including the yaml header, and is
+inferred from the file extension (``.gz``, ``.bz2``, ``.xz`` or ``.zst``).
+'''
+
+from __future__ import absolute_import, division, print_function, \
+    with_statement, unicode_literals
+
+import io
+import os
+import gzip
+import bz2
+import zlib
+import multiprocessing
+from collections import deque, OrderedDict
+from .._compat import string_types, text_type, PY2
+
+EXTENSIONS = OrderedDict([
+    ('.gz', 'gzip'),
+    ('.bz2', 'bz2'),
+    ('.xz', 'xz'),
+    ('.zst', 'zstd')])
+
+zstd = None
+
+
+def _import_zstandard():
+    global zstd
+    if zstd is None:
+        try:
+            import zstandard as zstd
+        except ImportError:
+            raise ImportError(
+                'Cannot use zstd compression - zstandard library not found. See https://pypi.org/project/zstandard/')
+
+
+def infer_compression(fp, compression='infer'):
+    '''
+    Get the compression of ``fp`` from its extension if ``compression`` is
+    ``'infer'``. Returns None for uncompressed files and file objects.
+    '''
+
+    if compression == 'infer':
+        if not isinstance(fp, string_types):
+            return None
+        return EXTENSIONS.get(os.path.splitext(fp)[1].lower())
+
+    if compression is not None and compression not in EXTENSIONS.values():
+        raise ValueError(
+            'compression must be one of {}, "infer" or None, not "{}"'.format(
+                ', '.join(EXTENSIONS.values()), compression))
+
+    return compression
+
+
+def _import_lzma():
+    try:
+        import lzma
+    except ImportError:
+        try:
+            from backports import lzma
+        except ImportError:
+            raise ImportError(
+                'Cannot use xz compression - lzma module not found. On python 2, install backports.lzma.')
+    return lzma
+
+
+def _gzip_member(block, level):
+    '''Compress ``block`` into a complete gzip member'''
+
+    # wbits=31: deflate with a gzip header and trailer
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(block) + compressor.flush()
+
+
+class ParallelGzipWriter(io.RawIOBase):
+    '''
+    Write a gzip stream as independently compressed members, one per block
+
+    Blocks of ``blocksize`` bytes are compressed by ``threads`` threads (zlib
+    releases the GIL) and written in order. Concatenated gzip members form a
+    valid gzip file, readable by gzip, zcat and metacsv.
+    '''
+
+    def __init__(self, fileobj, threads=None, level=9, blocksize=2**20):
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+        except ImportError:
+            fileobj.close()
+            raise ImportError(
+                'Multithreaded gzip compression requires concurrent.futures. '
+                'On python 2, install futures or use compression_threads=1.')
+
+        threads = threads or multiprocessing.cpu_count()
+
+        self._fileobj = fileobj
+        self._level = level
+        self._blocksize = blocksize
+        self._max_pending = 2 * threads
+        self._pool = ThreadPoolExecutor(threads)
+        self._pending = deque()
+        self._buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer.extend(data)
+
+        while len(self._buffer) >= self._blocksize:
+            block = bytes(self._buffer[:self._blocksize])
+            del self._buffer[:self._blocksize]
+            self._submit(block)
+
+        return len(data)
+
+    def _submit(self, block):
+        self._pending.append(self._pool.submit(_gzip_member, block, self._level))
+
+        # bound the memory held by blocks waiting to be written
+        while len(self._pending) > self._max_pending:
+            self._fileobj.write(self._pending.popleft().result())
+
+    def _drain(self):
+        while len(self._pending) > 0:
+            self._fileobj.write(self._pending.popleft().result())
+
+    def close(self):
+        if self.closed:
+            return
+
+        try:
+            if len(self._buffer) > 0:
+                self._submit(bytes(self._buffer))
+                del self._buffer[:]
+
+            self._drain()
+
+        finally:
+            self._pool.shutdown()
+            self._fileobj.close()
+            io.RawIOBase.close(self)
+
+
+def _open_binary_writer(fp, compression, threads=1, level=None):
+    if compression == 'gzip':
+        level = 9 if level is None else level
+        if threads is not None and threads == 1:
+            return gzip.open(fp, 'wb', compresslevel=level)
+        return ParallelGzipWriter(open(fp, 'wb'), threads=threads, level=level)
+
+    elif compression == 'zstd':
+        _import_zstandard()
+        compressor = zstd.ZstdCompressor(
+            level=3 if level is None else level,
+            threads=-1 if threads is None else (0 if threads == 1 else threads))
+        return compressor.stream_writer(open(fp, 'wb'))
+
+    if threads != 1:
+        raise ValueError(
+            'Multithreaded compression is only available for gzip and zstd')
+
+    if compression == 'bz2':
+        return bz2.BZ2File(fp, 'wb', compresslevel=9 if level is None else level)
+
+    elif compression == 'xz':
+        return _import_lzma().open(fp, 'wb', preset=level)
+
+
+def _open_binary_reader(fp, compression):
+    if compression == 'gzip':
+        return gzip.open(fp, 'rb')
+
+    elif compression == 'bz2':
+        return bz2.BZ2File(fp, 'rb')
+
+    elif compression == 'xz':
+        return _import_lzma().open(fp, 'rb')
+
+    elif compression == 'zstd':
+        _import_zstandard()
+        return zstd.ZstdDecompressor().stream_reader(open(fp, 'rb'))
+
+
+def open_output(fp, compression='infer', threads=1, level=None):
+    '''
+    Open a path for writing text, compressing it if required
+
+    Args:
+        fp (str): path to write
+
+    Kwargs:
+        compression (str): ``'gzip'``, ``'bz2'``, ``'xz'``, ``'zstd'``, None
+            or ``'infer'`` (default) to infer compression from the extension
+        threads (int): number of compression threads for gzip and zstd.
+            None uses all cores.
+        level (int): compression level. Defaults to the library default.
+    '''
+
+    compression = infer_compression(fp, compression)
+
+    if compression is None:
+        if PY2:
+            return open(text_type(fp), 'w+')
+        return open(text_type(fp), 'w+', encoding='utf-8')
+
+    return io.TextIOWrapper(
+        _open_binary_writer(fp, compression, threads, level), encoding='utf-8')
+
+
+def open_input(fp, compression='infer'):
+    '''
+    Open a path for reading text, decompressing it if required
+    '''
+
+    compression = infer_compression(fp, compression)
+
+    if compression is None:
+        if PY2:
+            return open(fp, 'r')
+        return open(fp, 'r', encoding='utf-8')
+
+    return io.TextIOWrapper(
+        _open_binary_reader(fp, compression), encoding='utf-8')
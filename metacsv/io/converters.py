@@ -5,30 +5,45 @@ Utilities for converting between metacsv-compatible data formats
 from __future__ import absolute_import, division, print_function, \
     with_statement, unicode_literals
 
+import os
+import csv
+import shutil
+import tempfile
 import pandas as pd
 import numpy as np
-import xarray as xr
 from collections import OrderedDict
 from .to_xarray import metacsv_series_to_dataarray, metacsv_series_to_dataset, metacsv_dataframe_to_dataset, metacsv_dataframe_to_dataarray
-from .to_csv import metacsv_to_csv, metacsv_to_header, _header_to_file_object
-from .parsers import read_csv
+from .to_csv import metacsv_to_csv, metacsv_to_header, _header_to_file_object, _container_to_csv_object, _pop_compression_kwargs, _format_header
+from .compression import open_output, infer_compression
+from .lookups import LOOKUPS_KEY, check_lookups
+from .stats import STATS_KEY, compute_stats, merge_stats
+from .checksum import CHECKSUM_KEY, body_checksum, parse_checksum
+from .parsers import read_csv, read_header, read_netcdf, _find_body_offset, _split_header
+from . import from_xarray
+from .dask_tools import is_dask_collection, dask_dataframe_to_dataset
 from ..core.containers import Series, DataFrame, Panel
-from ..core.internals import Coordinates, Variables, Attributes
-from .._compat import string_types, stream_types, BytesIO, StringIO
+from ..core.internals import Coordinates, Variables, Attributes, PandasPanel
+from ..core.datacube import DataCube
+from .._compat import string_types, stream_types, BytesIO, StringIO, PY2
+from .. import instrumentation
 
 
 def _coerce_to_metacsv(container, *args, **kwargs):
     if not isinstance(container, (Series, DataFrame, Panel)):
-        if isinstance(container, (string_types, stream_types)):
+        if isinstance(container, string_types) and from_xarray.is_netcdf_path(container):
+            container = read_netcdf(container, *args, **kwargs)
+        elif isinstance(container, (string_types, stream_types)):
             container = read_csv(container, *args, **kwargs)
         elif isinstance(container, pd.Series):
             container = Series(container)
         elif isinstance(container, pd.DataFrame):
             container = DataFrame(container)
-        elif isinstance(container, pd.Panel):
+        elif isinstance(container, DataCube):
+            container = container.to_dataframe()
+        elif PandasPanel is not None and isinstance(container, PandasPanel):
             container = Panel(container)
-        elif isinstance(container, (xr.DataArray, xr.Dataset)):
-            raise NotImplementedError('automatic coersion of xarray objects not yet implemented')
+        elif from_xarray.is_xarray_object(container):
+            container = DataFrame.from_xarray(container)
         else:
             raise TypeError(
                 'Unknown data type. Must be a Series, DataFrame, or Panel')
@@ -36,6 +51,27 @@ def _coerce_to_metacsv(container, *args, **kwargs):
     return container
 
 
+def _shallow_copy(container):
+    '''
+    Copy a container's metadata without copying its data
+
+    The copy shares its data with ``container`` but has its own index and
+    attrs, coords and variables, so overrides can be applied to it without
+    modifying the original.
+    '''
+
+    shallow = type(container)(container.pandas_parent.copy(container, deep=False))
+    shallow.attrs = container.attrs.copy()
+    shallow.coords = container.coords.copy()
+    shallow.variables = container.variables.copy()
+
+    return shallow
+
+
+def _has_overrides(attrs, coords, variables):
+    return any(arg is not None for arg in (attrs, coords, variables))
+
+
 def _parse_args(container, attrs, coords, variables):
 
     if attrs is not None:
@@ -58,6 +94,50 @@ def _parse_args(container, attrs, coords, variables):
             container.variables.update(variables)
 
 
+def _xarray_to_csv(data, fp, attrs=None, coords=None, variables=None, header_file=None, *args, **kwargs):
+    '''
+    Stream an xarray object to a metacsv-formatted csv one slice at a time
+    '''
+
+    chunksize = kwargs.pop('chunksize', 2**20)
+
+    ds, special = from_xarray.xarray_special_attributes(data)
+
+    _attrs = Attributes(special['attrs'])
+    _coords = Coordinates(coords if coords is not None else special['coords'])
+    _variables = Variables(special.get('variables', None))
+
+    if attrs is not None:
+        _attrs.update(attrs)
+
+    if variables is not None:
+        _variables.update(variables)
+
+    kwargs.pop('header', None)
+    encoding = kwargs.pop('encoding', 'utf-8')
+    compression = _pop_compression_kwargs(kwargs)
+    padding = kwargs.pop('header_padding', 0)
+
+    separate_header = (header_file is not None) and (header_file != fp)
+
+    if separate_header:
+        metacsv_to_header(header_file, attrs=_attrs, coords=_coords, variables=_variables, padding=padding)
+
+    def write(buf):
+        if not separate_header:
+            _header_to_file_object(buf, attrs=_attrs, coords=_coords, variables=_variables, padding=padding)
+
+        for i, frame in enumerate(from_xarray.iter_xarray_frames(ds, chunksize=chunksize)):
+            _container_to_csv_object(
+                DataFrame(frame), buf, header=(i == 0), encoding=encoding, *args, **kwargs)
+
+    if isinstance(fp, string_types):
+        with open_output(fp, **compression) as buf:
+            write(buf)
+    else:
+        write(fp)
+
+
 def to_dataset(container, attrs=None, coords=None, variables=None, *args, **kwargs):
     '''
     Convert a CSV, Series, DataFrame, Panel, DataArray, or Dataset to an xArray.Dataset
@@ -95,6 +175,10 @@ def to_dataset(container, attrs=None, coords=None, variables=None, *args, **kwar
         author: my name
     '''
 
+    if is_dask_collection(container):
+        return dask_dataframe_to_dataset(
+            container, attrs=attrs, coords=coords, variables=variables)
+
     container = _coerce_to_metacsv(container, *args, **kwargs)
     _parse_args(container, attrs, coords, variables)
 
@@ -209,6 +293,10 @@ def to_xarray(container, attrs=None, coords=None, variables=None, *args, **kwarg
         author: my name
     '''
 
+    if is_dask_collection(container):
+        return dask_dataframe_to_dataset(
+            container, attrs=attrs, coords=coords, variables=variables)
+
     container = _coerce_to_metacsv(container, *args, **kwargs)
     _parse_args(container, attrs, coords, variables)
 
@@ -310,7 +398,11 @@ def to_netcdf(container, fp, attrs=None, coords=None, variables=None, *args, **k
         author: my name
     '''
 
-    to_dataset(container, attrs=attrs, coords=coords, variables=variables, *args, **kwargs).to_netcdf(fp)
+    with instrumentation.operation('to_netcdf'):
+        ds = to_dataset(container, attrs=attrs, coords=coords, variables=variables, *args, **kwargs)
+
+        with instrumentation.stage('write'):
+            ds.to_netcdf(fp)
 
 
 def to_csv(container, fp, attrs=None, coords=None, variables=None, header_file=None, *args, **kwargs):
@@ -328,6 +420,24 @@ def to_csv(container, fp, attrs=None, coords=None, variables=None, header_file=N
         coords (dict-like): Container coordinates
         variables (dict-like): Variable-specific attributes
         header_file (str or buffer): A separate metacsv-formatted header file
+        chunksize (int): For xarray objects and NetCDF files, the approximate
+            number of rows flattened and written at a time
+        engine (str): ``'pandas'`` (default) or ``'pyarrow'``. See
+            metacsv.DataFrame.to_csv
+        compression (str): ``'gzip'``, ``'bz2'``, ``'xz'``, ``'zstd'``, None or
+            ``'infer'`` (default) to infer compression from the extension of
+            ``fp``. The header is compressed with the data.
+        compression_threads (int): compression threads for gzip and zstd
+            (default 1). None uses all cores.
+        compression_level (int): compression level
+        header_padding (int): bytes of blank space to reserve in the header
+            so it can later be updated in place (see metacsv.update_header)
+        row_index (int): write a sidecar index of every ``row_index``-th row
+            (True for 10000) for ``read_csv(rows=...)``. Uncompressed paths
+            only.
+        normalize_coords (bool): store dependent coordinates as lookup tables
+            in the header instead of repeating them on every row (see
+            metacsv.io.lookups)
         **kwargs: Keyword arguments passed to pandas.to_csv
 
     Example:
@@ -337,8 +447,22 @@ def to_csv(container, fp, attrs=None, coords=None, variables=None, header_file=N
     ... attrs={'author': 'my name'})
     '''
 
-    container = _coerce_to_metacsv(container, header_file=header_file).copy()
-    _parse_args(container, attrs, coords, variables)
+    if isinstance(container, string_types) and from_xarray.is_netcdf_path(container):
+        from_xarray._import_xarray()
+        with from_xarray.xr.open_dataset(container) as ds:
+            _xarray_to_csv(ds, fp, attrs, coords, variables, header_file, *args, **kwargs)
+        return
+
+    elif from_xarray.is_xarray_object(container):
+        _xarray_to_csv(container, fp, attrs, coords, variables, header_file, *args, **kwargs)
+        return
+
+    container = _coerce_to_metacsv(container, header_file=header_file)
+
+    if _has_overrides(attrs, coords, variables):
+        container = _shallow_copy(container)
+        _parse_args(container, attrs, coords, variables)
+
     metacsv_to_csv(container, fp, *args, **kwargs)
 
 
@@ -363,9 +487,23 @@ def to_header(fp, container=None, attrs=None, coords=None, variables=None, *args
     >>> metacsv.to_header('mycsv.header', attrs={'author': 'me'}, coords='index')
     '''
 
-    if container is not None:
-        container = _coerce_to_metacsv(container, *args, **kwargs).copy()
-        _parse_args(container, attrs, coords, variables)
+    if isinstance(container, string_types) and not from_xarray.is_netcdf_path(container):
+        # only the header of a csv is needed
+        _attrs, _coords, _variables = read_header(container, *args, **kwargs)
+
+        for override, metadata in ((attrs, _attrs), (coords, _coords), (variables, _variables)):
+            if override is not None:
+                metadata.update(override)
+
+        attrs, coords, variables = _attrs, _coords, _variables
+
+    elif container is not None:
+        container = _coerce_to_metacsv(container, *args, **kwargs)
+
+        if _has_overrides(attrs, coords, variables):
+            container = _shallow_copy(container)
+            _parse_args(container, attrs, coords, variables)
+
         attrs = container.attrs
         coords = container.coords
         variables = container.variables
@@ -383,3 +521,244 @@ def to_header(fp, container=None, attrs=None, coords=None, variables=None, *args
     metacsv_to_header(fp, attrs=attrs, coords=coords, variables=variables)
             
 
+
+def _coord_definitions(coords):
+    if coords == None:
+        return {}
+
+    return dict(
+        (k, frozenset(v if v is not None else []))
+        for k, v in coords._coords.items())
+
+
+def append_csv(fp, container, *args, **kwargs):
+    '''
+    Append rows to an existing metacsv-formatted csv without rewriting it
+
+    Only the header and column names of ``fp`` are read, unless it has a
+    checksum (see below). The new rows must have the same columns, in the
+    same order, as the existing file, and a metacsv container must have the
+    same coordinates. Coordinates of pandas containers are set from the
+    file's header. For files written with ``normalize_coords=True``,
+    coordinates stored as lookup tables are checked against the tables and
+    dropped from the new rows.
+
+    The header itself is not changed, except for column statistics (see
+    ``to_csv(..., stats=True)``), which are extended to cover the new rows,
+    and the body checksum (see ``to_csv(..., checksum=True)``).
+
+    .. note::
+
+        A checksum cannot be extended, so appending to a file with a
+        checksum rehashes the whole body, and costs time proportional to the
+        size of the file rather than of the new rows.
+
+    Args:
+        fp (str): Path of the metacsv-formatted csv to append to
+        container (object): A pandas or metacsv Series or DataFrame
+
+    *args, **kwargs passed to pandas.to_csv (or the writer selected with
+    ``engine``, see metacsv.DataFrame.to_csv)
+
+    Example:
+
+    >>> metacsv.append_csv('data.csv', todays_records)
+    '''
+
+    if infer_compression(fp) is not None:
+        raise ValueError('Cannot append to compressed files')
+
+    with instrumentation.operation('append_csv') as record:
+
+        with instrumentation.stage('header'):
+            with open(fp, 'rb') as f:
+                header = _find_body_offset(f)[0]
+                columns = next(csv.reader([f.readline().decode('utf-8')]), [])
+
+            attrs, coords, variables = _split_header(header)
+            lookups = header.get(LOOKUPS_KEY, None)
+
+        with instrumentation.stage('validate'):
+            if isinstance(container, (pd.Series, pd.DataFrame)) and not isinstance(
+                    container, (Series, DataFrame)):
+                container = pd.DataFrame(container).copy(deep=False)
+                container = DataFrame(container, coords=coords._coords)
+
+            elif _coord_definitions(container.coords) != _coord_definitions(coords):
+                raise ValueError(
+                    'Coordinates do not match the header of {}:\n{}\n{}'.format(
+                        fp, container.coords, coords))
+
+            if isinstance(container, Series):
+                container = DataFrame(container.to_frame())
+
+            # coordinates stored as lookup tables are not in the body
+            body = check_lookups(container, lookups) if lookups else container
+
+            buf = StringIO()
+            _container_to_csv_object(body.iloc[:0], buf, *args, **kwargs)
+            new_columns = next(csv.reader([buf.getvalue()]), [])
+
+            if new_columns != columns:
+                raise ValueError(
+                    'Columns {} do not match the columns {} of {}'.format(
+                        new_columns, columns, fp))
+
+        with instrumentation.stage('body') as stage_record:
+            record['rows'] = stage_record['rows'] = len(container)
+
+            with open(fp, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                newline = True
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    newline = f.read(1) == b'\n'
+
+            with (open(fp, 'a') if PY2 else open(fp, 'a', encoding='utf-8')) as f:
+                if not newline:
+                    f.write('\n')
+                kwargs['header'] = False
+                _container_to_csv_object(body, f, *args, **kwargs)
+
+        stats = OrderedDict(
+            (name, meta[STATS_KEY]) for name, meta in variables.items()
+            if hasattr(meta, 'get') and STATS_KEY in meta)
+
+        new_attrs = None
+        new_variables = None
+
+        if len(stats) > 0:
+            with instrumentation.stage('stats'):
+                new_stats = compute_stats(container)
+                new_variables = OrderedDict(
+                    (name, {STATS_KEY: merge_stats(summary, new_stats.get(name, {}))})
+                    for name, summary in stats.items())
+
+        checksum = attrs.get(CHECKSUM_KEY, None)
+
+        if checksum is not None:
+            with instrumentation.stage('checksum'):
+                new_attrs = {
+                    CHECKSUM_KEY: body_checksum(fp, parse_checksum(checksum)[0])}
+
+        if new_attrs is not None or new_variables is not None:
+            update_header(fp, attrs=new_attrs, variables=new_variables)
+
+
+def _copy_range(src, dst, offset, blocksize=2**24):
+    '''
+    Copy ``src`` from byte ``offset`` to the end onto the end of ``dst``
+
+    Uses os.sendfile where available so the data is not copied through
+    python, and large buffered copies otherwise.
+    '''
+
+    size = os.fstat(src.fileno()).st_size
+
+    if hasattr(os, 'sendfile'):
+        dst.flush()
+        try:
+            while offset < size:
+                sent = os.sendfile(dst.fileno(), src.fileno(), offset, min(blocksize, size - offset))
+                if sent == 0:
+                    break
+                offset += sent
+            dst.seek(0, os.SEEK_END)
+            return
+        except OSError:
+            # sendfile between regular files is not supported everywhere
+            dst.seek(0, os.SEEK_END)
+
+    src.seek(offset)
+    shutil.copyfileobj(src, dst, blocksize)
+
+
+def update_header(fp, attrs=None, variables=None, header_padding=0):
+    '''
+    Update the header of a metacsv-formatted csv without parsing its data
+
+    ``attrs`` and the attributes of each variable in ``variables`` are merged
+    into the existing header. If the new header fits in the space taken by
+    the old one (including padding reserved with ``to_csv(...,
+    header_padding=n)``), it is overwritten in place. Otherwise the file is
+    rewritten with the new header followed by a byte-for-byte copy of the
+    body.
+
+    Args:
+        fp (str): Path of the metacsv-formatted csv to update
+
+    Kwargs:
+        attrs (dict-like): Attributes to add or replace
+        variables (dict-like): Variable attributes to add or replace, by variable
+        header_padding (int): bytes of padding to reserve after the header
+            when the file has to be rewritten
+
+    Example:
+
+    >>> metacsv.update_header('data.csv', attrs={'version': '1.1'})
+    '''
+
+    if infer_compression(fp) is not None:
+        raise ValueError('Cannot update the header of compressed files')
+
+    with instrumentation.operation('update_header'):
+
+        with instrumentation.stage('header'):
+            _attrs, _coords, _variables = read_header(fp)
+
+            with open(fp, 'rb') as f:
+                _header, offset = _find_body_offset(f)
+
+            lookups = _header.get(LOOKUPS_KEY, None)
+
+        if attrs is not None:
+            _attrs.update(attrs)
+
+        if variables is not None:
+            for name, var in variables.items():
+                existing = _variables.get(name, None)
+                if isinstance(existing, dict) and isinstance(var, dict):
+                    merged = OrderedDict(existing)
+                    merged.update(var)
+                    var = merged
+                _variables[name] = var
+
+        header = _format_header(
+            _attrs, _coords, _variables, lookups=lookups).encode('utf-8')
+
+        if len(header) <= offset:
+            with instrumentation.stage('write_in_place') as record:
+                header = _format_header(
+                    _attrs, _coords, _variables, padding=offset - len(header),
+                    lookups=lookups).encode('utf-8')
+
+                with open(fp, 'r+b') as f:
+                    f.write(header)
+
+                record['bytes'] = len(header)
+
+            return
+
+        with instrumentation.stage('rewrite') as record:
+            header = _format_header(
+                _attrs, _coords, _variables, padding=header_padding,
+                lookups=lookups).encode('utf-8')
+
+            dirname = os.path.dirname(os.path.abspath(fp))
+            handle, tmpfile = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+
+            try:
+                with os.fdopen(handle, 'wb') as dst:
+                    dst.write(header)
+                    with open(fp, 'rb') as src:
+                        _copy_range(src, dst, offset)
+
+                shutil.copymode(fp, tmpfile)
+                getattr(os, 'replace', os.rename)(tmpfile, fp)
+
+            except Exception:
+                if os.path.exists(tmpfile):
+                    os.remove(tmpfile)
+                raise
+
+            record['bytes'] = os.path.getsize(fp)
@@ -0,0 +1,318 @@
+'''
+Utilities for reading metacsv-formatted files into dask DataFrames and
+converting them to dask-backed xarray containers
+'''
+
+from __future__ import absolute_import, division, print_function, \
+    with_statement, unicode_literals
+
+import os
+import pandas as pd
+import numpy as np
+from .._compat import string_types, BytesIO
+from ..core.internals import Attributes, Coordinates, Variables
+
+dd = None
+dask = None
+
+
+def _import_dask():
+    global dd, dask
+    if dd is None:
+        try:
+            import dask
+            import dask.dataframe as dd
+        except ImportError:
+            raise ImportError(
+                'Cannot use the dask backend - dask library not found. See http://dask.pydata.org/')
+
+
+def is_dask_collection(container):
+    return type(container).__module__.split('.')[0] == 'dask'
+
+
+def _block_bounds(fp, start, stop):
+    '''
+    Adjust the nominal byte range [start, stop) to line boundaries
+
+    A line belongs to the block in which it starts, so the block skips a
+    partial first line and runs past ``stop`` to the end of its last line.
+    '''
+
+    if start > 0:
+        fp.seek(start - 1)
+        if fp.read(1) != b'\n':
+            fp.readline()
+    start = fp.tell()
+
+    fp.seek(stop - 1)
+    if fp.read(1) != b'\n':
+        fp.readline()
+    stop = fp.tell()
+
+    return start, stop
+
+
+def _read_block(path, start, stop, names, dtypes, kwargs):
+    with open(path, 'rb') as fp:
+        start, stop = _block_bounds(fp, start, stop)
+        fp.seek(start)
+        data = fp.read(stop - start)
+
+    if len(data) == 0:
+        return pd.DataFrame({c: [] for c in names}, columns=names).astype(dtypes)
+
+    block = pd.read_csv(
+        BytesIO(data), header=None, names=names, **kwargs)
+
+    return _check_dtypes(block, dtypes, path, start)
+
+
+def _check_dtypes(block, dtypes, path, start):
+    '''
+    Cast ``block`` to the dtypes inferred from the sample, raising if that
+    would change any value
+    '''
+
+    mismatched = []
+
+    for name, dtype in dtypes.items():
+        actual = block[name].dtype
+        if actual == dtype:
+            continue
+        if dtype.kind != 'O' and actual.kind != 'O' and np.can_cast(actual, dtype, 'safe'):
+            continue
+        mismatched.append('{}: expected {}, found {}'.format(name, dtype, actual))
+
+    if len(mismatched) > 0:
+        raise ValueError(
+            'Mismatched dtypes in the block of {} starting at byte {}:\n    {}\n'
+            'The dtypes were inferred from a sample of the file. Pass dtype= '
+            'to read_csv, or increase sample=.'.format(
+                path, start, '\n    '.join(mismatched)))
+
+    return block.astype(dtypes)
+
+
+def read_dask_csv(fp, header, body_offset, *args, **kwargs):
+    '''
+    Read the body of a metacsv-formatted file into a dask DataFrame
+
+    The header has already been parsed by the caller; ``body_offset`` is the
+    byte offset of the column header line. The body is split into byte ranges
+    of roughly ``blocksize`` bytes (default 64 MB), each of which is parsed
+    independently. Column dtypes are inferred from the first ``sample`` bytes
+    (default 256 KB); blocks whose values do not fit them raise a ValueError.
+    '''
+
+    _import_dask()
+
+    kwargs = dict(kwargs)
+    blocksize = kwargs.pop('blocksize', 2**26)
+    sample = kwargs.pop('sample', 2**18)
+
+    if not isinstance(fp, string_types):
+        raise ValueError('backend="dask" requires a file path')
+
+    if len(args) > 0:
+        raise ValueError(
+            'backend="dask" accepts pandas.read_csv arguments by keyword only')
+
+    if 'index_col' in kwargs:
+        raise ValueError(
+            'index_col is not supported with backend="dask". Coordinates '
+            'are kept as columns of the dask DataFrame.')
+
+    kwargs.pop('squeeze', None)
+
+    size = os.path.getsize(fp)
+
+    with open(fp, 'rb') as f:
+        f.seek(body_offset)
+        head = f.read(sample)
+
+    stripped = head.lstrip(b'\r\n')
+    body_offset += len(head) - len(stripped)
+    head = stripped
+
+    if body_offset + len(head) < size:
+        head = head[:head.rfind(b'\n') + 1]
+
+    first_line = head.split(b'\n', 1)[0]
+
+    block_kwargs = dict(kwargs)
+    for kw in ['names', 'header', 'skiprows', 'nrows']:
+        block_kwargs.pop(kw, None)
+
+    meta = pd.read_csv(BytesIO(head), **block_kwargs).iloc[:0]
+    names = list(meta.columns)
+    dtypes = meta.dtypes.to_dict()
+
+    data_start = body_offset + len(first_line) + 1
+
+    bounds = list(range(data_start, size, blocksize)) + [size]
+    if len(bounds) < 2:
+        bounds = [data_start, max(data_start, size)]
+
+    read = dask.delayed(_read_block, pure=True)
+    parts = [
+        read(fp, start, stop, names, dtypes, block_kwargs)
+        for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    ddf = dd.from_delayed(parts, meta=meta)
+    _attach_special_attributes(ddf, header)
+
+    return ddf
+
+
+def _attach_special_attributes(ddf, special):
+    ddf.attrs = Attributes(special.get('attrs', None))
+    ddf.coords = Coordinates(special.get('coords', None))
+    ddf.variables = Variables(special.get('variables', None))
+
+
+def _partition_summary(part, base_coords):
+    if len(part) == 0:
+        return 0, None, None, True
+
+    index = pd.MultiIndex.from_arrays(
+        [part[c].values for c in base_coords], names=base_coords)
+
+    return (
+        len(part),
+        index[0],
+        index[-1],
+        bool(index.is_monotonic_increasing and index.is_unique))
+
+
+def _column_values(part, col):
+    return part[col].values
+
+
+def _is_sorted_product(summaries, shape):
+    '''
+    True if the partitions hold every combination of base coordinate values
+    exactly once, in lexicographic order.
+
+    A strictly increasing sequence with as many rows as there are points in
+    the product of the (sorted) base coordinates must be that product.
+    '''
+
+    if sum(s[0] for s in summaries) != int(np.prod(shape)):
+        return False
+
+    last = None
+    for length, first, final, increasing in summaries:
+        if length == 0:
+            continue
+        if not increasing:
+            return False
+        if last is not None and not last < first:
+            return False
+        last = final
+
+    return True
+
+
+def dask_dataframe_to_dataset(ddf, attrs=None, coords=None, variables=None):
+    '''
+    Convert a dask DataFrame read with ``backend="dask"`` to an xarray.Dataset
+
+    When the rows form a sorted, complete product of the base coordinates the
+    data variables are reshaped lazily into dask arrays. Otherwise the frame
+    is computed and converted in memory, and the result is chunked.
+    '''
+
+    _import_dask()
+
+    from . import to_xarray
+    to_xarray._import_xarray()
+    xr = to_xarray.xr
+
+    import dask.array as da
+
+    _attrs = getattr(ddf, 'attrs', Attributes()).copy()
+    _variables = getattr(ddf, 'variables', Variables()).copy()
+
+    if attrs is not None:
+        _attrs.update(attrs)
+
+    if variables is not None:
+        _variables.update(variables)
+
+    if coords is None:
+        coords = getattr(ddf, 'coords', Coordinates())
+    elif not isinstance(coords, Coordinates):
+        coords = Coordinates(coords)
+
+    attrs, variables = _attrs, _variables
+
+    if coords == None or len(coords) == 0:
+        return _computed_dataframe_to_dataset(ddf, attrs, coords, variables)
+
+    base_coords = list(coords.base_coords)
+    dependent = [c for c in coords if c not in base_coords]
+    deps = coords._base_dependencies
+
+    partitions = ddf.to_delayed()
+    summarize = dask.delayed(_partition_summary, pure=True)
+
+    uniques, dep_tables, summaries = dask.compute(
+        [ddf[c].drop_duplicates() for c in base_coords],
+        [ddf[[b for b in base_coords if b in deps[c]] + [c]].drop_duplicates() for c in dependent],
+        [summarize(p, base_coords) for p in partitions])
+
+    levels = [np.sort(u.values) for u in uniques]
+    shape = tuple(len(l) for l in levels)
+
+    if not _is_sorted_product(summaries, shape):
+        return _computed_dataframe_to_dataset(ddf, attrs, coords, variables)
+
+    ds = xr.Dataset()
+
+    for coord, level in zip(base_coords, levels):
+        ds.coords[str(coord)] = (str(coord), level)
+        ds.coords[str(coord)].attrs = variables.get(coord, {})
+
+    for coord, table in zip(dependent, dep_tables):
+        series = table.set_index(
+            [b for b in base_coords if b in deps[coord]])[coord]
+        series.index.names = list(map(str, series.index.names))
+        ds.coords[str(coord)] = xr.DataArray.from_series(series)
+        ds.coords[str(coord)].attrs = variables.get(coord, {})
+
+    dims = list(map(str, base_coords))
+    column = dask.delayed(_column_values, pure=True)
+
+    for col in ddf.columns:
+        if col in coords:
+            continue
+
+        dtype = ddf._meta[col].dtype
+        values = da.concatenate([
+            da.from_delayed(
+                column(p, col), shape=(s[0],), dtype=dtype)
+            for p, s in zip(partitions, summaries)], axis=0)
+
+        ds[col] = xr.DataArray(values.reshape(shape), dims=dims)
+        ds[col].attrs = variables.get(col, {})
+
+    ds.attrs = attrs
+
+    return ds
+
+
+def _computed_dataframe_to_dataset(ddf, attrs, coords, variables):
+    from ..core.containers import DataFrame
+    from .to_xarray import metacsv_dataframe_to_dataset
+
+    df = DataFrame(ddf.compute().reset_index(drop=True))
+    df.attrs = attrs.copy()
+    df.variables = variables.copy()
+
+    if coords == None or len(coords) == 0:
+        df.add_coords()
+    else:
+        df.coords = coords.copy()
+
+    return metacsv_dataframe_to_dataset(df).chunk()
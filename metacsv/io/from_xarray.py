@@ -0,0 +1,139 @@
+'''
+Utilities for converting xarray containers to metacsv-compatible data
+'''
+
+from __future__ import absolute_import, division, print_function, \
+    with_statement, unicode_literals
+
+import os
+import pandas as pd
+import numpy as np
+from collections import OrderedDict
+
+xr = None
+
+
+def _import_xarray():
+    global xr
+    if xr is None:
+        try:
+            import xarray as xr
+        except ImportError:
+            raise ImportError(
+                'Cannot read from xarray - xarray library not found. See http://xarray.pydata.org/')
+
+
+def is_xarray_object(container):
+    return type(container).__module__.split('.')[0] == 'xarray'
+
+
+def is_netcdf_path(fp):
+    return os.path.splitext(str(fp))[1].lower() in ['.nc', '.nc4', '.cdf']
+
+
+def _to_native(value):
+    if isinstance(value, dict):
+        return OrderedDict([(k, _to_native(v)) for k, v in value.items()])
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return value
+
+
+def _as_dataset(data):
+    _import_xarray()
+
+    if isinstance(data, xr.DataArray):
+        return data.to_dataset(name=data.name if data.name is not None else 'data')
+    elif isinstance(data, xr.Dataset):
+        return data
+
+    raise TypeError('Unknown data type. Must be an xarray DataArray or Dataset')
+
+
+def xarray_special_attributes(ds):
+    '''
+    Map xarray metadata onto metacsv attrs, coords and variables
+
+    Dimensions become base coordinates and non-dimension coordinates depend on
+    the dimensions they are defined along. Scalar coordinates cannot index
+    rows, so they are stored as attributes.
+
+    Returns:
+        ds (xarray.Dataset): the dataset without scalar coordinates
+        special (dict): ``attrs``, ``coords`` and ``variables`` definitions
+    '''
+
+    ds = _as_dataset(ds)
+
+    attrs = _to_native(OrderedDict(ds.attrs))
+
+    scalars = [c for c in ds.coords if len(ds[c].dims) == 0]
+    for c in scalars:
+        attrs[str(c)] = _to_native(ds[c].values)
+
+    if len(scalars) > 0:
+        ds = ds.drop(scalars)
+
+    coords = OrderedDict([(str(d), None) for d in _ordered_dims(ds)])
+    for c in ds.coords:
+        if c not in ds.dims:
+            coords[str(c)] = list(map(str, ds[c].dims))
+
+    variables = OrderedDict()
+    for name in list(ds.coords) + list(ds.data_vars):
+        if len(ds[name].attrs) > 0:
+            variables[str(name)] = _to_native(OrderedDict(ds[name].attrs))
+
+    special = {'attrs': attrs, 'coords': coords}
+    if len(variables) > 0:
+        special['variables'] = variables
+
+    return ds, special
+
+
+def _ordered_dims(ds):
+    return list(ds.dims.keys())
+
+
+def iter_xarray_frames(ds, chunksize=2**20):
+    '''
+    Flatten a Dataset into long-form pandas DataFrames, chunk by chunk
+
+    The dataset is sliced along its first dimension so that each chunk holds
+    roughly ``chunksize`` rows. For lazily opened datasets only the slice
+    being flattened is loaded into memory.
+    '''
+
+    dims = _ordered_dims(ds)
+
+    if len(dims) == 0 or ds.dims[dims[0]] == 0:
+        yield ds.to_dataframe()
+        return
+
+    sizes = [ds.dims[d] for d in dims]
+    row_size = int(np.prod(sizes[1:]))
+    step = max(1, chunksize // max(row_size, 1))
+
+    for start in range(0, sizes[0], step):
+        chunk = ds.isel(**{dims[0]: slice(start, start + step)})
+        yield chunk.to_dataframe()
+
+
+def xarray_to_frame(data, chunksize=2**20):
+    '''
+    Flatten an xarray DataArray or Dataset to a pandas DataFrame
+
+    Returns:
+        frame (pandas.DataFrame): long-form data indexed by dimension
+        special (dict): ``attrs``, ``coords`` and ``variables`` definitions
+    '''
+
+    ds, special = xarray_special_attributes(data)
+    frames = list(iter_xarray_frames(ds, chunksize=chunksize))
+
+    if len(frames) == 1:
+        frame = frames[0]
+    else:
+        frame = pd.concat(frames, axis=0, copy=False)
+
+    return frame, special
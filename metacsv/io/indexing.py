@@ -0,0 +1,416 @@
+'''
+Sidecar indices for random access into the body of metacsv files
+
+A row index records the byte offset of every ``every``-th data row, so that
+``read_csv(rows=slice(a, b))`` can seek straight to row ``a``. A coordinate
+index maps each value of one column to the byte ranges of the rows holding
+it, so that ``read_csv(where={coord: value})`` reads only those ranges.
+
+Indices are stored as json next to the data file and record the size and
+modification time of the file they describe; they are ignored once the file
+changes.
+
+Indices assume one row per line, i.e. no quoted newlines in the data.
+'''
+
+from __future__ import absolute_import, division, print_function, \
+    with_statement, unicode_literals
+
+import os
+import csv
+import json
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from .._compat import string_types, StringIO
+from .compression import infer_compression
+
+ROW_INDEX_SUFFIX = '.rows.json'
+COORD_INDEX_SUFFIX = '.index.json'
+INDEX_VERSION = 1
+
+
+def row_index_path(fp):
+    return fp + ROW_INDEX_SUFFIX
+
+
+def coord_index_path(fp, coord):
+    return '{}.{}{}'.format(fp, coord, COORD_INDEX_SUFFIX)
+
+
+def _file_state(fp):
+    stat = os.stat(fp)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def _is_current(index, fp):
+    return (
+        index.get('version') == INDEX_VERSION
+        and index.get('state') == _file_state(fp))
+
+
+def _save_index(path, index):
+    with open(path, 'w') as f:
+        json.dump(index, f)
+
+
+def _load_index(path, fp):
+    if not os.path.isfile(path):
+        return None
+
+    try:
+        with open(path, 'r') as f:
+            index = json.load(f)
+    except ValueError:
+        return None
+
+    if not _is_current(index, fp):
+        return None
+
+    return index
+
+
+def _make_row_index(fp, columns_offset, data_offset, offsets, nrows, every):
+    return {
+        'version': INDEX_VERSION,
+        'state': _file_state(fp),
+        'every': every,
+        'columns_offset': columns_offset,
+        'data_offset': data_offset,
+        'nrows': nrows,
+        'offsets': offsets}
+
+
+def build_row_index(fp, every=10000):
+    '''
+    Scan a metacsv-formatted csv and write a sidecar row index
+
+    Args:
+        fp (str): path of the metacsv-formatted csv
+
+    Kwargs:
+        every (int): record the byte offset of every ``every``-th row
+
+    Returns:
+        index (dict): the index written to ``fp + '.rows.json'``
+    '''
+
+    from .parsers import _find_body_offset
+
+    if infer_compression(fp) is not None:
+        raise ValueError('Cannot index compressed files')
+
+    offsets = []
+    nrows = 0
+
+    with open(fp, 'rb') as f:
+        _, columns_offset = _find_body_offset(f)
+        f.seek(columns_offset)
+        f.readline()
+        data_offset = f.tell()
+
+        pos = data_offset
+        for line in iter(f.readline, b''):
+            if nrows % every == 0:
+                offsets.append(pos)
+            pos += len(line)
+            nrows += 1
+
+    index = _make_row_index(fp, columns_offset, data_offset, offsets, nrows, every)
+    _save_index(row_index_path(fp), index)
+
+    return index
+
+
+class RowIndexWriter(object):
+    '''
+    Collects row offsets while a body is written in blocks of ``every`` rows
+    '''
+
+    def __init__(self, every=10000):
+        self.every = every
+        self.offsets = []
+        self.nrows = 0
+        self.columns_offset = None
+        self.data_offset = None
+
+    def columns(self, columns_offset, data_offset):
+        self.columns_offset = columns_offset
+        self.data_offset = data_offset
+
+    def block(self, offset, nrows):
+        self.offsets.append(offset)
+        self.nrows += nrows
+
+    def save(self, fp):
+        _save_index(row_index_path(fp), _make_row_index(
+            fp, self.columns_offset, self.data_offset, self.offsets,
+            self.nrows, self.every))
+
+
+def load_row_index(fp):
+    '''
+    Load the row index of ``fp`` if it exists and the file has not changed
+    '''
+
+    if not isinstance(fp, string_types) or infer_compression(fp) is not None:
+        return None
+
+    return _load_index(row_index_path(fp), fp)
+
+
+def _get_bounds(rows, nrows=None):
+    if rows.step not in (None, 1):
+        raise ValueError('rows must be a slice with a step of 1')
+
+    if nrows is not None:
+        start, stop, _ = rows.indices(nrows)
+        return start, max(stop, start)
+
+    if (rows.start or 0) < 0 or (rows.stop is not None and rows.stop < 0):
+        raise ValueError(
+            'Negative row positions require a row index (see build_row_index)')
+
+    return rows.start or 0, rows.stop
+
+
+def read_rows(f, fp, rows, *args, **kwargs):
+    '''
+    Read rows ``rows`` (a slice) of the body of a metacsv file
+
+    ``f`` is the open text file positioned at the column-name line and ``fp``
+    its path, or None for buffers. If ``fp`` has a current row index the read
+    starts at the nearest indexed row; otherwise the preceding rows are
+    skipped by the parser.
+    '''
+
+    index = load_row_index(fp) if fp is not None else None
+
+    if index is None:
+        start, stop = _get_bounds(rows)
+        return pd.read_csv(
+            f, skiprows=range(1, start + 1),
+            nrows=None if stop is None else stop - start, *args, **kwargs)
+
+    start, stop = _get_bounds(rows, index['nrows'])
+    columns = next(csv.reader([f.readline()]), [])
+
+    block = start // index['every']
+    if block >= len(index['offsets']):
+        f.seek(0, os.SEEK_END)
+        skip = 0
+    else:
+        f.seek(index['offsets'][block])
+        skip = start - block * index['every']
+
+    kwargs['header'] = None
+    kwargs['names'] = columns
+
+    return pd.read_csv(
+        f, skiprows=skip, nrows=stop - start, *args, **kwargs)
+
+
+def build_index(fp, coord):
+    '''
+    Scan a metacsv-formatted csv and write a sidecar index of ``coord``
+
+    The index maps each value of column ``coord`` to the byte ranges of the
+    rows holding it, and is used by ``read_csv(fp, where={coord: value})``.
+    Files sorted by ``coord`` give one range per value.
+
+    Args:
+        fp (str): path of the metacsv-formatted csv
+        coord (str): column to index
+
+    Returns:
+        index (dict): the index written to ``fp + '.<coord>.index.json'``
+    '''
+
+    from .parsers import _find_body_offset
+
+    if infer_compression(fp) is not None:
+        raise ValueError('Cannot index compressed files')
+
+    ranges = OrderedDict()
+    lengths = []
+
+    def _lines(f):
+        for line in iter(f.readline, b''):
+            lengths.append(len(line))
+            yield line.decode('utf-8')
+
+    with open(fp, 'rb') as f:
+        _, columns_offset = _find_body_offset(f)
+        f.seek(columns_offset)
+        columns = next(csv.reader([f.readline().decode('utf-8')]), [])
+
+        if coord not in columns:
+            raise ValueError(
+                'Cannot index "{}": not a column of {}'.format(coord, fp))
+
+        position = columns.index(coord)
+        start = f.tell()
+        current = None
+
+        for row in csv.reader(_lines(f)):
+            end = start + lengths.pop()
+
+            if len(row) == 0:
+                pass
+            elif current is not None and row[position] == current:
+                ranges[current][-1][1] = end
+            else:
+                current = row[position]
+                ranges.setdefault(current, []).append([start, end])
+
+            start = end
+
+    index = {
+        'version': INDEX_VERSION,
+        'state': _file_state(fp),
+        'coord': coord,
+        'columns_offset': columns_offset,
+        'ranges': ranges}
+
+    _save_index(coord_index_path(fp, coord), index)
+
+    return index
+
+
+def load_index(fp, coord):
+    '''
+    Load the index of ``coord`` for ``fp`` if it exists and the file has not
+    changed
+    '''
+
+    if not isinstance(fp, string_types) or infer_compression(fp) is not None:
+        return None
+
+    return _load_index(coord_index_path(fp, coord), fp)
+
+
+def _as_list(values):
+    if isinstance(values, (list, tuple, set, np.ndarray, pd.Index, pd.Series)):
+        return list(values)
+    return [values]
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if len(merged) > 0 and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+_NA_KEYS = set(['', 'nan', 'NaN', 'NA', 'N/A', 'n/a', 'NULL', 'null', '#N/A'])
+
+
+def _parse_keys(keys):
+    '''
+    Values of the raw csv text ``keys``, inferred the way pandas parses the
+    column: numbers if every key is numeric, booleans if every key is
+    ``True`` or ``False``, strings otherwise. Missing values become NaN.
+    '''
+
+    present = [k for k in keys if k not in _NA_KEYS]
+
+    if len(present) > 0 and all(k in ('True', 'False') for k in present):
+        parsed = dict((k, k == 'True') for k in present)
+    else:
+        try:
+            parsed = dict(zip(present, pd.to_numeric(pd.Series(present)).tolist()))
+        except (ValueError, TypeError):
+            parsed = dict((k, k) for k in present)
+
+    return [parsed.get(k, np.nan) for k in keys]
+
+
+def _isin(values, selection):
+    '''
+    Whether each of ``values`` is one of ``selection``, compared as objects so
+    that the result does not depend on how the pandas version coerces
+    ``selection`` to the dtype of ``values``. Missing values match any
+    missing value in ``selection``.
+    '''
+
+    values = pd.Index(np.asarray(values, dtype=object), dtype=object)
+    selection = _as_list(selection)
+    present = [v for v in selection if not np.all(pd.isnull(v))]
+
+    matches = np.asarray(values.isin(present))
+    if len(present) < len(selection):
+        matches |= np.asarray(pd.isnull(values))
+
+    return matches
+
+
+def _read_ranges(f, fp, index, values, *args, **kwargs):
+    keys = list(index['ranges'])
+    matches = _isin(_parse_keys(keys), values)
+
+    ranges = []
+    for key, match in zip(keys, matches):
+        if match:
+            ranges.extend(index['ranges'][key])
+
+    buf = StringIO()
+    buf.write(f.readline())
+
+    with open(fp, 'rb') as data:
+        for start, end in _merge_ranges(ranges):
+            data.seek(start)
+            buf.write(data.read(end - start).decode('utf-8'))
+
+    buf.seek(0)
+
+    return pd.read_csv(buf, *args, **kwargs)
+
+
+def _filter(data, where):
+    mask = np.ones(len(data), dtype=bool)
+
+    for coord, values in where.items():
+        if coord in data.columns:
+            column = data[coord]
+        elif coord in data.index.names:
+            column = data.index.get_level_values(coord)
+        else:
+            raise ValueError('Cannot select on "{}": not a column'.format(coord))
+
+        mask &= _isin(column, values)
+
+    data = data[mask]
+
+    if isinstance(data.index, pd.RangeIndex):
+        data = data.reset_index(drop=True)
+
+    return data
+
+
+def read_where(f, fp, where, *args, **kwargs):
+    '''
+    Read the rows of the body of a metacsv file that match ``where``
+
+    ``f`` is the open text file positioned at the column-name line and ``fp``
+    its path, or None for buffers. If ``fp`` has a current index for one of
+    the columns in ``where``, only the byte ranges holding matching values of
+    that column are parsed. The result is always filtered on every column.
+    '''
+
+    index = None
+    if fp is not None:
+        for coord in where:
+            index = load_index(fp, coord)
+            if index is not None:
+                break
+
+    if index is None:
+        data = pd.read_csv(f, *args, **kwargs)
+    else:
+        data = _read_ranges(
+            f, fp, index, _as_list(where[index['coord']]), *args, **kwargs)
+
+    return _filter(data, where)
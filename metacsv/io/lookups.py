@@ -0,0 +1,172 @@
+'''
+Storage of dependent coordinates as lookup tables in the header
+
+Dependent coordinates are constant for each combination of the coordinates
+they depend on, so repeating them on every row of the body is redundant.
+With ``to_csv(..., normalize_coords=True)`` each dependent coordinate is
+dropped from the body and written once per combination of its dependencies
+under the ``lookups`` key of the yaml header, as columns:
+
+.. code-block:: yaml
+
+    lookups:
+      region_name:
+        region_id: [1, 2, 3]
+        region_name: [North, South, East]
+
+Readers join the tables back onto the body on integer positions.
+'''
+
+from __future__ import absolute_import, division, print_function, \
+    with_statement, unicode_literals
+
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+LOOKUPS_KEY = 'lookups'
+
+
+def _to_native(values):
+    return [v.item() if isinstance(v, np.generic) else v for v in values]
+
+
+def normalize(container):
+    '''
+    Split the dependent coordinates of ``container`` into lookup tables
+
+    Returns:
+        body (object): pandas container without the dependent coordinates
+        lookups (OrderedDict): lookup table of each dependent coordinate,
+            keyed by coordinate, as an OrderedDict of columns
+    '''
+
+    coords = container.coords
+    lookups = OrderedDict()
+
+    if coords == None:
+        return container.pandas_parent(container, copy=False), lookups
+
+    for coord, deps in coords._coords.items():
+        if deps is None:
+            continue
+
+        names = [d for d in container.index.names if d in deps] + [coord]
+        table = pd.DataFrame(OrderedDict(
+            (n, container.index.get_level_values(n)) for n in names)).drop_duplicates()
+
+        if table.duplicated(names[:-1]).any():
+            raise ValueError(
+                'Cannot normalize coordinate "{}": it has more than one value '
+                'for some values of {}'.format(coord, ', '.join(names[:-1])))
+
+        lookups[coord] = OrderedDict(
+            (n, _to_native(table[n].values)) for n in names)
+
+    body = container.pandas_parent(container, copy=False).reset_index(
+        list(lookups), drop=True)
+
+    return body, lookups
+
+
+def _column(frame, name):
+    '''Values of the column or index level ``name`` of ``frame``'''
+
+    if name in frame.columns:
+        return frame[name]
+    return pd.Series(frame.index.get_level_values(name), index=frame.index)
+
+
+def _keys(frame, names):
+    if len(names) == 1:
+        return pd.Index(_column(frame, names[0]))
+    return pd.MultiIndex.from_arrays([_column(frame, n) for n in names])
+
+
+def _align_dtype(values, like):
+    try:
+        return pd.Series(values).astype(like.dtype).values
+    except (TypeError, ValueError):
+        return values
+
+
+def rehydrate(data, lookups):
+    '''
+    Add the coordinates stored in ``lookups`` to the columns of ``data``
+
+    Keys are looked up in the columns and index levels of ``data``. Tables
+    are applied in order, so a table may depend on coordinates added by
+    earlier ones. Rows whose keys are missing from a table get NaN.
+    '''
+
+    for coord, table in lookups.items():
+        names = [n for n in table if n != coord]
+
+        missing = [
+            n for n in names
+            if n not in data.columns and n not in data.index.names]
+        if len(missing) > 0:
+            raise ValueError(
+                'Cannot restore coordinate "{}": column {} not found'.format(
+                    coord, ', '.join(missing)))
+
+        table = pd.DataFrame(OrderedDict(
+            (n, _align_dtype(table[n], _column(data, n)) if n in names else table[n])
+            for n in table))
+
+        positions = _keys(table, names).get_indexer(_keys(data, names))
+
+        values = table[coord]
+        if (positions < 0).any():
+            values = values.reindex(positions)
+        else:
+            values = values.take(positions)
+
+        data[coord] = values.values
+
+    return data
+
+
+def check_lookups(container, lookups):
+    '''
+    Split the dependent coordinates of ``container`` off as in
+    :py:func:`normalize`, checking that they agree with the existing
+    ``lookups`` tables
+
+    Returns:
+        body (object): pandas container without the coordinates in
+            ``lookups``
+
+    Raises:
+        ValueError: if a coordinate is missing from ``container``, takes a
+            value that differs from its table, or depends on values the
+            table does not cover
+    '''
+
+    body, tables = normalize(container)
+
+    for coord, table in lookups.items():
+        if coord not in tables:
+            raise ValueError(
+                'Coordinate "{}" is stored as a lookup table but is not a '
+                'dependent coordinate of the container'.format(coord))
+
+        names = [n for n in table if n != coord]
+        existing = pd.DataFrame(OrderedDict((n, table[n]) for n in table))
+        new = pd.DataFrame(OrderedDict(
+            (n, _align_dtype(tables[coord][n], existing[n])) for n in table))
+
+        positions = _keys(existing, names).get_indexer(_keys(new, names))
+
+        if (positions < 0).any():
+            raise ValueError(
+                'Values of {} are not in the lookup table of "{}". Rows of '
+                'normalized files can only be appended if their dependent '
+                'coordinates are already in the header.'.format(
+                    ', '.join(names), coord))
+
+        if not (existing[coord].values[positions] == new[coord].values).all():
+            raise ValueError(
+                'Values of "{}" do not match its lookup table'.format(coord))
+
+    return body
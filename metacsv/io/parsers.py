@@ -2,13 +2,25 @@
 from __future__ import absolute_import, division, print_function, \
     with_statement, unicode_literals
 
+import os
+import copy
+import multiprocessing
+import glob
 import pandas as pd
 import re
 from collections import OrderedDict
 from .yaml_tools import ordered_load
-from .._compat import string_types, has_iteritems, iteritems
+from .._compat import string_types, has_iteritems, iteritems, unquote
 from ..core.internals import Container, Attributes, Variables, Coordinates
 from ..core.containers import Series, DataFrame, Panel
+from .dask_tools import read_dask_csv
+from . import from_xarray
+from .compression import open_input, infer_compression
+from .indexing import read_rows, read_where, _filter, _parse_keys, _isin
+from .stats import may_match
+from .to_csv import PARTITION_HEADER, PARTITION_FILE
+from .lookups import LOOKUPS_KEY, rehydrate
+from .. import instrumentation
 
 
 def find_yaml_start(line):
@@ -19,34 +31,258 @@ def find_yaml_stop(line):
     return re.search(r'^\s*\.{3,}\s*$', line) is not None
 
 
+class _PushbackStream(object):
+    '''
+    Wraps a non-seekable text stream (e.g. stdin) so that lines read while
+    looking for a yaml header can be pushed back for the csv parser
+    '''
+
+    def __init__(self, fp):
+        self._fp = fp
+        self._buffer = ''
+
+    def pushback(self, text):
+        self._buffer = text + self._buffer
+
+    def seekable(self):
+        return False
+
+    def readline(self, *args):
+        if len(self._buffer) > 0:
+            line, sep, rest = self._buffer.partition('\n')
+            if sep:
+                self._buffer = rest
+                return line + sep
+            self._buffer = ''
+            return line + self._fp.readline()
+        return self._fp.readline()
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data, self._buffer = self._buffer + self._fp.read(), ''
+            return data
+        if len(self._buffer) >= size:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+            return data
+        data, self._buffer = self._buffer, ''
+        return data + self._fp.read(size - len(data))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if len(line) == 0:
+            raise StopIteration
+        return line
+
+    next = __next__
+
+
+def _is_seekable(fp):
+    if hasattr(fp, 'seekable'):
+        try:
+            return fp.seekable()
+        except ValueError:
+            return False
+    return True
+
+
+def _pushback_stream(fp):
+    '''
+    ``fp``, wrapped in a _PushbackStream if it cannot seek
+    '''
+
+    if not _is_seekable(fp):
+        return _PushbackStream(fp)
+    return fp
+
+
 def _parse_headered_data(fp):
 
     # Check for a yaml parse break at the top of the file
     # if there is not one, go back to the top and read like a
-    # normal CSV
-    loc = fp.tell()
+    # normal CSV. Non-seekable streams must be wrapped in a
+    # _PushbackStream so the lines read can be returned.
+    seekable = _is_seekable(fp)
+
+    if seekable:
+        loc = fp.tell()
 
     nextline = ''
+    consumed = ''
+
+    with instrumentation.stage('header_scan') as record:
+        while re.search(r'^[\s\n\r]*$', nextline):
+            nextline = next(fp)
+            consumed += nextline
+
+        if not find_yaml_start(nextline):
+            if seekable:
+                fp.seek(loc)
+            else:
+                fp.pushback(consumed)
+            return OrderedDict()
+
+        yaml_text = ''
+        this_line = ''
+
+        while not find_yaml_stop(this_line):
+            yaml_text += '\n' + this_line.rstrip('\n')
+            this_line = next(fp)
+
+        record['bytes'] = len(consumed) + len(yaml_text) + len(this_line)
+
+    with instrumentation.stage('yaml'):
+        header = ordered_load(yaml_text) or OrderedDict()
+
+    return header
+
+
+def _find_body_offset(fp):
+    '''
+    Scan a binary buffer for the end of its yaml header
 
-    while re.search(r'^[\s\n\r]*$', nextline):
-        nextline = next(fp)
+    Returns the parsed header and the byte offset of the first line after the
+    ``...`` fence (or of the first non-blank line for header-less files). The
+    body itself is never read.
+    '''
 
-    if not find_yaml_start(nextline):
+    loc = fp.tell()
+    nextline = b''
+
+    while re.search(br'^[\s\n\r]*$', nextline):
+        nextline = fp.readline()
+        if len(nextline) == 0:
+            return OrderedDict(), loc
+
+    if not find_yaml_start(nextline.decode('utf-8')):
         fp.seek(loc)
-        return OrderedDict()
+        return OrderedDict(), loc
 
     yaml_text = ''
     this_line = ''
 
     while not find_yaml_stop(this_line):
         yaml_text += '\n' + this_line.rstrip('\n')
-        this_line = next(fp)
+        this_line = fp.readline().decode('utf-8')
+        if len(this_line) == 0:
+            raise ValueError('yaml header not terminated with "..."')
 
-    header = ordered_load(yaml_text)
-    
+    return ordered_load(yaml_text) or OrderedDict(), fp.tell()
+
+
+_header_cache = OrderedDict()
+_HEADER_CACHE_SIZE = 256
+
+SIDECAR_PATTERNS = ('{stem}.header', 'metacsv.header')
+
+
+def _header_to_dict(header):
+    attrs, coords, variables = header
+
+    _header = OrderedDict()
+
+    if attrs != None:
+        _header.update(attrs._data)
+
+    if coords != None:
+        _header['coords'] = coords._coords
+
+    if variables != None:
+        _header['variables'] = variables._data
+
+    return _header
+
+
+def _split_header(header):
+    '''
+    Attributes, Coordinates and Variables of a parsed file header, as
+    returned by read_header
+    '''
+
+    header = OrderedDict(header)
+    header.pop(LOOKUPS_KEY, None)
+
+    _, _, special = Container.strip_special_attributes((), {'attrs': header})
+
+    return (
+        Attributes(special.get('attrs', None)),
+        Coordinates(special.get('coords', None)),
+        Variables(special.get('variables', None)))
+
+
+def _parse_header_file(header_file):
+    key = os.path.abspath(header_file)
+    stat = os.stat(header_file)
+    state = (stat.st_mtime, stat.st_size)
+
+    cached = _header_cache.get(key)
+    if cached is not None and cached[0] == state:
+        return cached[1]
+
+    with instrumentation.stage('header_file'):
+        with open_input(header_file) as hf:
+            header = ordered_load(hf.read()) or OrderedDict()
+
+    _header_cache[key] = (state, header)
+    while len(_header_cache) > _HEADER_CACHE_SIZE:
+        _header_cache.popitem(last=False)
 
     return header
 
+
+def load_header_file(header_file=None):
+    '''
+    Get the contents of a supplemental header as a new OrderedDict
+
+    Args:
+        header_file: a path to a yaml header file, a file object, a dict-like
+            parsed header or the ``(attrs, coords, variables)`` tuple returned
+            by ``metacsv.read_header``
+
+    Header files given by path are parsed once and cached until the file
+    changes, so a header shared by many data files is only read once.
+    Parsed headers are used without parsing.
+    '''
+
+    if header_file is None:
+        return OrderedDict()
+
+    if isinstance(header_file, string_types):
+        header = _parse_header_file(header_file)
+
+    elif isinstance(header_file, tuple) and len(header_file) == 3:
+        header = _header_to_dict(header_file)
+
+    elif has_iteritems(header_file) and not hasattr(header_file, 'read'):
+        header = header_file
+
+    else:
+        header = ordered_load(header_file.read()) or OrderedDict()
+
+    # the caller consumes its copy, so cached and user-supplied headers
+    # are never modified
+    return copy.deepcopy(OrderedDict(header))
+
+
+def find_sidecar(fp, patterns=SIDECAR_PATTERNS):
+    '''
+    Find the header file for data file ``fp``
+
+    Each pattern is formatted with the file's ``stem`` and looked up in the
+    file's directory. Returns the first that exists, or None.
+    '''
+
+    dirname, basename = os.path.split(fp)
+    stem = os.path.splitext(basename)[0]
+
+    for pattern in patterns:
+        path = os.path.join(dirname, pattern.format(stem=stem))
+        if os.path.isfile(path):
+            return path
+
+
 def _verify_deep_assertion(verify_par, par):
     if par is None:
         raise ValueError('Assertions failed')
@@ -98,7 +334,8 @@ def read_header(fp, header_file=None, parse_vars=False, assertions=None, *args,
         fp (str or buffer): csv or metacsv-formatted filepath or buffer to read
 
     Kwargs:
-        header_file (str or buffer): optional supplemental yaml header file
+        header_file (str, buffer or dict-like): optional supplemental yaml
+            header file, or an already parsed header (see load_header_file)
         parse_vars (bool): parse compact-style variable definitions (see example)
         assertions (dict-like): dictionary of values to assert in file header
 
@@ -168,25 +405,26 @@ def read_header(fp, header_file=None, parse_vars=False, assertions=None, *args,
             pop:       {u'description': 'Population', u'unit': 'millions'}
     """
 
-    kwargs = dict(kwargs)
+    with instrumentation.operation('read_header'):
+        return _read_header(
+            fp, header_file, parse_vars, assertions, *args, **kwargs)
 
-    header = OrderedDict()
 
-    if isinstance(header_file, string_types):
-        with open(header_file, 'r') as hf:
-            header = ordered_load(hf.read())
+def _read_header(fp, header_file=None, parse_vars=False, assertions=None, *args, **kwargs):
 
-    elif header_file is not None:
-        header = ordered_load(hf.read())
+    kwargs = dict(kwargs)
+
+    header = load_header_file(header_file)
 
     if isinstance(fp, string_types):
-        with open(fp, 'r') as fp:
-            _header = _parse_headered_data(fp)
+        with open_input(fp) as fp:
+            _header = _parse_headered_data(_pushback_stream(fp))
 
     else:
-        _header = _parse_headered_data(fp)
+        _header = _parse_headered_data(_pushback_stream(fp))
 
     header.update(_header)
+    header.pop(LOOKUPS_KEY, None)
 
     kwargs.update({'attrs': header})
     args, kwargs, special = Container.strip_special_attributes(args, kwargs)
@@ -200,7 +438,8 @@ def read_header(fp, header_file=None, parse_vars=False, assertions=None, *args,
     coords = Coordinates(None if ('coords' not in special) else special['coords'])
     variables = Variables(None if ('variables' not in special) else special['variables'])
 
-    _verify_assertions(assertions, attrs=attrs, coords=coords, variables=variables)
+    with instrumentation.stage('assertions'):
+        _verify_assertions(assertions, attrs=attrs, coords=coords, variables=variables)
 
     return attrs, coords, variables
 
@@ -213,9 +452,34 @@ def read_csv(fp, header_file=None, parse_vars=False, assertions=None, *args, **k
         fp (str or buffer): csv or metacsv-formatted filepath or buffer to read
 
     Kwargs:
-        header_file (str or buffer): optional supplemental yaml header file
+        header_file (str, buffer or dict-like): optional supplemental yaml
+            header file, or an already parsed header (see load_header_file)
         parse_vars (bool): parse compact-style variable definitions (see example)
         assertions (dict-like): dictionary of values to assert in file header
+        chunksize (int): if given, return an iterator over metacsv.DataFrames
+            of ``chunksize`` rows each, parsing the header only once
+        backend (str): ``'pandas'`` (default) or ``'dask'``. The dask backend
+            reads the header once and returns a dask DataFrame partitioned
+            over byte ranges of the body (see ``blocksize``), with attrs,
+            coords and variables attached. Coordinates are kept as columns.
+        blocksize (int): approximate size in bytes of each dask partition
+        sample (int): bytes of the body used by the dask backend to infer
+            column dtypes. Partitions that do not fit them raise a
+            ValueError; pass ``dtype`` to set them explicitly.
+        rows (slice): read only rows ``rows.start`` to ``rows.stop`` of the
+            body. With a current row index (see ``build_row_index`` and
+            ``to_csv(..., row_index=n)``) the read seeks straight to the
+            nearest indexed row instead of scanning from the top.
+        where (dict): read only rows whose columns match, e.g.
+            ``{'region': ['USA', 'CAN']}`` (a value or list of values per
+            column). If a coordinate index exists for one of the columns (see
+            ``build_index``), only the byte ranges holding matching rows are
+            read; otherwise the whole body is read and filtered. If the
+            header holds column statistics (see ``to_csv(..., stats=True)``)
+            that rule out every value of a column, the body is not read.
+        validate_coords (bool): check that every dependent coordinate is a
+            function of its base coordinates and raise a
+            CoordinateDependencyError if not (see Coordinates.validate)
 
     *args, **kwargs passed to pandas.read_csv
 
@@ -299,31 +563,118 @@ def read_csv(fp, header_file=None, parse_vars=False, assertions=None, *args, **k
 
     kwargs = dict(kwargs)
 
+    backend = kwargs.pop('backend', 'pandas')
+
+    for selection in ('rows', 'where'):
+        if kwargs.get(selection, None) is None:
+            continue
+        if backend == 'dask':
+            raise ValueError(
+                '{} cannot be combined with the dask backend'.format(selection))
+        if kwargs.get('chunksize', None) is not None:
+            raise ValueError('{} cannot be combined with chunksize'.format(selection))
+
+    if backend == 'dask':
+        return _read_csv_dask(
+            fp, header_file, parse_vars, assertions, *args, **kwargs)
+
+    elif backend != 'pandas':
+        raise ValueError(
+            'backend must be "pandas" or "dask", not "{}"'.format(backend))
+
+    if kwargs.get('chunksize', None) is not None:
+        return _read_csv_chunks(
+            fp, header_file, parse_vars, assertions, *args, **kwargs)
+
+    with instrumentation.operation('read_csv') as record:
+        container = _read_csv(
+            fp, header_file, parse_vars, assertions, *args, **kwargs)
+        record['rows'] = len(container)
+
+    return container
+
+
+def _read_body(fp, path=None, rows=None, where=None, *args, **kwargs):
+    if rows is not None and where is not None:
+        raise ValueError('rows and where cannot be combined')
+
+    if rows is not None:
+        return read_rows(fp, path, rows, *args, **kwargs)
+
+    if where is not None:
+        return read_where(fp, path, where, *args, **kwargs)
+
+    return pd.read_csv(fp, *args, **kwargs)
+
+
+def _prune(header, _header, where, kwargs):
+    '''
+    Split ``where`` into the selection applied while the body is read and
+    the selection on coordinates stored as lookup tables (see
+    metacsv.io.lookups), applied once they are restored. Reads only the
+    column names if the statistics in the header rule out ``where`` (see
+    metacsv.io.stats).
+    '''
+
+    if where is None:
+        return None, None, kwargs
+
+    variables = _header.get('variables', header.get('variables', None))
+
+    if not may_match(variables, where):
+        return None, None, dict(kwargs, nrows=0)
+
+    lookups = _header.get(LOOKUPS_KEY, header.get(LOOKUPS_KEY, None)) or {}
+
+    body = OrderedDict((k, v) for k, v in where.items() if k not in lookups)
+    restored = OrderedDict((k, v) for k, v in where.items() if k in lookups)
+
+    return body or None, restored or None, kwargs
+
+
+def _read_csv(fp, header_file=None, parse_vars=False, assertions=None, *args, **kwargs):
+
     squeeze = kwargs.get('squeeze', False)
+    rows = kwargs.pop('rows', None)
+    where = kwargs.pop('where', None)
+    validate_coords = kwargs.pop('validate_coords', False)
 
     # set defaults
     engine = kwargs.pop('engine', 'python')
     kwargs['engine'] = engine
 
-    header = OrderedDict()
-
-    if isinstance(header_file, string_types):
-        with open(header_file, 'r') as hf:
-            header = ordered_load(hf.read())
-
-    elif header_file is not None:
-        header = ordered_load(hf.read())
+    header = load_header_file(header_file)
 
     if isinstance(fp, string_types):
-        with open(fp, 'r') as fp:
+        path = fp
+        with open_input(path) as f:
+            fp = _pushback_stream(f)
             _header = _parse_headered_data(fp)
-            data = pd.read_csv(fp, *args, **kwargs)
+            with instrumentation.stage('body') as record:
+                _where, restored_where, _kwargs = _prune(header, _header, where, kwargs)
+                data = _read_body(fp, path, rows, _where, *args, **_kwargs)
+                record['rows'] = len(data)
+                if rows is None and where is None:
+                    record['bytes'] = os.path.getsize(path)
 
     else:
+        fp = _pushback_stream(fp)
         _header = _parse_headered_data(fp)
-        data = pd.read_csv(fp, *args, **kwargs)
+        with instrumentation.stage('body') as record:
+            _where, restored_where, _kwargs = _prune(header, _header, where, kwargs)
+            data = _read_body(fp, None, rows, _where, *args, **_kwargs)
+            record['rows'] = len(data)
 
     header.update(_header)
+    lookups = header.pop(LOOKUPS_KEY, None)
+
+    if lookups:
+        with instrumentation.stage('lookups') as record:
+            record['rows'] = len(data)
+            data = rehydrate(data, lookups)
+
+            if restored_where is not None:
+                data = _filter(data, restored_where)
 
     kwargs.update({'attrs': header})
     args, kwargs, special = Container.strip_special_attributes(args, kwargs)
@@ -333,21 +684,276 @@ def read_csv(fp, header_file=None, parse_vars=False, assertions=None, *args, **k
             for key, var in special['variables'].items():
                 special['variables'][key] = Variables.parse_string_var(var)
 
-    if squeeze:
-        if len(data.shape) == 1:
-            s = Series(data, **special)
-            _verify_assertions(assertions, attrs=s.attrs, variables=s.variables, coords=s.coords)
-            return s
+    with instrumentation.stage('coords') as record:
+        record['rows'] = len(data)
 
-    df = DataFrame(data, **special)
+        if squeeze and len(data.shape) == 1:
+            container = Series(data, **special)
 
-    if squeeze and df.shape[1] == 1:
-        s = Series(df[df.columns[0]], **special)
-        _verify_assertions(assertions, attrs=s.attrs, variables=s.variables, coords=s.coords)
-        return s
-    else:
-        _verify_assertions(assertions, attrs=df.attrs, variables=df.variables, coords=df.coords)
-        return df
+        else:
+            container = DataFrame(data, **special)
+
+            if squeeze and container.shape[1] == 1:
+                container = Series(container[container.columns[0]], **special)
+
+    if validate_coords:
+        with instrumentation.stage('validate_coords'):
+            container.coords.assert_valid(container)
+
+    with instrumentation.stage('assertions'):
+        _verify_assertions(
+            assertions,
+            attrs=container.attrs,
+            variables=container.variables,
+            coords=container.coords)
+
+    return container
+
+
+def _read_csv_chunks(fp, header_file=None, parse_vars=False, assertions=None, *args, **kwargs):
+    '''
+    Read the header once and yield the body as a sequence of
+    metacsv.DataFrames of ``chunksize`` rows each
+    '''
+
+    if isinstance(fp, string_types):
+        with open_input(fp) as f:
+            for chunk in _read_csv_chunks(
+                    f, header_file, parse_vars, assertions, *args, **kwargs):
+                yield chunk
+        return
+
+    kwargs.setdefault('engine', 'python')
+
+    header = load_header_file(header_file)
+
+    fp = _pushback_stream(fp)
+
+    header.update(_parse_headered_data(fp))
+    lookups = header.pop(LOOKUPS_KEY, None)
+
+    kwargs.update({'attrs': header})
+    args, kwargs, special = Container.strip_special_attributes(args, kwargs)
+
+    if parse_vars:
+        if 'variables' in special:
+            for key, var in special['variables'].items():
+                special['variables'][key] = Variables.parse_string_var(var)
+
+    _verify_assertions(
+        assertions,
+        attrs=Attributes(special.get('attrs', None)),
+        coords=Coordinates(special.get('coords', None)),
+        variables=Variables(special.get('variables', None)))
+
+    for chunk in pd.read_csv(fp, *args, **kwargs):
+        if lookups:
+            chunk = rehydrate(chunk, lookups)
+        yield DataFrame(
+            chunk, **dict((k, v.copy()) for k, v in special.items()))
+
+
+def _read_csv_dask(fp, header_file=None, parse_vars=False, assertions=None, *args, **kwargs):
+
+    header = load_header_file(header_file)
+
+    if not isinstance(fp, string_types):
+        raise ValueError('backend="dask" requires a file path')
+
+    if infer_compression(fp) is not None:
+        raise ValueError('backend="dask" cannot read compressed files')
+
+    with open(fp, 'rb') as f:
+        _header, body_offset = _find_body_offset(f)
+
+    header.update(_header)
+
+    if LOOKUPS_KEY in header:
+        raise NotImplementedError(
+            'backend="dask" cannot read files with normalized coordinates')
+
+    kwargs.update({'attrs': header})
+    args, kwargs, special = Container.strip_special_attributes(args, kwargs)
+
+    if parse_vars:
+        if 'variables' in special:
+            for key, var in special['variables'].items():
+                special['variables'][key] = Variables.parse_string_var(var)
+
+    ddf = read_dask_csv(fp, special, body_offset, *args, **kwargs)
+    _verify_assertions(assertions, attrs=ddf.attrs, variables=ddf.variables, coords=ddf.coords)
+
+    return ddf
+
+
+def read_many(fps, header_file=None, parse_vars=False, assertions=None,
+              sidecar=SIDECAR_PATTERNS, *args, **kwargs):
+    """
+    Read many metacsv-formatted files that share a supplemental header
+
+    Args:
+        fps (str or list): list of filepaths, or a glob pattern
+
+    Kwargs:
+        header_file (str, buffer or dict-like): supplemental header applied to
+            every file. It is parsed once.
+        parse_vars (bool): parse variable definitions (see read_csv)
+        assertions (dict-like): dictionary of values to assert in each header
+        sidecar (list): header file name patterns looked up next to each file
+            when ``header_file`` is not given (see find_sidecar). The default
+            uses ``<stem>.header``, then a shared ``metacsv.header``. Each
+            sidecar is parsed once however many files use it. None disables
+            the lookup.
+
+    *args, **kwargs passed to read_csv. With ``where``, files whose header
+    statistics rule out the selection (see ``to_csv(..., stats=True)``) are
+    returned empty without reading their body.
+
+    Returns:
+        containers (list): metacsv containers in the order of ``fps``
+
+    Example:
+
+        >>> shards = metacsv.read_many('data/shard_*.csv')
+    """
+
+    if isinstance(fps, string_types):
+        fps = sorted(glob.glob(fps))
+
+    if header_file is not None:
+        header_file = load_header_file(header_file)
+
+    containers = []
+
+    for fp in fps:
+        _header_file = header_file
+        if _header_file is None and sidecar:
+            _header_file = find_sidecar(fp, sidecar)
+
+        containers.append(read_csv(
+            fp, _header_file, parse_vars, assertions, *args, **kwargs))
+
+    return containers
+
+
+def _find_partitions(fp, where=None):
+    dirs = [
+        d for d in sorted(os.listdir(fp))
+        if '=' in d and os.path.isdir(os.path.join(fp, d))]
+
+    if len(dirs) == 0:
+        path = os.path.join(fp, PARTITION_FILE)
+        return [path] if os.path.isfile(path) else []
+
+    partitions = []
+
+    for d in dirs:
+        coord, value = d.split('=', 1)
+        if where is not None and coord in where:
+            # compare values as they are parsed from the partition files, so
+            # that year=2020.0 matches 2020
+            value = _parse_keys([unquote(value)])
+            if not _isin(value, where[coord])[0]:
+                continue
+
+        partitions.extend(_find_partitions(os.path.join(fp, d), where))
+
+    return partitions
+
+
+def read_partitioned(fp, where=None, header_file=None, parse_vars=False,
+                     assertions=None, threads=None, *args, **kwargs):
+    """
+    Read a directory written by metacsv.DataFrame.to_partitioned
+
+    Partition directories are pruned using ``where`` before any file is
+    opened, and the remaining partitions are read in parallel threads with
+    pandas' C parser (unless ``engine`` is given).
+
+    Args:
+        fp (str): partitioned directory
+
+    Kwargs:
+        where (dict): values to select, e.g. ``{'year': [2050, 2100]}``.
+            Partition coordinates prune directories; other columns filter the
+            rows of each partition (see read_csv).
+        header_file (str, buffer or dict-like): header to use instead of the
+            ``metacsv.header`` at the root of ``fp``
+        parse_vars (bool): parse variable definitions (see read_csv)
+        assertions (dict-like): dictionary of values to assert in the header
+        threads (int): number of partitions read at once. None uses all cores.
+
+    *args, **kwargs passed to read_csv
+
+    Example:
+
+        >>> df = metacsv.read_partitioned('data', where={'scenario': 'ssp1'})
+    """
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    header_file = load_header_file(
+        header_file if header_file is not None else os.path.join(fp, PARTITION_HEADER))
+
+    with instrumentation.operation('read_partitioned') as record:
+
+        with instrumentation.stage('prune'):
+            partitions = _find_partitions(fp, where)
+
+            if len(partitions) == 0:
+                # read the structure of any partition, matching no rows
+                partitions = _find_partitions(fp)[:1]
+
+            if len(partitions) == 0:
+                raise ValueError('No partitions found in {}'.format(fp))
+
+        # the C parser releases the GIL, so partitions are parsed in parallel
+        kwargs.setdefault('engine', 'c')
+
+        def read(path):
+            return read_csv(
+                path, header_file, parse_vars, assertions, where=where, *args, **kwargs)
+
+        with instrumentation.stage('body'):
+            with ThreadPoolExecutor(threads or multiprocessing.cpu_count()) as pool:
+                containers = list(pool.map(read, partitions))
+
+        with instrumentation.stage('concat') as stage_record:
+            first = containers[0]
+            data = first.pandas_parent(pd.concat(
+                [c.pandas_parent(c, copy=False) for c in containers]))
+
+            container = type(first)(
+                data, coords=first.coords._coords, attrs=first.attrs, variables=first.variables)
+            record['rows'] = stage_record['rows'] = len(container)
+
+    return container
+
+
+def read_netcdf(fp, chunksize=2**20, assertions=None, *args, **kwargs):
+    """
+    Read a NetCDF file into a metacsv.DataFrame
+
+    The file is opened lazily and flattened to long form one slice at a time
+    (see :py:meth:`metacsv.DataFrame.from_xarray`).
+
+    Args:
+        fp (str or buffer): NetCDF filepath or buffer to read
+
+    Kwargs:
+        chunksize (int): approximate number of rows flattened at a time
+        assertions (dict-like): dictionary of values to assert in file attributes
+
+    *args, **kwargs passed to xarray.open_dataset
+    """
+
+    from_xarray._import_xarray()
+
+    with from_xarray.xr.open_dataset(fp, *args, **kwargs) as ds:
+        df = DataFrame.from_xarray(ds, chunksize=chunksize)
+
+    _verify_assertions(assertions, attrs=df.attrs, variables=df.variables, coords=df.coords)
+    return df
 
 
 def read_pickle(fp, assertions=None, *args, **kwargs):
@@ -0,0 +1,262 @@
+'''
+Column statistics stored in the header for pruning
+
+With ``to_csv(..., stats=True)`` the minimum, maximum, count of values and
+count of missing values of every coordinate and data column are stored in
+the metadata of each variable, along with the number of distinct values of
+each coordinate:
+
+.. code-block:: yaml
+
+    variables:
+      year:
+        stats: {min: 2010, max: 2011, count: 4, null_count: 0, distinct_count: 2}
+
+Readers can then decide from the header alone whether a file may hold rows
+matching a selection (see :py:func:`may_match`), as ``read_many(...,
+where=...)`` does.
+'''
+
+from __future__ import absolute_import, division, print_function, \
+    with_statement, unicode_literals
+
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from .._compat import string_types
+from .indexing import _as_list
+
+STATS_KEY = 'stats'
+
+
+def _to_native(value):
+    if isinstance(value, (np.datetime64, pd.Timestamp)):
+        return str(pd.Timestamp(value))
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _bounds(values):
+    '''Minimum and maximum of non-missing ``values``, or None if unordered'''
+
+    if len(values) == 0:
+        return None
+
+    try:
+        if values.dtype.kind in 'iufmM':
+            return _to_native(values.min()), _to_native(values.max())
+        return _to_native(min(values)), _to_native(max(values))
+    except TypeError:
+        return None
+
+
+def _summarize(values, distinct=None):
+    values = np.asarray(values)
+    nulls = pd.isnull(values)
+    valid = values[~nulls] if nulls.any() else values
+
+    stats = OrderedDict()
+
+    bounds = _bounds(valid)
+    if bounds is not None:
+        stats['min'], stats['max'] = bounds
+
+    stats['count'] = int(len(valid))
+    stats['null_count'] = int(nulls.sum())
+
+    if distinct is not None:
+        stats['distinct_count'] = int(distinct)
+
+    return stats
+
+
+def _index_stats(index):
+    '''
+    Summaries of each index level, computed on the unique values of the
+    level that are used rather than on every row
+    '''
+
+    if isinstance(index, pd.MultiIndex):
+        codes = index.codes if hasattr(index, 'codes') else index.labels
+        levels = zip(index.names, codes, index.levels)
+    else:
+        codes, uniques = pd.factorize(index)
+        levels = [(index.name, codes, pd.Index(uniques))]
+
+    stats = OrderedDict()
+
+    for name, level_codes, level in levels:
+        if name is None:
+            continue
+
+        level_codes = np.asarray(level_codes)
+        missing = level_codes < 0
+        used = level.take(np.unique(level_codes[~missing]))
+
+        summary = _summarize(used.values, distinct=len(used))
+        summary['count'] = int(len(level_codes) - missing.sum())
+        summary['null_count'] = int(missing.sum())
+        stats[name] = summary
+
+    return stats
+
+
+def compute_stats(container):
+    '''
+    Summaries of every coordinate and column of ``container``
+
+    Returns:
+        stats (OrderedDict): ``min``, ``max``, ``count``, ``null_count`` and,
+            for coordinates, ``distinct_count``, by variable. ``min`` and
+            ``max`` are omitted for values that cannot be ordered.
+    '''
+
+    stats = _index_stats(container.index)
+
+    if isinstance(container, pd.Series):
+        if container.name is not None:
+            stats[container.name] = _summarize(container.values)
+        return stats
+
+    for i, name in enumerate(container.columns):
+        stats[name] = _summarize(container.iloc[:, i].values)
+
+    return stats
+
+
+def add_stats(variables, stats):
+    '''
+    Copy of ``variables`` (a Variables object) with ``stats`` added under the
+    ``stats`` key of each variable
+
+    String definitions are parsed into dictionaries (see
+    Variables.parse_string_var) to make room for the statistics.
+    '''
+
+    from ..core.internals import Variables
+
+    variables = OrderedDict(variables.items() if variables != None else [])
+
+    for name, summary in stats.items():
+        meta = variables.get(name, None)
+
+        if meta is None:
+            meta = OrderedDict()
+        elif isinstance(meta, string_types):
+            meta = Variables.parse_string_var(meta)
+            if isinstance(meta, string_types):
+                meta = {'description': meta}
+
+        meta = OrderedDict(meta)
+        meta[STATS_KEY] = summary
+        variables[name] = meta
+
+    return Variables(variables)
+
+
+def merge_stats(stats, other):
+    '''
+    Statistics of the rows described by ``stats`` and ``other`` together
+
+    Distinct counts cannot be combined without the values, so they are
+    dropped.
+    '''
+
+    merged = OrderedDict()
+
+    for key in ('min', 'max'):
+        if key in stats and key in other:
+            try:
+                merged[key] = (min if key == 'min' else max)(stats[key], other[key])
+            except TypeError:
+                pass
+        elif key in stats and other.get('count', 0) == 0:
+            merged[key] = stats[key]
+        elif key in other and stats.get('count', 0) == 0:
+            merged[key] = other[key]
+
+    if len(merged) == 1:
+        # keep both bounds or neither
+        merged = OrderedDict()
+
+    for key in ('count', 'null_count'):
+        merged[key] = stats.get(key, 0) + other.get(key, 0)
+
+    return merged
+
+
+def strip_stats(variables):
+    '''
+    ``variables`` without statistics, which no longer describe the data once
+    it has been modified. Returns ``variables`` itself if it has none.
+    '''
+
+    from ..core.internals import Variables
+
+    if variables == None or not any(
+            hasattr(meta, 'get') and STATS_KEY in meta
+            for _, meta in variables.items()):
+        return variables
+
+    stripped = OrderedDict()
+    for name, meta in variables.items():
+        if hasattr(meta, 'get') and STATS_KEY in meta:
+            meta = OrderedDict((k, v) for k, v in meta.items() if k != STATS_KEY)
+            if len(meta) == 0:
+                continue
+        stripped[name] = meta
+
+    return Variables(stripped)
+
+
+def _is_null(value):
+    try:
+        return bool(pd.isnull(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def _may_contain(stats, value):
+    if _is_null(value):
+        return stats.get('null_count', 1) > 0
+
+    if stats.get('count', None) == 0:
+        return False
+
+    if 'min' not in stats or 'max' not in stats:
+        return True
+
+    try:
+        return bool(stats['min'] <= value <= stats['max'])
+    except TypeError:
+        return True
+
+
+def may_match(variables, where):
+    '''
+    Whether a file whose header defines ``variables`` may hold rows matching
+    ``where``
+
+    Args:
+        variables (dict-like): variable definitions from the file header
+        where (dict): values to select by column (see read_csv)
+
+    Returns:
+        False if the statistics in ``variables`` rule out every value of some
+        column in ``where``, True otherwise (including when there are no
+        statistics to go by). Missing values (NaN or None) in ``where`` may
+        match wherever the statistics count nulls.
+    '''
+
+    for coord, values in where.items():
+        meta = (variables or {}).get(coord, None)
+        stats = meta.get(STATS_KEY, None) if hasattr(meta, 'get') else None
+
+        if stats is None:
+            continue
+
+        if not any(_may_contain(stats, v) for v in _as_list(values)):
+            return False
+
+    return True
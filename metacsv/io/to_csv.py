@@ -1,10 +1,36 @@
 
+import os
+import shutil
+import multiprocessing
+import numpy as np
+import pandas as pd
 from collections import OrderedDict
 from .yaml_tools import ordered_dump
-from .._compat import string_types, has_iterkeys, iterkeys, text_type, text_to_native
+from .._compat import string_types, has_iterkeys, iterkeys, text_type, text_to_native, quote
+from .. import instrumentation
+from .arrow_tools import write_csv_body
+from .compression import open_output, infer_compression
+from .indexing import RowIndexWriter
+from . import lookups as _lookups
+from . import stats as _stats
+from . import checksum as _checksum
 
 
-def _header_to_file_object(fp, attrs=None, coords=None, variables=None):
+def _padding(nbytes):
+    '''
+    Blank space of exactly ``nbytes`` bytes to place before the ``...`` fence
+
+    Padding is a yaml comment line, so it is ignored by parsers and can later
+    be overwritten by a longer header (see metacsv.update_header).
+    '''
+
+    if nbytes <= 0:
+        return ''
+    elif nbytes == 1:
+        return ' '
+    return '#' + ' ' * (nbytes - 2) + '\n'
+
+def _format_header(attrs=None, coords=None, variables=None, padding=0, lookups=None):
 
     attr_dict = OrderedDict()
 
@@ -17,38 +43,297 @@ def _header_to_file_object(fp, attrs=None, coords=None, variables=None):
     if variables != None:
         attr_dict.update({'variables': variables._data})
 
+    if len(attr_dict) == 0 and not lookups and padding <= 0:
+        return ''
+
+    header = '---\n'
+
     if len(attr_dict) > 0:
-        fp.write(text_to_native(('---\n'), 'utf-8'))
-        fp.write(text_to_native(ordered_dump(
-            attr_dict, default_flow_style=False, allow_unicode=True), 'utf-8'))
-        fp.write(text_to_native(('...\n'), 'utf-8'))
+        header += ordered_dump(attr_dict, default_flow_style=False, allow_unicode=True)
+
+    if lookups:
+        # one line per lookup table column
+        header += ordered_dump(
+            {_lookups.LOOKUPS_KEY: lookups}, default_flow_style=None,
+            allow_unicode=True, width=float('inf'))
+
+    pad = _padding(padding)
+
+    if pad == ' ':
+        return header + '... \n'
+
+    return header + pad + '...\n'
+
+def _header_to_file_object(fp, attrs=None, coords=None, variables=None, padding=0, lookups=None):
+    header = _format_header(attrs, coords, variables, padding, lookups)
+
+    if len(header) > 0:
+        fp.write(text_to_native(header, 'utf-8'))
 
 def _container_to_csv_object(container, fp, *args, **kwargs):
     encoding = kwargs.pop('encoding', 'utf-8')
-    container.pandas_parent.to_csv(container, fp, *args, encoding=encoding, **kwargs)
+    engine = kwargs.pop('engine', 'pandas')
+
+    if engine == 'pyarrow':
+        write_csv_body(container, fp, *args, **kwargs)
+
+    elif engine == 'pandas':
+        getattr(container, 'pandas_parent', type(container)).to_csv(
+            container, fp, *args, encoding=encoding, **kwargs)
+
+    else:
+        raise ValueError(
+            'engine must be "pandas" or "pyarrow", not "{}"'.format(engine))
 
 def metacsv_to_csv(container, fp, header_file=None, *args, **kwargs):
+    with instrumentation.operation('to_csv') as record:
+        record['rows'] = len(container)
+        _metacsv_to_csv(container, fp, header_file, *args, **kwargs)
+
+def _pop_compression_kwargs(kwargs):
+    return dict(
+        compression=kwargs.pop('compression', 'infer'),
+        threads=kwargs.pop('compression_threads', 1),
+        level=kwargs.pop('compression_level', None))
+
+def _write_indexed_body(container, buf, index, *args, **kwargs):
+    '''
+    Write the body ``index.every`` rows at a time, recording the offset of
+    the first row of each block
+    '''
+
+    header = kwargs.pop('header', True)
+
+    columns_offset = buf.tell()
+    if header is not False:
+        _container_to_csv_object(container.iloc[:0], buf, header=header, *args, **kwargs)
+    index.columns(columns_offset, buf.tell())
+
+    for start in range(0, len(container), index.every):
+        block = container.iloc[start:start + index.every]
+        index.block(buf.tell(), len(block))
+        _container_to_csv_object(block, buf, header=False, *args, **kwargs)
+
+def _metacsv_to_csv(container, fp, header_file=None, *args, **kwargs):
+    compression = _pop_compression_kwargs(kwargs)
+    padding = kwargs.pop('header_padding', 0)
+    row_index = kwargs.pop('row_index', None)
+    checksum = kwargs.pop('checksum', None)
+    lookups = None
+    attrs = _checksum.strip_checksum(container.attrs)
+    variables = _stats.strip_stats(container.variables)
     separate_header = False
 
     if (header_file is not None) and (header_file != fp):
         separate_header = True
-    
+
+    if checksum:
+        if not isinstance(fp, string_types) or infer_compression(fp, compression['compression']) is not None:
+            raise ValueError('checksum requires an uncompressed output path')
+        algorithm = _checksum.DEFAULT_ALGORITHM if checksum is True else checksum
+        hasher = _checksum.new_hash(algorithm)
+        attrs = attrs.copy()
+        attrs[_checksum.CHECKSUM_KEY] = _checksum.placeholder(algorithm)
+
+    if row_index:
+        if not isinstance(fp, string_types) or infer_compression(fp, compression['compression']) is not None:
+            raise ValueError('row_index requires an uncompressed output path')
+        row_index = RowIndexWriter(10000 if row_index is True else row_index)
+
+    if kwargs.pop('normalize_coords', False):
+        with instrumentation.stage('normalize_coords'):
+            body, lookups = _lookups.normalize(container)
+    else:
+        body = container
+
+    if kwargs.pop('stats', False):
+        with instrumentation.stage('stats') as record:
+            record['rows'] = len(container)
+            variables = _stats.add_stats(variables, _stats.compute_stats(container))
+
+    def write(buf):
+        if not separate_header:
+            with instrumentation.stage('header'):
+                _header_to_file_object(buf, attrs=attrs, coords=container.coords, variables=variables, padding=padding, lookups=lookups)
+        if checksum:
+            # hash the encoded body as it is written
+            buf.flush()
+            raw.start()
+        with instrumentation.stage('body') as record:
+            record['rows'] = len(body)
+            if row_index:
+                _write_indexed_body(body, buf, row_index, *args, **kwargs)
+            else:
+                _container_to_csv_object(body, buf, *args, **kwargs)
+
+    if checksum:
+        fp2, raw = _checksum.open_hashed_output(fp, hasher)
+        with fp2:
+            write(fp2)
+    elif isinstance(fp, string_types):
+        with open_output(fp, **compression) as fp2:
+            write(fp2)
+    else:
+        write(fp)
+
+    if checksum:
+        attrs[_checksum.CHECKSUM_KEY] = _checksum.format_checksum(
+            algorithm, hasher.hexdigest())
+
+    if separate_header:
+        with instrumentation.stage('header'):
+            metacsv_to_header(header_file, attrs=attrs, coords=container.coords, variables=variables, padding=padding, lookups=lookups)
+
+    elif checksum:
+        with instrumentation.stage('checksum'):
+            _checksum.write_checksum(fp, attrs[_checksum.CHECKSUM_KEY])
+
+    if row_index:
+        row_index.save(fp)
+
+def metacsv_chunks_to_csv(chunks, fp, header_file=None, *args, **kwargs):
+    '''
+    Write an iterable of metacsv containers to a single metacsv-formatted csv
+
+    The header is taken from the first chunk and written once; the body of
+    each chunk is appended as it arrives, so only one chunk is held in
+    memory at a time.
+    '''
+
+    kwargs.pop('header', None)
+    compression = _pop_compression_kwargs(kwargs)
+    padding = kwargs.pop('header_padding', 0)
+    chunks = iter(chunks)
+
+    first = next(chunks, None)
+    if first is None:
+        return
+
+    separate_header = (header_file is not None) and (header_file != fp)
+
+    attrs = _checksum.strip_checksum(first.attrs)
+    variables = _stats.strip_stats(first.variables)
+
     if separate_header:
-        metacsv_to_header(header_file, attrs=container.attrs, coords=container.coords, variables=container.variables)
+        metacsv_to_header(header_file, attrs=attrs, coords=first.coords, variables=variables, padding=padding)
+
+    def write(buf):
+        if not separate_header:
+            _header_to_file_object(buf, attrs=attrs, coords=first.coords, variables=variables, padding=padding)
+        _container_to_csv_object(first, buf, *args, **kwargs)
+        for chunk in chunks:
+            _container_to_csv_object(chunk, buf, header=False, *args, **kwargs)
 
     if isinstance(fp, string_types):
-        with open(text_type(fp), 'w+') as fp2:
-            if not separate_header:
-                _header_to_file_object(fp2, attrs=container.attrs, coords=container.coords, variables=container.variables)
-            _container_to_csv_object(container, fp2, *args, **kwargs)
+        with open_output(fp, **compression) as fp2:
+            write(fp2)
     else:
-        if not separate_header:
-            _header_to_file_object(fp, attrs=container.attrs, coords=container.coords, variables=container.variables)
-        _container_to_csv_object(container, fp, *args, **kwargs)
+        write(fp)
 
-def metacsv_to_header(fp, attrs=None, coords=None, variables=None):
+def metacsv_to_header(fp, attrs=None, coords=None, variables=None, padding=0, lookups=None):
     if isinstance(fp, string_types):
-        with open(text_type(fp), 'w+') as fp2:
-            _header_to_file_object(fp2, attrs=attrs, coords=coords, variables=variables)
+        with open_output(fp) as fp2:
+            _header_to_file_object(fp2, attrs=attrs, coords=coords, variables=variables, padding=padding, lookups=lookups)
     else:
-        _header_to_file_object(fp, attrs=attrs, coords=coords, variables=variables)
+        _header_to_file_object(fp, attrs=attrs, coords=coords, variables=variables, padding=padding, lookups=lookups)
+
+PARTITION_HEADER = 'metacsv.header'
+PARTITION_FILE = 'part.csv'
+
+def partition_dirname(coord, value):
+    return '{}={}'.format(coord, quote(text_type(value), safe=''))
+
+def _partition_keys(container, partition_by):
+    keys = []
+    for coord in partition_by:
+        if coord in container.index.names:
+            keys.append(container.index.get_level_values(coord))
+        elif hasattr(container, 'columns') and coord in container.columns:
+            keys.append(container[coord].values)
+        else:
+            raise ValueError(
+                'Cannot partition by "{}": not a coordinate or column'.format(coord))
+    return keys
+
+def _group_partitions(data, keys):
+    '''
+    Yield the key and rows of each partition of ``data``, sorted by key
+
+    Keys are factorized first, so rows with missing keys, which groupby would
+    drop, form a partition of their own.
+    '''
+
+    factorized = [pd.factorize(k, sort=True) for k in keys]
+
+    for codes, group in data.groupby([c for c, _ in factorized], sort=True):
+        if not isinstance(codes, tuple):
+            codes = (codes, )
+
+        yield tuple(
+            uniques[code] if code >= 0 else np.nan
+            for code, (_, uniques) in zip(codes, factorized)), group
+
+def _write_partition(path, group, args, kwargs):
+    with open_output(os.path.join(path, PARTITION_FILE)) as f:
+        _container_to_csv_object(group, f, *args, **kwargs)
+
+def metacsv_to_partitioned(container, fp, partition_by, processes=None, overwrite=False, *args, **kwargs):
+    from concurrent.futures import ProcessPoolExecutor
+
+    if isinstance(partition_by, string_types):
+        partition_by = [partition_by]
+
+    if container.ndim > 2:
+        raise NotImplementedError('Only Series and DataFrames can be partitioned')
+
+    attrs = _checksum.strip_checksum(container.attrs)
+    coords = container.coords
+    variables = _stats.strip_stats(container.variables)
+
+    if container.ndim == 1:
+        container = container.to_frame()
+
+    # plain pandas frames are cheaper to send to the worker processes
+    data = pd.DataFrame(container, copy=False)
+
+    if os.path.isdir(fp) and len(os.listdir(fp)) > 0:
+        if not overwrite:
+            raise ValueError(
+                '{} is not empty. Use overwrite=True to replace it'.format(fp))
+        shutil.rmtree(fp)
+
+    with instrumentation.operation('to_partitioned') as record:
+        record['rows'] = len(container)
+
+        with instrumentation.stage('header'):
+            if not os.path.isdir(fp):
+                os.makedirs(fp)
+            metacsv_to_header(
+                os.path.join(fp, PARTITION_HEADER), attrs=attrs,
+                coords=coords, variables=variables)
+
+        with instrumentation.stage('body'):
+            partitions = []
+            for key, group in _group_partitions(
+                    data, _partition_keys(container, partition_by)):
+                path = os.path.join(fp, *[
+                    partition_dirname(c, v) for c, v in zip(partition_by, key)])
+                if not os.path.isdir(path):
+                    os.makedirs(path)
+
+                partitions.append((path, group))
+
+            # formatting csv holds the GIL, so partitions are written by
+            # separate processes
+            workers = min(processes or multiprocessing.cpu_count(), max(len(partitions), 1))
+
+            if workers == 1:
+                for path, group in partitions:
+                    _write_partition(path, group, args, kwargs)
+                return
+
+            with ProcessPoolExecutor(workers) as pool:
+                for future in [
+                        pool.submit(_write_partition, path, group, args, kwargs)
+                        for path, group in partitions]:
+                    future.result()
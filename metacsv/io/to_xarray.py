@@ -5,8 +5,8 @@ Utilities for converting metacsv Containers to xarray containers
 import pandas as pd
 import numpy as np
 from collections import OrderedDict
-from .._compat import string_types
 from .yaml_tools import ordered_dump
+from .. import instrumentation
 
 xr = None
 
@@ -22,14 +22,24 @@ def _import_xarray():
 
 
 def _check_series_unique(series):
-    def check_unique(group):
-        assert len(group.drop_duplicates()) == 1, "Data not uniquely indexed for base coords: ({})".format(
-            group.name if isinstance(group.name, string_types) else ','.join(group.name))
+    from ..core.aggregation import _level_codes, _dense_groups, _count_distinct
 
-    if len(series.index.names) > 1:
-        series.groupby(level=series.index.names).apply(check_unique)
+    levels = _level_codes(series.index)
+    groups, first = _dense_groups(levels, list(levels))
+    valid = groups >= 0
+
+    if hasattr(series, 'columns'):
+        columns = [series.iloc[:, i].values for i in range(series.shape[1])]
     else:
-        series.groupby(by=series.index).apply(check_unique)
+        columns = [series.values]
+
+    for values in columns:
+        violations = np.flatnonzero(_count_distinct(groups[valid], values[valid]) > 1)
+        if len(violations) > 0:
+            row = first[violations[0]]
+            raise AssertionError(
+                "Data not uniquely indexed for base coords: ({})".format(
+                    ','.join([str(levels[c][1][levels[c][0][row]]) for c in levels])))
 
 
 def _append_coords_to_dataset(ds, container, base_only, attrs=None):
@@ -58,6 +68,7 @@ def _append_coords_to_dataset(ds, container, base_only, attrs=None):
             data, attrs=container.variables.get(coord, {}))
 
 
+@instrumentation.instrumented('to_dataarray')
 def metacsv_series_to_dataarray(series, attrs=None):
 
     global xr
@@ -73,16 +84,21 @@ def metacsv_series_to_dataarray(series, attrs=None):
         if len(reset) > 0:
             series = series.reset_index(reset, drop=True)
 
-    _check_series_unique(series)
-    series = series.iloc[np.unique(series.index.values, return_index=True)[1]]
+    with instrumentation.stage('check_unique') as record:
+        record['rows'] = len(series)
+        _check_series_unique(series)
+        series = series.iloc[np.unique(series.index.values, return_index=True)[1]]
 
-    series.index.names = list(map(str, series.index.names))
-    da = xr.DataArray.from_series(series)
-    da.attrs = attrs
+    with instrumentation.stage('data') as record:
+        record['rows'] = len(series)
+        series.index.names = list(map(str, series.index.names))
+        da = xr.DataArray.from_series(series)
+        da.attrs = attrs
 
     return da
 
 
+@instrumentation.instrumented('to_dataset')
 def metacsv_series_to_dataset(series, name='data', attrs=None):
 
     global xr
@@ -101,22 +117,28 @@ def metacsv_series_to_dataset(series, name='data', attrs=None):
     else:
         base_only = series
 
-    _check_series_unique(base_only)
+    with instrumentation.stage('check_unique') as record:
+        record['rows'] = len(base_only)
+        _check_series_unique(base_only)
 
-    _append_coords_to_dataset(ds, series, base_only, attrs)
+    with instrumentation.stage('coords'):
+        _append_coords_to_dataset(ds, series, base_only, attrs)
 
-    if len(reset) > 0:
-        data = series.reset_index(reset, drop=True)
-    else:
-        data = series
+    with instrumentation.stage('data') as record:
+        if len(reset) > 0:
+            data = series.reset_index(reset, drop=True)
+        else:
+            data = series
 
-    ds[name] = xr.DataArray.from_series(data)
-    ds[name].attrs = series.variables.get(name, {})
-    ds.attrs = series.attrs
+        record['rows'] = len(data)
+        ds[name] = xr.DataArray.from_series(data)
+        ds[name].attrs = series.variables.get(name, {})
+        ds.attrs = series.attrs
 
     return ds
 
 
+@instrumentation.instrumented('to_dataset')
 def metacsv_dataframe_to_dataset(dataframe, name='data', attrs=None):
 
     global xr
@@ -135,23 +157,94 @@ def metacsv_dataframe_to_dataset(dataframe, name='data', attrs=None):
     else:
         base_only = dataframe
 
-    _check_series_unique(base_only)
+    with instrumentation.stage('check_unique') as record:
+        record['rows'] = len(base_only)
+        _check_series_unique(base_only)
 
-    _append_coords_to_dataset(ds, dataframe, base_only, attrs)
+    with instrumentation.stage('coords'):
+        _append_coords_to_dataset(ds, dataframe, base_only, attrs)
 
-    if len(reset) > 0:
-        data = dataframe.reset_index(reset, drop=True)
-    else:
-        data = dataframe
+    with instrumentation.stage('data') as record:
+        if len(reset) > 0:
+            data = dataframe.reset_index(reset, drop=True)
+        else:
+            data = dataframe
 
-    for col in dataframe.columns:
-        ds[col] = xr.DataArray.from_series(data[col])
-        ds[col].attrs = dataframe.variables.get(col, {})
-        ds.attrs = dataframe.attrs
+        record['rows'] = len(data)
+        for col in dataframe.columns:
+            ds[col] = xr.DataArray.from_series(data[col])
+            ds[col].attrs = dataframe.variables.get(col, {})
+            ds.attrs = dataframe.attrs
 
     return ds
 
 
+def _get_product_levels(index):
+    '''
+    Return the unique values of each index level if ``index`` is a complete,
+    sorted Cartesian product of its levels, otherwise None
+    '''
+
+    if not (index.is_unique and index.is_monotonic_increasing):
+        return None
+
+    if isinstance(index, pd.MultiIndex):
+        levels = [index.get_level_values(i).unique()
+                  for i in range(index.nlevels)]
+    else:
+        levels = [index]
+
+    if int(np.prod([len(l) for l in levels])) != len(index):
+        return None
+
+    return levels
+
+
+def _dataframe_to_dataarray_by_reshape(dataframe, attrs):
+    '''
+    Build a DataArray by reshaping the DataFrame's values in place
+
+    Only applies when the base coordinates form a complete, sorted product and
+    the columns have a single level; returns None otherwise so the caller can
+    fall back to stacking.
+    '''
+
+    if isinstance(dataframe.columns, pd.MultiIndex):
+        return None
+
+    index = dataframe.index
+
+    if dataframe.base_coords != None:
+        drop = [c for c in index.names if c not in dataframe.base_coords]
+        if len(drop) > 0:
+            index = index.droplevel(drop)
+
+    levels = _get_product_levels(index)
+    columns = dataframe.columns
+
+    if levels is None or not columns.is_unique:
+        return None
+
+    values = dataframe.values
+
+    if not columns.is_monotonic_increasing:
+        order = np.argsort(columns.values)
+        columns = columns[order]
+        values = values[:, order]
+
+    shape = tuple(len(l) for l in levels) + (len(columns), )
+    dims = list(map(str, index.names)) + [str(columns.name)]
+
+    da = xr.DataArray(
+        values.reshape(shape),
+        coords=[l.values for l in levels] + [columns.values],
+        dims=dims)
+    da.attrs = attrs
+
+    return da
+
+
+@instrumentation.instrumented('to_dataarray')
 def metacsv_dataframe_to_dataarray(dataframe, names=None, attrs=None):
 
     global xr
@@ -166,8 +259,17 @@ def metacsv_dataframe_to_dataarray(dataframe, names=None, attrs=None):
     dataframe.columns.names = [str(c) if not pd.isnull(c) else 'coldim_{}'.format(
         i) for i, c in enumerate(dataframe.columns.names)]
 
+    with instrumentation.stage('reshape') as record:
+        record['rows'] = len(dataframe)
+        da = _dataframe_to_dataarray_by_reshape(dataframe, attrs)
+
+    if da is not None:
+        return da
+
     colnames = dataframe.columns.names
-    series = dataframe._constructor_sliced(dataframe.stack(colnames))
+    with instrumentation.stage('stack') as record:
+        series = dataframe._constructor_sliced(dataframe.stack(colnames))
+        record['rows'] = len(series)
     coords.update({c: None for c in colnames})
 
     series.coords.update(coords)
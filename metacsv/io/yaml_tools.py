@@ -1,21 +1,35 @@
-
 # Big thanks to http://stackoverflow.com/a/21912744/3888719
 
 import yaml
 from collections import OrderedDict
 
+# Use the libyaml-backed loader when pyyaml was built with it
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+_ordered_loaders = {}
+
+
+def _get_ordered_loader(Loader, object_pairs_hook):
+    key = (Loader, object_pairs_hook)
+
+    if key not in _ordered_loaders:
+        class OrderedLoader(Loader):
+            pass
+
+        def construct_mapping(loader, node):
+            loader.flatten_mapping(node)
+            return object_pairs_hook(loader.construct_pairs(node))
+        OrderedLoader.add_constructor(
+            yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG,
+            construct_mapping)
+
+        _ordered_loaders[key] = OrderedLoader
+
+    return _ordered_loaders[key]
 
-def ordered_load(stream, Loader=yaml.SafeLoader, object_pairs_hook=OrderedDict):
-    class OrderedLoader(Loader):
-        pass
 
-    def construct_mapping(loader, node):
-        loader.flatten_mapping(node)
-        return object_pairs_hook(loader.construct_pairs(node))
-    OrderedLoader.add_constructor(
-        yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG,
-        construct_mapping)
-    return yaml.load(stream, OrderedLoader)
+def ordered_load(stream, Loader=SafeLoader, object_pairs_hook=OrderedDict):
+    return yaml.load(stream, _get_ordered_loader(Loader, object_pairs_hook))
 
 
 def ordered_dump(data, stream=None, Dumper=yaml.SafeDumper, **kwds):
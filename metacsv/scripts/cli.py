@@ -0,0 +1,30 @@
+'Command line interface for MetaCSV: metacsv <command> [args]'
+
+from __future__ import (
+    absolute_import,
+    division, print_function, with_statement,
+    unicode_literals
+)
+
+import importlib
+import sys
+
+
+COMMANDS = {
+    'convert': 'metacsv.scripts.convert',
+    'inspect': 'metacsv.scripts.inspect',
+    'version': 'metacsv.scripts.version'}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    if len(argv) == 0 or argv[0] not in COMMANDS:
+        print(__doc__, file=sys.stderr)
+        print('\ncommands: {}'.format(', '.join(sorted(COMMANDS))), file=sys.stderr)
+        sys.exit(2)
+
+    importlib.import_module(COMMANDS[argv[0]]).main(argv[1:])
+
+if __name__ == "__main__":
+    main()
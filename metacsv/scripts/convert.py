@@ -7,21 +7,289 @@ from __future__ import (
 )
 
 import metacsv
+from metacsv.io.to_csv import metacsv_chunks_to_csv
 import argparse
+import errno
+import fnmatch
+import glob
+import hashlib
+import json
+import multiprocessing
 import os
+import sys
+import time
+import traceback
 
 
-def _to_netcdf(fp, writefile=None, *args, **kwargs):
+__all__ = ['main', 'get_parser']
+
+EXTENSIONS = {'netcdf': '.nc', 'csv': '.csv'}
+
+
+def _to_netcdf(readfile, writefile=None, *args, **kwargs):
     if writefile is None:
         writefile = os.path.splitext(readfile)[0] + '.nc'
 
-    metacsv.to_netcdf(fp, writefile, *args, **kwargs)
+    metacsv.to_netcdf(readfile, writefile, *args, **kwargs)
 
-def _to_csv(fp, writefile=None, *args, **kwargs):
+def _to_csv(readfile, writefile=None, *args, **kwargs):
     if writefile is None:
         writefile = os.path.splitext(readfile)[0] + '.csv'
 
-    metacsv.to_csv(fp, writefile, *args, **kwargs)
+    metacsv.to_csv(readfile, writefile, *args, **kwargs)
+
+
+CONVERTERS = {'netcdf': _to_netcdf, 'csv': _to_csv}
+
+
+def stream_convert(action, readfile, writefile, header=None, chunksize=100000):
+    '''
+    Convert using ``-`` for stdin and/or stdout
+
+    CSV output is streamed: the header is written once and the body is read
+    and written ``chunksize`` rows at a time. NetCDF cannot be written
+    incrementally, so for ``netcdf`` the input is read in full and the output
+    must be a file.
+    '''
+
+    infile = sys.stdin if readfile == '-' else readfile
+
+    if action == 'netcdf':
+        if writefile in (None, '-'):
+            raise ValueError('NetCDF output cannot be streamed; provide an output file')
+        metacsv.to_netcdf(metacsv.read_csv(infile, header_file=header), writefile)
+        return
+
+    if writefile is None:
+        raise ValueError('An output file (or - for stdout) is required when reading from stdin')
+
+    outfile = sys.stdout if writefile == '-' else writefile
+
+    chunks = metacsv.read_csv(infile, header_file=header, chunksize=chunksize)
+
+    try:
+        metacsv_chunks_to_csv(chunks, outfile)
+    except IOError as e:
+        # downstream consumer closed the pipe (e.g. ``| head``)
+        if e.errno != errno.EPIPE or outfile is not sys.stdout:
+            raise
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+
+
+def _get_root(pattern):
+    '''Longest leading directory of a glob pattern without wildcards'''
+    parts = []
+    for part in os.path.dirname(pattern).split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return os.sep.join(parts)
+
+
+def find_inputs(readfile, pattern='*.csv'):
+    '''
+    Resolve a file, directory or glob pattern to a list of input files
+
+    Returns:
+        files (list): sorted list of input paths
+        root (str): directory against which output paths are made relative,
+            or None if ``readfile`` is a single file
+    '''
+
+    if os.path.isdir(readfile):
+        files = []
+        for dirpath, dirnames, filenames in os.walk(readfile):
+            dirnames.sort()
+            for fn in sorted(filenames):
+                if fnmatch.fnmatch(fn, pattern):
+                    files.append(os.path.join(dirpath, fn))
+        return files, readfile
+
+    if glob.has_magic(readfile):
+        try:
+            files = glob.glob(readfile, recursive=True)
+        except TypeError:
+            files = glob.glob(readfile)
+        return sorted(f for f in files if os.path.isfile(f)), _get_root(readfile)
+
+    return [readfile], None
+
+
+def get_output_path(readfile, root, action, template):
+    dirname, basename = os.path.split(readfile)
+    stem = os.path.splitext(basename)[0]
+
+    relpath = os.path.relpath(os.path.join(dirname, stem), root or dirname or '.')
+
+    return template.format(
+        dirname=dirname or '.',
+        stem=stem,
+        relpath=relpath,
+        ext=EXTENSIONS[action])
+
+
+def file_hash(fp, blocksize=2**20):
+    h = hashlib.sha1()
+    with open(fp, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _source_state(readfile, header=None, method='mtime'):
+    sources = [readfile] + ([header] if header is not None else [])
+
+    if method == 'hash':
+        return ':'.join(file_hash(s) for s in sources)
+
+    return max(os.path.getmtime(s) for s in sources)
+
+
+def is_unchanged(readfile, writefile, header=None, method='mtime', manifest=None):
+    '''
+    Check whether ``writefile`` is up to date with ``readfile``
+
+    With ``method='mtime'`` the output must be newer than the input (and the
+    header file, if any). With ``method='hash'`` the content hash of the
+    sources must match the one recorded in ``manifest`` on the last run.
+    '''
+
+    if not os.path.exists(writefile):
+        return False
+
+    if method == 'mtime':
+        return os.path.getmtime(writefile) >= _source_state(readfile, header, 'mtime')
+
+    record = (manifest or {}).get(os.path.abspath(readfile))
+    if record is None or record.get('output') != os.path.abspath(writefile):
+        return False
+
+    return record.get('hash') == _source_state(readfile, header, 'hash')
+
+
+def _convert_one(task):
+    action, readfile, writefile, header = task
+    start = time.time()
+    size = 0
+
+    try:
+        size = os.path.getsize(readfile)
+
+        dirname = os.path.dirname(writefile)
+        if dirname and not os.path.isdir(dirname):
+            try:
+                os.makedirs(dirname)
+            except OSError:
+                if not os.path.isdir(dirname):
+                    raise
+
+        CONVERTERS[action](readfile, writefile, header_file=header)
+        error = None
+
+    except Exception:
+        error = traceback.format_exc()
+
+    return readfile, writefile, size, time.time() - start, error
+
+
+def _load_manifest(fp):
+    if fp is None or not os.path.exists(fp):
+        return {}
+    with open(fp, 'r') as f:
+        return json.load(f)
+
+
+def _save_manifest(fp, manifest):
+    with open(fp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def convert_batch(action, readfile, template=None, header=None, jobs=1,
+                  incremental=None, manifest=None, pattern='*.csv'):
+    '''
+    Convert every file matching ``readfile`` (a file, directory or glob)
+
+    Returns a summary dict with lists of ``converted``, ``skipped`` and
+    ``failed`` files along with the bytes read and elapsed wall time. Inputs
+    whose output path is the input itself are not converted and reported as
+    failed.
+    '''
+
+    start = time.time()
+    files, root = find_inputs(readfile, pattern=pattern)
+
+    if template is None:
+        if action == 'csv':
+            raise ValueError(
+                'An output directory or template is required to convert csv '
+                'files in batch, as the default would overwrite the inputs')
+        template = os.path.join('{dirname}', '{stem}{ext}')
+
+    records = _load_manifest(manifest) if incremental == 'hash' else {}
+
+    tasks = []
+    skipped = []
+    failed = []
+
+    for fp in files:
+        writefile = get_output_path(fp, root, action, template)
+        if os.path.abspath(writefile) == os.path.abspath(fp):
+            failed.append((fp, 'Output path {} is the input file\n'.format(writefile)))
+        elif incremental and is_unchanged(fp, writefile, header, incremental, records):
+            skipped.append(fp)
+        else:
+            tasks.append((action, fp, writefile, header))
+
+    if jobs > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(jobs)
+        try:
+            results = pool.map(_convert_one, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_convert_one(t) for t in tasks]
+
+    converted = []
+    nbytes = 0
+
+    for fp, writefile, size, elapsed, error in results:
+        if error is None:
+            converted.append(fp)
+            nbytes += size
+            if incremental == 'hash':
+                records[os.path.abspath(fp)] = {
+                    'output': os.path.abspath(writefile),
+                    'hash': _source_state(fp, header, 'hash')}
+        else:
+            failed.append((fp, error))
+
+    if incremental == 'hash' and manifest is not None:
+        _save_manifest(manifest, records)
+
+    return {
+        'converted': converted,
+        'skipped': skipped,
+        'failed': failed,
+        'bytes': nbytes,
+        'elapsed': time.time() - start}
+
+
+def format_summary(summary):
+    elapsed = max(summary['elapsed'], 1e-9)
+    nconverted = len(summary['converted'])
+
+    lines = [
+        'converted: {}  skipped: {}  failed: {}'.format(
+            nconverted, len(summary['skipped']), len(summary['failed'])),
+        'elapsed:   {:.2f}s  ({:.1f} files/s, {:.2f} MB/s)'.format(
+            elapsed, nconverted / elapsed, summary['bytes'] / 1e6 / elapsed)]
+
+    for fp, error in summary['failed']:
+        lines.append('FAILED {}\n{}'.format(fp, error.rstrip()))
+
+    return '\n'.join(lines)
 
 
 def get_parser():
@@ -29,27 +297,77 @@ def get_parser():
         __doc__)
     parser.add_argument(
         'action', help='type of file to be written (netcdf, csv)')
-    parser.add_argument('readfile', help='Input CSV file to read')
+    parser.add_argument(
+        'readfile', help='Input CSV file, directory or (quoted) glob pattern '
+        'to read, or - for stdin')
     parser.add_argument('writefile', nargs='?',
-                        default=None, help='Output file to read')
+                        default=None, help='Output file to write, output '
+                        'directory for batch inputs, or - for stdout')
     parser.add_argument('--header', nargs='?', default=None,
                         help='Header file for CSV read file')
+    parser.add_argument('--chunksize', type=int, default=100000,
+                        help='Rows per chunk when streaming from stdin or to stdout')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes for batch inputs')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Output path template for batch inputs. Fields: '
+                        '{dirname}, {stem}, {relpath}, {ext}')
+    parser.add_argument('--pattern', default='*.csv',
+                        help='Filename pattern used when reading a directory')
+    parser.add_argument('--incremental', choices=['mtime', 'hash'], default=None,
+                        help='Skip inputs whose output is up to date, by '
+                        'modification time or by content hash')
+    parser.add_argument('--manifest', default='.metacsv-convert.json',
+                        help='File recording content hashes for --incremental hash')
 
     return parser
 
 
-def main():
+def main(argv=None):
     parser = get_parser()
-    args = parser.parse_args()
-
-    if args.action.lower() == 'netcdf':
-        _to_netcdf(args.readfile, args.writefile, header_file=args.header)
+    args = parser.parse_args(argv)
 
-    elif args.action.lower() == 'csv':
-        _to_csv(args.readfile, args.writefile, header_file=args.header)
+    action = args.action.lower()
 
-    else:
+    if action not in CONVERTERS:
         parser.print_help()
+        return
+
+    if '-' in (args.readfile, args.writefile):
+        stream_convert(
+            action, args.readfile, args.writefile, header=args.header,
+            chunksize=args.chunksize)
+        return
+
+    batch = os.path.isdir(args.readfile) or glob.has_magic(args.readfile)
+
+    if not batch and args.incremental is None:
+        writefile = args.writefile
+        if args.output is not None:
+            writefile = get_output_path(args.readfile, None, action, args.output)
+
+        CONVERTERS[action](args.readfile, writefile, header_file=args.header)
+        return
+
+    template = args.output
+    if template is None and args.writefile is not None:
+        template = (
+            os.path.join(args.writefile, '{relpath}{ext}') if batch
+            else args.writefile.replace('{', '{{').replace('}', '}}'))
+
+    summary = convert_batch(
+        action, args.readfile, template=template, header=args.header,
+        jobs=args.jobs, incremental=args.incremental, manifest=args.manifest,
+        pattern=args.pattern)
+
+    if batch:
+        print(format_summary(summary))
+
+    elif len(summary['failed']) > 0:
+        print(summary['failed'][0][1], file=sys.stderr)
+
+    if len(summary['failed']) > 0:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,98 @@
+'Print the metadata of MetaCSV-formatted files without reading their data'
+
+from __future__ import (
+    absolute_import,
+    division, print_function, with_statement,
+    unicode_literals
+)
+
+import metacsv
+from metacsv.io.yaml_tools import ordered_dump
+import argparse
+import json
+import multiprocessing
+import sys
+from collections import OrderedDict
+
+
+def inspect_file(readfile, header_file=None):
+    '''
+    Read the header of a metacsv file, stopping at the ``...`` fence
+
+    Returns an OrderedDict with the file name and its ``attrs``, ``coords``
+    and ``variables``.
+    '''
+
+    attrs, coords, variables = metacsv.read_header(readfile, header_file=header_file)
+
+    return OrderedDict([
+        ('file', readfile),
+        ('attrs', attrs._data or OrderedDict()),
+        ('coords', coords._coords or OrderedDict()),
+        ('variables', variables._data or OrderedDict())])
+
+
+def _inspect_task(task):
+    readfile, header_file = task
+    try:
+        return inspect_file(readfile, header_file), None
+    except Exception as e:
+        return None, '{}: {}'.format(readfile, e)
+
+
+def format_header(header, fmt='yaml'):
+    if fmt == 'json':
+        return json.dumps(header, default=str)
+
+    return '---\n' + ordered_dump(
+        header, default_flow_style=False, allow_unicode=True) + '...'
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        __doc__)
+    parser.add_argument('readfiles', nargs='+', help='MetaCSV files to inspect')
+    parser.add_argument('--header', default=None,
+                        help='Header file applied to every read file')
+    parser.add_argument('-f', '--format', choices=['yaml', 'json'], default='yaml',
+                        help='Output format. json prints one object per line')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes')
+
+    return parser
+
+
+def main(argv=None):
+    parser = get_parser()
+    args = parser.parse_args(argv)
+
+    tasks = [(fp, args.header) for fp in args.readfiles]
+
+    if args.jobs > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(args.jobs)
+        results = pool.imap(
+            _inspect_task, tasks,
+            chunksize=max(1, len(tasks) // (args.jobs * 4)))
+    else:
+        pool = None
+        results = (_inspect_task(t) for t in tasks)
+
+    failed = False
+
+    try:
+        for header, error in results:
+            if error is not None:
+                print(error, file=sys.stderr)
+                failed = True
+            else:
+                print(format_header(header, args.format))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,7 @@ from __future__ import (
     unicode_literals
 )
 
-# from ...metacsv.io.parsers import read_csv
-from . import metacsv
+import metacsv
 import argparse
 import sys
 
@@ -26,9 +25,9 @@ def get_parser():
     return parser
 
 
-def main():
+def main(argv=None):
     parser = get_parser()
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     version = get_version(args.readfile)
 
@@ -10,6 +10,7 @@ from __future__ import (
 )
 
 import glob
+import gzip
 import os
 import xarray as xr
 import pandas as pd
@@ -17,6 +18,7 @@ import numpy as np
 import shutil
 import json
 import subprocess
+import warnings
 import locale
 
 import metacsv
@@ -150,6 +152,783 @@ class MetacsvTestCase(unittest.TestCase):
             self.assertTrue((abs(df.values - ds.to_dataframe().set_index(
                 [i for i in df.coords if i not in df.base_coords]).values) < 1e-7).all().all())
 
+    def test_command_line_batch_converter(self):
+        from metacsv.scripts import convert
+
+        indir = os.path.join(self.test_tmp_prefix, 'batch_in')
+        outdir = os.path.join(self.test_tmp_prefix, 'batch_out')
+        os.makedirs(os.path.join(indir, 'sub'))
+
+        for fp in ['test5.csv', 'test6.csv', os.path.join('sub', 'test6.csv')]:
+            shutil.copy(
+                os.path.join(self.testdata_prefix, os.path.basename(fp)),
+                os.path.join(indir, fp))
+
+        template = os.path.join(outdir, '{relpath}{ext}')
+
+        summary = convert.convert_batch(
+            'netcdf', indir, template=template, jobs=2, incremental='mtime')
+        self.assertEqual(len(summary['converted']), 3)
+        self.assertEqual(len(summary['failed']), 0)
+        self.assertTrue(os.path.isfile(os.path.join(outdir, 'sub', 'test6.nc')))
+
+        summary = convert.convert_batch(
+            'netcdf', indir, template=template, jobs=2, incremental='mtime')
+        self.assertEqual(len(summary['converted']), 0)
+        self.assertEqual(len(summary['skipped']), 3)
+
+        summary = convert.convert_batch(
+            'csv', os.path.join(indir, '*.csv'),
+            template=os.path.join(outdir, '{stem}{ext}'))
+        self.assertEqual(len(summary['converted']), 2)
+        self.assertTrue('converted: 2' in convert.format_summary(summary))
+
+        # batch conversions never overwrite their inputs
+        with self.assertRaises(ValueError):
+            convert.convert_batch('csv', os.path.join(indir, '*.csv'))
+
+        summary = convert.convert_batch(
+            'csv', os.path.join(indir, '*.csv'),
+            template=os.path.join('{dirname}', '{stem}{ext}'))
+        self.assertEqual(len(summary['converted']), 0)
+        self.assertEqual(len(summary['failed']), 2)
+
+        # missing inputs are reported without stopping the batch
+        results = [convert._convert_one(('csv', fp, os.path.join(outdir, 'out.csv'), None))
+                   for fp in [os.path.join(indir, 'missing.csv'), os.path.join(indir, 'test5.csv')]]
+        self.assertIsNotNone(results[0][-1])
+        self.assertIsNone(results[1][-1])
+
+        self.assertNotIn('find_inputs', dir(metacsv))
+
+    def test_command_line_stream_converter(self):
+        convert_script = 'metacsv.scripts.convert'
+
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_stream.csv')
+
+        with open(testfile, 'rb') as f:
+            p = subprocess.Popen(
+                ['python', '-m', convert_script, 'csv', '-', '-', '--chunksize', '7'],
+                stdin=f,
+                stderr=subprocess.PIPE,
+                stdout=subprocess.PIPE)
+            out, err = p.communicate()
+
+        self.assertEqual(p.returncode, 0)
+
+        with open(tmpfile, 'wb') as f:
+            f.write(out)
+
+        df = metacsv.read_csv(testfile)
+        df2 = metacsv.read_csv(tmpfile)
+
+        self.assertEqual(df.coords, df2.coords)
+        self.assertEqual(df.attrs, df2.attrs)
+        self.assertTrue((df.values == df2.values).all().all())
+
+    def test_read_csv_chunks(self):
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_chunks.csv')
+
+        chunks = list(metacsv.read_csv(testfile, chunksize=7))
+        self.assertEqual(len(chunks), 9)
+        self.assertEqual(chunks[-1].attrs, chunks[0].attrs)
+        self.assertEqual(chunks[-1].coords, chunks[0].coords)
+
+        metacsv.io.to_csv.metacsv_chunks_to_csv(chunks, tmpfile)
+
+        df = metacsv.read_csv(testfile)
+        df2 = metacsv.read_csv(tmpfile)
+        self.assertEqual(df.variables, df2.variables)
+        self.assertTrue((df.values == df2.values).all().all())
+
+    def test_instrumentation(self):
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_instrumented.csv')
+
+        with metacsv.instrument() as events:
+            df = metacsv.read_csv(testfile)
+            df.to_csv(tmpfile)
+            df.to_xarray()
+
+        stages = [(e.operation, e.stage) for e in events]
+
+        for stage in ['header_scan', 'yaml', 'body', 'coords', 'assertions', 'total']:
+            self.assertIn(('read_csv', stage), stages)
+
+        for stage in ['header', 'body', 'total']:
+            self.assertIn(('to_csv', stage), stages)
+
+        for stage in ['check_unique', 'coords', 'data', 'total']:
+            self.assertIn(('to_dataset', stage), stages)
+
+        body = [e for e in events if e.operation == 'read_csv' and e.stage == 'body'][0]
+        self.assertEqual(body.rows, len(df))
+        self.assertEqual(body.bytes, os.path.getsize(testfile))
+        self.assertTrue(all(e.duration >= 0 for e in events))
+
+        # hooks are removed on exit
+        with metacsv.instrument() as outer:
+            with metacsv.instrument() as inner:
+                metacsv.read_header(testfile)
+            metacsv.read_header(testfile)
+
+        self.assertEqual(len(outer), 2 * len(inner))
+
+        # the total peak covers every stage, not only the last one
+        with metacsv.instrument(trace_memory=True) as events:
+            metacsv.read_csv(testfile)
+
+        peaks = [e.peak_memory for e in events if e.operation == 'read_csv']
+        if all(p is not None for p in peaks):
+            self.assertEqual(peaks[-1], max(peaks))
+
+    def test_lazy_imports(self):
+        p = subprocess.Popen(
+            ['python', '-c', 'import sys, metacsv; '
+             'print(",".join(m for m in ["xarray", "dask", "netCDF4"] if m in sys.modules))'],
+            stderr=subprocess.PIPE,
+            stdout=subprocess.PIPE)
+
+        out, err = p.communicate()
+        self.assertEqual(p.returncode, 0, err)
+        self.assertEqual(out.strip().decode(locale.getpreferredencoding()), '')
+
+    def test_to_csv_leaves_container_unchanged(self):
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_override.csv')
+        tmpheader = os.path.join(self.test_tmp_prefix, 'test_override.header')
+
+        df = metacsv.read_csv(testfile)
+        attrs = df.attrs.copy()
+
+        metacsv.to_csv(df, tmpfile, attrs={'author': 'me'})
+        self.assertEqual(df.attrs, attrs)
+
+        df2 = metacsv.read_csv(tmpfile)
+        self.assertEqual(df2.attrs['author'], 'me')
+        self.assertEqual(df2.coords, df.coords)
+
+        pdf = pd.DataFrame(
+            {'a': [1, 2], 'b': [3., 4.], 'c': ['x', 'y']}).set_index('a')
+
+        metacsv.to_csv(pdf, tmpfile, coords={'a': None, 'c': 'a'})
+        self.assertEqual(list(pdf.columns), ['b', 'c'])
+        self.assertEqual(metacsv.read_csv(tmpfile).base_coords, ['a'])
+
+        metacsv.to_header(tmpheader, testfile, attrs={'author': 'me'})
+        attrs, coords, variables = metacsv.read_header(tmpheader)
+        self.assertEqual(attrs['author'], 'me')
+        self.assertEqual(coords, df.coords)
+
+    def test_to_csv_pyarrow(self):
+        try:
+            import pyarrow.csv
+        except ImportError:
+            self.skipTest('pyarrow not installed')
+
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_pyarrow.csv')
+
+        df = metacsv.read_csv(testfile)
+        df.to_csv(tmpfile, engine='pyarrow', chunksize=7)
+
+        df2 = metacsv.read_csv(tmpfile)
+        self.assertEqual(df2.attrs, df.attrs)
+        self.assertEqual(df2.coords, df.coords)
+        self.assertTrue((df2.index == df.index).all())
+        self.assertTrue((df2.values == df.values).all().all())
+
+        pdf = pd.DataFrame({'a': [1 / 3., 2 / 3., np.nan]})
+        metacsv.to_csv(
+            pdf, tmpfile, attrs={'author': 'me'}, engine='pyarrow', float_format='%.2f')
+
+        df3 = metacsv.read_csv(tmpfile, index_col=0)
+        self.assertEqual(df3.attrs['author'], 'me')
+        self.assertTrue(np.allclose(df3['a'].values[:2], [0.33, 0.67]))
+        self.assertTrue(np.isnan(df3['a'].values[2]))
+
+        with self.assertRaises(ValueError):
+            df.to_csv(tmpfile, engine='unknown')
+
+    def test_compressed_csv(self):
+        from metacsv.io.compression import open_output
+
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        df = metacsv.read_csv(testfile)
+
+        extensions = ['gz', 'bz2', 'xz']
+
+        try:
+            import zstandard
+            extensions.append('zst')
+        except ImportError:
+            pass
+
+        for ext in extensions:
+            tmpfile = os.path.join(self.test_tmp_prefix, 'test_compressed.csv.' + ext)
+            df.to_csv(tmpfile)
+
+            df2 = metacsv.read_csv(tmpfile)
+            self.assertEqual(df2.attrs, df.attrs)
+            self.assertEqual(df2.coords, df.coords)
+            self.assertTrue((df2.values == df.values).all().all())
+
+            # files without a header are read from the start of the body
+            with open_output(tmpfile) as f:
+                pd.DataFrame(df).to_csv(f)
+            df2 = metacsv.read_csv(tmpfile, index_col=list(range(6)))
+            self.assertEqual(len(df2.attrs), 0)
+            self.assertTrue((df2.values == df.values).all().all())
+            self.assertEqual(len(metacsv.read_header(tmpfile)[0]), 0)
+
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_parallel.csv.gz')
+        metacsv.to_csv(df, tmpfile, compression_threads=2)
+
+        with gzip.open(tmpfile, 'rt') as f:
+            self.assertEqual(f.readline().strip(), '---')
+
+        df2 = metacsv.read_csv(tmpfile)
+        self.assertTrue((df2.values == df.values).all().all())
+
+        with self.assertRaises(ValueError):
+            df.to_csv(tmpfile, compression='zip')
+
+        with self.assertRaises(ValueError):
+            df.to_csv(tmpfile, compression='bz2', compression_threads=2)
+
+    def test_shared_header_file(self):
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        shard_dir = os.path.join(self.test_tmp_prefix, 'shards')
+        header_file = os.path.join(shard_dir, 'metacsv.header')
+
+        if os.path.isdir(shard_dir):
+            shutil.rmtree(shard_dir)
+        os.makedirs(shard_dir)
+
+        df = metacsv.read_csv(testfile)
+        metacsv.to_header(header_file, attrs=df.attrs, coords=df.coords, variables=df.variables)
+
+        body = pd.DataFrame(df).reset_index()
+        for i in range(3):
+            body.iloc[i * 10:(i + 1) * 10].to_csv(
+                os.path.join(shard_dir, 'shard_{}.csv'.format(i)), index=False)
+
+        with metacsv.instrument() as events:
+            shards = metacsv.read_many(os.path.join(shard_dir, 'shard_*.csv'))
+
+        self.assertEqual(len(shards), 3)
+        self.assertEqual(
+            len([e for e in events if e.stage == 'header_file']), 1)
+
+        for shard in shards:
+            self.assertEqual(shard.index.names, df.index.names)
+            self.assertEqual(shard.base_coords, df.base_coords)
+            self.assertEqual(shard.attrs, df.attrs)
+
+        shard_file = os.path.join(shard_dir, 'shard_0.csv')
+
+        # parsed headers are used as-is and are not modified
+        header = metacsv.io.parsers.load_header_file(header_file)
+        for parsed in [header, metacsv.read_header(header_file)]:
+            with metacsv.instrument() as events:
+                shard = metacsv.read_csv(shard_file, header_file=parsed)
+            self.assertEqual(shard.base_coords, df.base_coords)
+            self.assertEqual(len([e for e in events if e.stage == 'header_file']), 0)
+
+        self.assertIn('coords', header)
+
+        with open(header_file, 'r') as hf:
+            shard = metacsv.read_csv(shard_file, header_file=hf)
+        self.assertEqual(shard.base_coords, df.base_coords)
+
+    def test_append_csv(self):
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_append.csv')
+
+        df = metacsv.read_csv(testfile)
+        df.iloc[:20].to_csv(tmpfile)
+
+        metacsv.append_csv(tmpfile, df.iloc[20:40])
+
+        # pandas data gets its coordinates from the file's header
+        pdf = pd.DataFrame(df).reset_index().iloc[40:]
+        metacsv.append_csv(tmpfile, pdf)
+        self.assertIn('col1', pdf.columns)
+        self.assertIn('ind0', pdf.columns)
+
+        df2 = metacsv.read_csv(tmpfile)
+        self.assertEqual(df2.shape, df.shape)
+        self.assertEqual(df2.coords, df.coords)
+        self.assertTrue((df2.values == df.values).all().all())
+
+        with self.assertRaises(ValueError):
+            metacsv.append_csv(tmpfile, df[['col1']])
+
+        other = df.iloc[:2].copy()
+        other.coords = dict((c, None) for c in df.index.names)
+
+        with self.assertRaises(ValueError):
+            metacsv.append_csv(tmpfile, other)
+
+        self.assertEqual(metacsv.read_csv(tmpfile).shape, df.shape)
+
+        # appended text is utf-8 regardless of the locale
+        cities = metacsv.DataFrame({'city': [u'M\xfcnchen']})
+        cities.to_csv(tmpfile)
+        metacsv.append_csv(tmpfile, metacsv.DataFrame({'city': [u'Z\xfcrich']}))
+        self.assertEqual(
+            list(metacsv.read_csv(tmpfile, index_col=0)['city']),
+            [u'M\xfcnchen', u'Z\xfcrich'])
+
+    def test_update_header(self):
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_update_header.csv')
+
+        df = metacsv.read_csv(testfile)
+        df.to_csv(tmpfile, header_padding=100)
+
+        size = os.path.getsize(tmpfile)
+        metacsv.update_header(
+            tmpfile, attrs={'version': '1.1'}, variables={'col1': {'unit': 'gadgets'}})
+
+        # rewritten in place
+        self.assertEqual(os.path.getsize(tmpfile), size)
+
+        df2 = metacsv.read_csv(tmpfile)
+        self.assertEqual(df2.attrs['version'], '1.1')
+        self.assertEqual(df2.variables['col1']['unit'], 'gadgets')
+        self.assertEqual(df2.variables['col1']['name'], 'Column 1 data')
+        self.assertEqual(df2.coords, df.coords)
+        self.assertTrue((df2.values == df.values).all().all())
+
+        # too long for the header region: the body is copied
+        metacsv.update_header(tmpfile, attrs={'description': 'x' * 500})
+        self.assertGreater(os.path.getsize(tmpfile), size)
+
+        df3 = metacsv.read_csv(tmpfile)
+        self.assertEqual(df3.attrs['description'], 'x' * 500)
+        self.assertEqual(df3.attrs['version'], '1.1')
+        self.assertTrue((df3.values == df.values).all().all())
+
+    def test_row_index(self):
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_row_index.csv')
+
+        df = metacsv.read_csv(testfile)
+        df.to_csv(tmpfile, row_index=7)
+        self.assertTrue(os.path.isfile(tmpfile + '.rows.json'))
+
+        for rows in [slice(0, 5), slice(10, 23), slice(55, None), slice(-3, None)]:
+            df2 = metacsv.read_csv(tmpfile, rows=rows)
+            self.assertEqual(df2.coords.base_coords, df.coords.base_coords)
+            self.assertTrue((df2.values == df.iloc[rows].values).all().all())
+
+        # an index built by scanning matches the one written with the data
+        written = metacsv.io.indexing.load_row_index(tmpfile)
+        self.assertEqual(
+            metacsv.build_row_index(tmpfile, every=7)['offsets'], written['offsets'])
+
+        # stale indices are ignored
+        metacsv.append_csv(tmpfile, df.iloc[:3])
+        self.assertIsNone(metacsv.io.indexing.load_row_index(tmpfile))
+        df3 = metacsv.read_csv(tmpfile, rows=slice(58, 62))
+        self.assertTrue((df3.values == df.iloc[[58, 59, 0, 1]].values).all().all())
+
+        with self.assertRaises(ValueError):
+            metacsv.read_csv(tmpfile, rows=slice(-3, None))
+
+    def test_coord_index(self):
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_coord_index.csv')
+
+        df = metacsv.read_csv(testfile)
+        df.to_csv(tmpfile)
+
+        where = {'ind1': 'b', 'ind3': ['one']}
+        scanned = metacsv.read_csv(tmpfile, where=where)
+        self.assertEqual(len(scanned), 15)
+
+        index = metacsv.build_index(tmpfile, 'ind3')
+        self.assertEqual(sorted(index['ranges']), ['one', 'two'])
+
+        indexed = metacsv.read_csv(tmpfile, where=where)
+        self.assertEqual(indexed.coords.base_coords, df.coords.base_coords)
+        self.assertTrue(indexed.index.equals(scanned.index))
+        self.assertTrue((indexed.values == scanned.values).all().all())
+
+        self.assertEqual(len(metacsv.read_csv(tmpfile, where={'ind3': 'three'})), 0)
+
+        with self.assertRaises(ValueError):
+            metacsv.read_csv(tmpfile, where={'ind5': 'a'})
+
+        with self.assertRaises(ValueError):
+            metacsv.build_index(tmpfile, 'ind5')
+
+        # indexed and scanned reads agree on numeric columns
+        years = metacsv.DataFrame(
+            {'year': [2010.0, 2010.0, 2011.5, np.nan], 'value': [1, 2, 3, 4]})
+        years.to_csv(tmpfile)
+
+        selections = [{'year': 2010}, {'year': [2011.5, 2050]}, {'year': '2010'}]
+        scanned = [len(metacsv.read_csv(tmpfile, where=w)) for w in selections]
+        metacsv.build_index(tmpfile, 'year')
+        indexed = [len(metacsv.read_csv(tmpfile, where=w)) for w in selections]
+
+        self.assertEqual(scanned, [2, 1, 0])
+        self.assertEqual(indexed, scanned)
+
+    def test_partitioned(self):
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        tmpdir = os.path.join(self.test_tmp_prefix, 'test_partitioned')
+
+        df = metacsv.read_csv(testfile)
+        df.to_partitioned(tmpdir, partition_by=['ind1', 'ind3'], overwrite=True)
+
+        self.assertTrue(os.path.isfile(os.path.join(tmpdir, 'metacsv.header')))
+        self.assertTrue(os.path.isfile(
+            os.path.join(tmpdir, 'ind1=b', 'ind3=two', 'part.csv')))
+
+        with self.assertRaises(ValueError):
+            df.to_partitioned(tmpdir, partition_by='ind1')
+
+        df2 = metacsv.read_partitioned(tmpdir)
+        self.assertEqual(df2.coords, df.coords)
+        self.assertEqual(df2.attrs, df.attrs)
+        self.assertTrue(
+            (df2.sort_index().values == df.sort_index().values).all().all())
+
+        df3 = metacsv.read_partitioned(tmpdir, where={'ind1': 'b', 'ind3': 'one'})
+        self.assertEqual(len(df3), 15)
+        self.assertEqual(set(df3.index.get_level_values('ind1')), {'b'})
+        self.assertEqual(set(df3.index.get_level_values('ind3')), {'one'})
+
+        # non-partition columns filter rows within each partition
+        df4 = metacsv.read_partitioned(tmpdir, where={'ind1': 'a', 'col1': [100, 102]})
+        self.assertEqual(len(df4), 2)
+
+        self.assertEqual(len(metacsv.read_partitioned(tmpdir, where={'ind3': 'six'})), 0)
+
+        # partitions are pruned by value, not by the text of the directory name
+        years = metacsv.DataFrame(
+            {'year': [2020.0, 2020.5, 2030.0], 'value': [1.0, 2.0, 3.0]})
+        years.to_partitioned(tmpdir, partition_by='year', processes=2, overwrite=True)
+
+        self.assertTrue(os.path.isdir(os.path.join(tmpdir, 'year=2020.0')))
+        self.assertEqual(len(metacsv.read_partitioned(tmpdir, where={'year': 2020})), 1)
+        self.assertEqual(
+            len(metacsv.read_partitioned(tmpdir, where={'year': [2020.5, 2030]})), 2)
+
+        # rows with missing keys are written to a partition of their own
+        regions = metacsv.DataFrame(
+            {'region': ['north', np.nan, 'south'], 'value': [1.0, 2.0, 3.0]})
+        regions.to_partitioned(tmpdir, partition_by='region', overwrite=True)
+
+        self.assertTrue(os.path.isdir(os.path.join(tmpdir, 'region=nan')))
+        regions2 = metacsv.read_partitioned(tmpdir)
+        self.assertEqual(len(regions2), 3)
+        self.assertEqual(sorted(regions2['value']), [1.0, 2.0, 3.0])
+
+    def test_concat_merge(self):
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        df = metacsv.read_csv(testfile)
+
+        first = metacsv.DataFrame(
+            pd.DataFrame(df.iloc[:20]), coords=df.coords._coords,
+            attrs={'source': 'other', 'author': 'me'},
+            variables={'col1': {'unit': 'wigits'}, 'col3': {'unit': 'gadgets'}})
+        second = metacsv.DataFrame(
+            pd.DataFrame(df.iloc[20:]), coords=df.coords._coords,
+            attrs={'source': df.attrs['source']}, variables=df.variables._data)
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            combined = metacsv.concat([first, second])
+
+        self.assertEqual(len(caught), 1)
+        self.assertTrue(issubclass(caught[0].category, metacsv.core.combine.MetadataConflictWarning))
+
+        self.assertEqual(combined.coords, df.coords)
+        self.assertTrue((combined.values == df.values).all().all())
+        self.assertEqual(dict(combined.attrs.items()), {'author': 'me'})
+        self.assertEqual(sorted(combined.variables._data), ['col1', 'col2', 'col3'])
+        self.assertEqual(combined.variables['col1']['name'], 'Column 1 data')
+
+        with self.assertRaises(ValueError):
+            metacsv.concat([first, second], combine_attrs='raise')
+
+        self.assertEqual(
+            metacsv.concat([first, second], combine_attrs='first').attrs['source'], 'other')
+
+        other = metacsv.DataFrame(pd.DataFrame(df.iloc[:5]).reset_index(), coords=['ind0', 'ind1'])
+        with self.assertRaises(ValueError):
+            metacsv.concat([first, other])
+
+        pop = metacsv.DataFrame(
+            {'region': ['USA', 'CAN'], 'pop': [309.3, 34.0]},
+            coords=['region'], variables={'pop': {'unit': 'millions'}})
+        gdp = metacsv.DataFrame(
+            {'region': ['USA', 'CAN', 'MEX'], 'year': [2010, 2010, 2010], 'gdp': [13599.3, 1240.0, 1051.6]},
+            coords=['region', 'year'], attrs={'author': 'A Person'})
+
+        merged = metacsv.merge(gdp, pop)
+        self.assertEqual(list(merged.index.names), ['region', 'year'])
+        self.assertEqual(len(merged), 2)
+        self.assertEqual(merged.attrs['author'], 'A Person')
+        self.assertEqual(merged.variables['pop']['unit'], 'millions')
+
+        self.assertEqual(len(metacsv.merge(gdp, pop, how='left')), 3)
+
+        # compact string variable definitions
+        a = metacsv.DataFrame({'v': [1.0]}, variables={'v': 'Value [m]'})
+        b = metacsv.DataFrame({'v': [2.0]}, variables={'v': 'Value [m]'})
+        c = metacsv.DataFrame({'v': [3.0]}, variables={'v': {'unit': 'km'}})
+
+        self.assertEqual(metacsv.concat([a, b]).variables['v'], 'Value [m]')
+
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter('always')
+            self.assertNotIn('v', metacsv.concat([a, c]).variables)
+
+        with self.assertRaises(ValueError):
+            metacsv.concat([a, c], combine_attrs='raise')
+
+    def test_rollup(self):
+        df = metacsv.DataFrame(
+            {'country': ['USA', 'CAN', 'FRA'] * 2,
+             'continent': ['NA', 'NA', 'EU'] * 2,
+             'hemisphere': ['W', 'W', 'E'] * 2,
+             'year': [2010] * 3 + [2011] * 3,
+             'pop': [309.3, 34.0, 65.0, 311.7, 34.3, 65.3]},
+            coords={'country': None, 'year': None, 'continent': 'country', 'hemisphere': 'continent'},
+            attrs={'author': 'A Person'}, variables={'pop': {'unit': 'millions'}})
+
+        continents = df.rollup('continent')
+        self.assertEqual(list(continents.index.names), ['year', 'continent', 'hemisphere'])
+        self.assertEqual(continents.coords.base_coords, ['year', 'continent'])
+        self.assertEqual(continents.coords['hemisphere'], ['continent'])
+        self.assertAlmostEqual(continents.loc[(2011, 'NA', 'W'), 'pop'], 346.0)
+        self.assertEqual(continents.attrs['author'], 'A Person')
+        self.assertEqual(continents.variables['pop']['unit'], 'millions')
+
+        levels = df.rollup(['continent', 'hemisphere'], how='max')
+        self.assertEqual(list(levels), ['continent', 'hemisphere'])
+        self.assertEqual(list(levels['hemisphere'].index.names), ['year', 'hemisphere'])
+        self.assertAlmostEqual(levels['hemisphere'].loc[(2010, 'W'), 'pop'], 309.3)
+
+        with self.assertRaises(ValueError):
+            df.rollup('country')
+
+    def test_validate_coords(self):
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_validate_coords.csv')
+
+        df = metacsv.read_csv(testfile)
+        self.assertEqual(len(df.coords.validate()), 0)
+
+        data = pd.DataFrame(df).reset_index()
+        data.loc[3, 's1'] = 'zz'
+        bad = metacsv.DataFrame(data, coords=df.coords._coords)
+
+        report = bad.coords.validate()
+        self.assertEqual(list(report), ['s1'])
+        self.assertEqual(report['s1']['base'], ['ind1', 'ind2'])
+        self.assertEqual(report['s1']['groups'], 1)
+        self.assertEqual(report['s1']['examples'], [('a', 'y')])
+
+        bad.to_csv(tmpfile)
+        metacsv.read_csv(tmpfile)
+
+        with self.assertRaises(metacsv.core.exceptions.CoordinateDependencyError):
+            metacsv.read_csv(tmpfile, validate_coords=True)
+
+        with self.assertRaises(AssertionError):
+            bad.to_xarray()
+
+    def test_normalize_coords(self):
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_normalize_coords.csv')
+
+        df = metacsv.read_csv(testfile)
+        df.to_csv(tmpfile, normalize_coords=True)
+
+        with open(tmpfile, 'r') as f:
+            content = f.read()
+
+        self.assertIn('lookups:', content)
+        self.assertIn('ind0,ind1,ind2,ind3,col1,col2', content)
+        self.assertNotIn(',ax,', content)
+
+        df2 = metacsv.read_csv(tmpfile)
+        self.assertEqual(df2.coords, df.coords)
+        self.assertTrue(df2.index.equals(df.index))
+        self.assertTrue((df2.values == df.values).all().all())
+        self.assertNotIn('lookups', metacsv.read_header(tmpfile)[0])
+
+        regions = metacsv.DataFrame(
+            {'region_id': [1, 2, 1, 3], 'region_name': ['North', 'South', 'North', 'East'],
+             'year': [2010, 2010, 2011, 2011], 'value': [1.0, 2.0, 3.0, 4.0]},
+            coords={'region_id': None, 'year': None, 'region_name': 'region_id'})
+        regions.to_csv(tmpfile, normalize_coords=True)
+
+        regions2 = metacsv.read_csv(tmpfile)
+        self.assertTrue(regions2.index.equals(regions.index))
+        self.assertEqual(regions2.index.get_level_values('region_id').dtype, np.int64)
+
+        # keys may already be in the index
+        regions2 = metacsv.read_csv(tmpfile, index_col=[0, 1])
+        self.assertTrue(regions2.index.equals(regions.index))
+        self.assertTrue((regions2['value'] == regions['value']).all())
+
+        inconsistent = metacsv.DataFrame(
+            {'region_id': [1, 1], 'region_name': ['North', 'Nord'], 'value': [1.0, 2.0]},
+            coords={'region_id': None, 'region_name': 'region_id'})
+        with self.assertRaises(ValueError):
+            inconsistent.to_csv(tmpfile, normalize_coords=True)
+
+        # selections on normalized coordinates apply after they are restored
+        south = metacsv.read_csv(tmpfile, where={'region_name': 'South', 'year': 2010})
+        self.assertEqual(len(south), 1)
+        self.assertEqual(south['value'].iloc[0], 2.0)
+        self.assertEqual(len(metacsv.read_csv(tmpfile, where={'region_name': 'North'})), 2)
+
+        # appended rows are checked against the lookup tables
+        metacsv.append_csv(tmpfile, metacsv.DataFrame(
+            {'region_id': [2], 'region_name': ['South'], 'year': [2012], 'value': [5.0]},
+            coords={'region_id': None, 'year': None, 'region_name': 'region_id'}))
+
+        appended = metacsv.read_csv(tmpfile)
+        self.assertEqual(len(appended), 5)
+        self.assertEqual(appended.index.get_level_values('region_name')[-1], 'South')
+
+        for region_id, region_name in [(2, 'West'), (4, 'West')]:
+            with self.assertRaises(ValueError):
+                metacsv.append_csv(tmpfile, metacsv.DataFrame(
+                    {'region_id': [region_id], 'region_name': [region_name],
+                     'year': [2012], 'value': [5.0]},
+                    coords={'region_id': None, 'year': None, 'region_name': 'region_id'}))
+
+        self.assertEqual(len(metacsv.read_csv(tmpfile)), 5)
+
+    def test_datacube(self):
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_datacube.csv')
+
+        df = metacsv.read_csv(testfile)
+        cube = metacsv.DataCube.from_dataframe(df)
+
+        self.assertEqual(cube.dims, ['ind0', 'ind1', 'ind2', 'ind3'])
+        self.assertEqual(cube.shape, (5, 2, 3, 2))
+        self.assertEqual(cube['col1'].shape, cube.shape)
+        self.assertEqual(cube.coord_values['s1'][0], ('ind1', 'ind2'))
+        self.assertEqual(cube['s1'].shape, (2, 3))
+
+        df2 = cube.to_dataframe()
+        self.assertEqual(df2.coords, df.coords)
+        self.assertTrue(df2.sort_index().index.equals(df.sort_index().index))
+        self.assertTrue((df2.sort_index().values == df.sort_index().values).all().all())
+
+        ds = cube.to_xarray()
+        self.assertEqual(ds['col1'].dims, ('ind0', 'ind1', 'ind2', 'ind3'))
+        cube2 = metacsv.DataCube.from_xarray(ds)
+        self.assertEqual(cube2.coords, cube.coords)
+        self.assertTrue((cube2['col2'] == cube['col2']).all())
+
+        sparse = metacsv.DataFrame(
+            pd.DataFrame(df).iloc[[0, 1, 2, 5, 7, 30]], coords=df.coords._coords)
+        cube3 = metacsv.DataCube.from_dataframe(sparse)
+        self.assertEqual(cube3['col1'].dtype, np.float64)
+        self.assertEqual(len(cube3.to_dataframe(dropna=True)), 6)
+
+        cube.to_csv(tmpfile)
+        self.assertEqual(metacsv.read_csv(tmpfile).coords, df.coords)
+
+        with self.assertRaises(ValueError):
+            metacsv.DataCube({'a': np.zeros(3)}, {'x': [1, 2]})
+
+    def test_column_stats(self):
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_column_stats.csv')
+
+        df = metacsv.DataFrame(
+            {'year': [2010, 2010, 2011], 'region': ['USA', 'CAN', 'USA'],
+             'pop': [309.3, 34.0, np.nan]},
+            coords={'year': None, 'region': None},
+            variables={'pop': 'Population [millions]'})
+        df.to_csv(tmpfile, stats=True)
+
+        self.assertEqual(df.variables['pop'], 'Population [millions]')
+
+        attrs, coords, variables = metacsv.read_header(tmpfile)
+        self.assertEqual(variables['pop']['unit'], 'millions')
+        self.assertEqual(variables['pop']['stats']['max'], 309.3)
+        self.assertEqual(variables['pop']['stats']['null_count'], 1)
+        self.assertEqual(variables['year']['stats']['min'], 2010)
+        self.assertEqual(variables['region']['stats']['distinct_count'], 2)
+
+        self.assertEqual(len(metacsv.read_csv(tmpfile, where={'year': 2011})), 1)
+        self.assertEqual(len(metacsv.read_csv(tmpfile, where={'year': 2050})), 0)
+        self.assertEqual(
+            [len(d) for d in metacsv.read_many([tmpfile], where={'region': 'FRA'})], [0])
+
+        # missing values are pruned by the null counts
+        self.assertEqual(
+            [len(d) for d in metacsv.read_many([tmpfile], where={'pop': np.nan})], [1])
+        self.assertEqual(
+            [len(d) for d in metacsv.read_many([tmpfile], where={'year': np.nan})], [0])
+
+        metacsv.append_csv(tmpfile, metacsv.DataFrame(
+            {'year': [2050], 'region': ['FRA'], 'pop': [65.0]},
+            coords={'year': None, 'region': None}))
+        self.assertEqual(len(metacsv.read_csv(tmpfile, where={'year': 2050})), 1)
+        self.assertEqual(metacsv.read_header(tmpfile)[2]['year']['stats']['count'], 4)
+
+        metacsv.read_csv(tmpfile).iloc[:1].to_csv(tmpfile)
+        self.assertNotIn('stats', metacsv.read_header(tmpfile)[2]['pop'])
+
+    def test_checksum(self):
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_checksum.csv')
+        tmpfile2 = os.path.join(self.test_tmp_prefix, 'test_checksum2.csv')
+
+        from metacsv.io.checksum import verify_checksum, body_checksum, \
+            DEFAULT_ALGORITHM
+
+        df = metacsv.read_csv(testfile)
+        df.to_csv(tmpfile, checksum=True)
+
+        checksum = metacsv.read_header(tmpfile)[0]['checksum']
+        self.assertTrue(checksum.startswith(DEFAULT_ALGORITHM + ':'))
+        self.assertEqual(checksum, body_checksum(tmpfile))
+        self.assertTrue(verify_checksum(tmpfile))
+        self.assertNotIn('checksum', df.attrs)
+
+        df.to_csv(tmpfile2, checksum='sha256', header_padding=100)
+        self.assertTrue(metacsv.read_header(tmpfile2)[0]['checksum'].startswith('sha256:'))
+
+        # header updates leave the body unchanged
+        metacsv.update_header(tmpfile, attrs={'version': '1.1'})
+        self.assertEqual(metacsv.read_header(tmpfile)[0]['checksum'], checksum)
+        self.assertTrue(verify_checksum(tmpfile))
+
+        metacsv.append_csv(tmpfile, df.iloc[:2])
+        self.assertNotEqual(metacsv.read_header(tmpfile)[0]['checksum'], checksum)
+        self.assertTrue(verify_checksum(tmpfile))
+
+        # a rewritten container does not carry the old checksum
+        metacsv.read_csv(tmpfile).to_csv(tmpfile2)
+        self.assertNotIn('checksum', metacsv.read_header(tmpfile2)[0])
+        self.assertIsNone(verify_checksum(tmpfile2))
+
+        with self.assertRaises(ValueError):
+            df.to_csv(tmpfile + '.gz', checksum=True)
+
+        # the hash covers the utf-8 bytes on disk, not the text handed to them
+        df2 = metacsv.DataFrame(
+            {'city': [u'M\xfcnchen', u'Z\xfcrich']}, attrs={'author': u'Jos\xe9'})
+        df2.to_csv(tmpfile2, checksum=True)
+        self.assertTrue(verify_checksum(tmpfile2))
+
     def test_command_line_version_check(self):
         def get_version(readfile):
             version_check_script = 'metacsv.scripts.version'
@@ -175,6 +954,24 @@ class MetacsvTestCase(unittest.TestCase):
 
         self.assertEqual(get_version(testfile), df.attrs['version'])
 
+    def test_command_line_inspect(self):
+        testfiles = [
+            os.path.join(self.testdata_prefix, f) for f in ['test5.csv', 'test6.csv']]
+
+        p = subprocess.Popen(
+            ['python', '-m', 'metacsv.scripts.cli', 'inspect', '-f', 'json', '-j', '2'] + testfiles,
+            stderr=subprocess.PIPE,
+            stdout=subprocess.PIPE)
+
+        out, err = p.communicate()
+        self.assertEqual(len(err.strip()), 0)
+
+        headers = [json.loads(l) for l in out.decode('utf-8').strip().split('\n')]
+        self.assertEqual([h['file'] for h in headers], testfiles)
+        self.assertEqual(headers[0]['attrs']['author'], 'series creator')
+        self.assertEqual(sorted(headers[1]['coords']['s1']), ['ind1', 'ind2'])
+        self.assertEqual(headers[1]['variables']['col1']['unit'], 'wigits')
+
     def test_xarray_variable_attribute_persistence(self):
         testfile = os.path.join(self.testdata_prefix, 'test6.csv')
         self.assertTrue(metacsv.read_csv(
@@ -192,6 +989,13 @@ class MetacsvTestCase(unittest.TestCase):
         df2 = metacsv.DataFrame({df.columns[0]: series})
         self.assertTrue(hasattr(df2, 'coords'))
 
+        # Panel is unavailable on pandas >= 0.25 and points to DataCube
+        if metacsv.core.internals.PandasPanel is None:
+            with self.assertRaises(TypeError) as context:
+                metacsv.Panel({'df': df})
+            self.assertIn('DataCube', str(context.exception))
+            return
+
         # Test DataFrame._constructor_expanddims
         panel = metacsv.Panel({'df': df})
         self.assertTrue(hasattr(panel, 'coords'))
@@ -446,6 +1250,45 @@ class MetacsvTestCase(unittest.TestCase):
             self.assertEqual(ds.col1.attrs['unit'], 'digits')
 
 
+    def test_dataarray_reshape(self):
+        df = metacsv.read_csv(
+            os.path.join(self.testdata_prefix, 'test6.csv')).sort_index()
+
+        # sorted product of base coords is reshaped without stacking
+        da = metacsv.to_dataarray(df)
+        self.assertEqual(da.shape, (5, 2, 3, 2, 2))
+        self.assertEqual(
+            int(da.sel(ind0='second', ind1='b', ind2='y', ind3='two', coldim_0='col2')),
+            219)
+
+        # incomplete products fall back to stacking
+        da = metacsv.to_dataarray(df.iloc[1:])
+        self.assertEqual(da.shape, (5, 2, 3, 2, 2))
+        self.assertTrue(da.isnull().any())
+
+    def test_from_xarray(self):
+        tmpnc = os.path.join(self.test_tmp_prefix, 'test_from_xarray.nc')
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_from_xarray.csv')
+
+        df = metacsv.read_csv(os.path.join(self.testdata_prefix, 'test6.csv'))
+        ds = df.to_xarray()
+        ds.to_netcdf(tmpnc)
+
+        df2 = metacsv.DataFrame.from_xarray(ds, chunksize=10)
+        self.assertEqual(df2.coords, df.coords)
+        self.assertEqual(df2.attrs, df.attrs)
+        self.assertEqual(df2.variables['col1']['unit'], 'wigits')
+        self.assertTrue((df2.col1 == df.col1.reindex(df2.index)).all())
+
+        df3 = metacsv.read_netcdf(tmpnc, chunksize=10)
+        self.assertEqual(df3.coords, df.coords)
+        self.assertTrue((df3.col2 == df.col2.reindex(df3.index)).all())
+
+        metacsv.to_csv(tmpnc, tmpfile, chunksize=10)
+        df4 = metacsv.read_csv(tmpfile)
+        self.assertEqual(df4.coords, df.coords)
+        self.assertTrue((df4.col1 == df.col1.reindex(df4.index)).all())
+
     def test_assertions(self):
         fp = os.path.join(self.testdata_prefix, 'test7.csv')
 
@@ -475,6 +1318,60 @@ class MetacsvTestCase(unittest.TestCase):
         self.assertEqual(df.variables, variables)
 
 
+    def test_dask_backend(self):
+        try:
+            import dask.dataframe
+        except ImportError:
+            self.skipTest('dask not installed')
+
+        tmpfile = os.path.join(self.test_tmp_prefix, 'test_dask.csv')
+
+        df = metacsv.DataFrame(
+            np.random.random((40, 2)), columns=['col1', 'col2'],
+            attrs={'author': 'test author'},
+            variables={'col1': {'unit': 'wigits'}})
+
+        df.index = pd.MultiIndex.from_product(
+            [list('abcd'), range(10)], names=['ind1', 'ind2'])
+        df.coords = {'ind1': None, 'ind2': None}
+        df.to_csv(tmpfile)
+
+        ddf = metacsv.read_csv(tmpfile, backend='dask', blocksize=200)
+
+        self.assertTrue(ddf.npartitions > 1)
+        self.assertEqual(ddf.attrs['author'], 'test author')
+        self.assertEqual(ddf.coords, df.coords)
+
+        res = ddf.compute().set_index(['ind1', 'ind2'])
+        self.assertTrue((abs(res.values - df.values) < 1e-7).all().all())
+
+        ds = metacsv.to_xarray(ddf)
+        self.assertTrue(hasattr(ds.col1.data, 'dask'))
+        self.assertEqual(ds.col1.attrs['unit'], 'wigits')
+        self.assertTrue((abs(ds.col1 - df.to_xarray().col1) < 1e-7).all())
+
+        # unsorted base coords fall back to an in-memory conversion
+        testfile = os.path.join(self.testdata_prefix, 'test6.csv')
+        ds = metacsv.to_xarray(
+            metacsv.read_csv(testfile, backend='dask', blocksize=300))
+        self.assertTrue(
+            (ds == metacsv.read_csv(testfile).to_xarray()).all().col1)
+
+        with self.assertRaises(ValueError):
+            metacsv.read_csv(tmpfile, backend='dask', index_col=[0, 1])
+
+        # values past the dtype sample are not silently cast
+        with open(tmpfile, 'w') as f:
+            f.write('a,b\n' + ''.join('{},{}\n'.format(i, i) for i in range(2000)) + '2000,2.5\n')
+
+        with self.assertRaises(ValueError):
+            metacsv.read_csv(tmpfile, backend='dask', blocksize=2000, sample=1000).compute()
+
+        res = metacsv.read_csv(
+            tmpfile, backend='dask', blocksize=2000, sample=1000,
+            dtype={'b': float}).compute()
+        self.assertEqual(res['b'].iloc[-1], 2.5)
+
     def tearDown(self):
         if os.path.isdir(self.test_tmp_prefix):
             shutil.rmtree(self.test_tmp_prefix)
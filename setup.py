@@ -68,4 +68,6 @@ setup(
         'Programming Language :: Python :: 3.5'
     ],
     test_suite='metacsv.testsuite',
+    entry_points={
+        'console_scripts': ['metacsv = metacsv.scripts.cli:main']},
 )